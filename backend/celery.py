@@ -0,0 +1,11 @@
+# Celery app for the tasks in tournaments/tasks.py. Start a worker with beat:
+#   celery -A backend worker -B
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+app = Celery('backend')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -71,6 +71,17 @@ SOCIALACCOUNT_PROVIDERS = {
     }
 }
 
+# Outbound OAuth provider calls (tournaments.providers). Timeouts are in seconds.
+SOCIAL_PROVIDER_CONNECT_TIMEOUT = float(os.getenv('SOCIAL_PROVIDER_CONNECT_TIMEOUT', 3.05))
+SOCIAL_PROVIDER_READ_TIMEOUT = float(os.getenv('SOCIAL_PROVIDER_READ_TIMEOUT', 5))
+SOCIAL_PROVIDER_MAX_RETRIES = 2
+SOCIAL_PROVIDER_POOL_SIZE = 20
+SOCIAL_PROVIDER_BREAKER_THRESHOLD = 5
+SOCIAL_PROVIDER_BREAKER_RESET = 30
+SOCIAL_PROVIDER_STUB_URL = os.getenv('SOCIAL_PROVIDER_STUB_URL')
+SOCIAL_IDENTITY_CACHE_SIZE = 10000
+SOCIAL_IDENTITY_CACHE_TTL = 300
+
 SOCIALACCOUNT_EMAIL_VERIFICATION = 'mandatory'
 SOCIALACCOUNT_EMAIL_REQUIRED = True
 
@@ -105,11 +116,32 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
 
 DATABASES = {
     'default': dj_database_url.config(default=os.environ.get('DATABASE_URL'))
 }
 
+PASSWORD_HASHERS = [
+    'tournaments.hashing.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# PBKDF2 work factor; existing hashes are upgraded to this count on the next login.
+PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', 1_000_000))
+# Logins and registrations hash on a dedicated pool; requests beyond
+# PASSWORD_HASHING_MAX_PENDING queued hashes get an immediate 503.
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', os.cpu_count() or 2))
+PASSWORD_HASHING_MAX_PENDING = int(os.getenv('PASSWORD_HASHING_MAX_PENDING', PASSWORD_HASHING_WORKERS * 4))
+# Lower work factor for accounts created by the import endpoint; upgraded on first login.
+PLAYER_IMPORT_HASH_ITERATIONS = int(os.getenv('PLAYER_IMPORT_HASH_ITERATIONS', 100_000))
+# The endpoint hashes on the shared pool while the request waits, so larger
+# files go through the import_players management command instead.
+PLAYER_IMPORT_MAX_ROWS = int(os.getenv('PLAYER_IMPORT_MAX_ROWS', 200))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -151,10 +183,99 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'tournaments.authentication.CachedJWTAuthentication',
     ],
 }
 
+# Cache-based invalidation (auth snapshots, squad index) only reaches every
+# worker through a shared backend; set REDIS_URL in multi-process deployments.
+# Without it Django's per-process LocMemCache is used.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+
+# Seconds an authenticated Player snapshot is reused before reloading from the DB.
+# Invalidation runs through the cache, so multi-process deployments need a shared
+# backend (e.g. Redis) in CACHES for permission changes to apply everywhere at once.
+AUTH_USER_CACHE_TTL = 60
+
+# Elo K-factor for team and player skill ratings.
+RATING_K_FACTOR = 32
+
+# Leaderboard points a player earns per completed match (see tournaments/stats.py).
+PLAYER_POINTS_PER_WIN = 3
+PLAYER_POINTS_PER_LOSS = 1
+
+# Scrim matchmaking (tournaments/scrims.py): the accepted rating gap starts at
+# SCRIM_WINDOW_BASE and widens by SCRIM_WINDOW_PER_MINUTE while a team waits.
+SCRIM_WINDOW_BASE = 50
+SCRIM_WINDOW_PER_MINUTE = 25
+SCRIM_WINDOW_MAX = 400
+SCRIM_MATCH_BATCH_SIZE = 500
+
+# Discord DM fan-out (tournaments/discord_client.py). Limits mirror Discord's
+# documented defaults and are replaced by X-RateLimit-* headers at runtime.
+DISCORD_BOT_TOKEN = os.environ.get('DISCORD_BOT_TOKEN')
+DISCORD_GLOBAL_RATE_LIMIT = 50
+DISCORD_ROUTE_RATE_LIMIT = 5
+DISCORD_ROUTE_RATE_WINDOW = 5.0
+DISCORD_NOTIFY_CONCURRENCY = 50
+DISCORD_NOTIFY_MAX_ATTEMPTS = 3
+# DM channel ids never change, so each recipient's is opened once and cached.
+DISCORD_DM_CHANNEL_CACHE_SECONDS = 30 * 24 * 3600
+DISCORD_FAKE_CLIENT = os.getenv('DISCORD_FAKE_CLIENT') == '1'
+
+# Notification outbox worker (tournaments/notifications.py).
+# Run `manage.py deliver_notifications --interval 10` and
+# `manage.py send_match_reminders --interval 300` as long-lived processes, or
+# schedule the matching tasks in tournaments/tasks.py on a Celery beat.
+NOTIFICATION_BATCH_SIZE = 100
+NOTIFICATION_MAX_ATTEMPTS = 5
+NOTIFICATION_RETRY_BASE_SECONDS = 30
+NOTIFICATION_RETRY_MAX_SECONDS = 3600
+# A SENDING row older than this is assumed orphaned by a dead worker.
+NOTIFICATION_CLAIM_TIMEOUT_SECONDS = 300
+# Matches starting within this many minutes get a reminder.
+MATCH_REMINDER_WINDOW_MINUTES = 30
+
+# Matches a bracket job inserts per committed chunk (and progress update).
+BRACKET_JOB_CHUNK_SIZE = 500
+# A QUEUED or RUNNING bracket job older than this is marked FAILED so the
+# tournament can queue a new one.
+BRACKET_JOB_TIMEOUT_SECONDS = 900
+
+# Celery (backend/celery.py) for the tasks in tournaments/tasks.py; run
+# `celery -A backend worker -B` when a broker is configured.
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL')
+CELERY_BEAT_SCHEDULE = {
+    'update-online-statuses': {'task': 'tournaments.tasks.update_online_statuses', 'schedule': 60.0},
+    'run-scrim-matchmaking': {'task': 'tournaments.tasks.run_scrim_matchmaking', 'schedule': 5.0},
+    'deliver-notifications': {'task': 'tournaments.tasks.deliver_notifications', 'schedule': 10.0},
+    'send-match-reminders': {'task': 'tournaments.tasks.send_match_reminder_notifications', 'schedule': 300.0},
+    'advance-tournament-lifecycles': {'task': 'tournaments.tasks.advance_tournament_lifecycles', 'schedule': 60.0},
+}
+
+# Where queued bracket jobs run: 'celery' sends them to the worker, 'thread'
+# starts a background thread in the web process once the request commits,
+# and 'worker' leaves them for `manage.py run_bracket_jobs`. Either way the
+# request returns 202 straight away.
+BRACKET_JOB_RUNNER = os.getenv('BRACKET_JOB_RUNNER', 'celery' if CELERY_BROKER_URL else 'thread')
+
+# Registration closes this many minutes before a tournament's start_date
+# (tournaments/lifecycle.py). Run `manage.py advance_tournament_lifecycles
+# --interval 60` to keep statuses and rounds moving; the list filters and
+# registration also check start_date in case a tick is late.
+TOURNAMENT_REGISTRATION_CLOSE_MINUTES = 30
+
+# Per-team squad placement index served by UserSquadStatusView; SquadMember writes drop it.
+# Only cached with a shared backend (see CACHES): with the per-process default,
+# other workers could not see the invalidation, so every lookup reads the DB.
+SQUAD_INDEX_CACHE_TTL = 300
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=7),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
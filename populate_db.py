@@ -1,7 +1,6 @@
 import os
 import django
 import random
-import uuid
 from faker import Faker
 from django.utils import timezone
 from django.contrib.auth.hashers import make_password
@@ -14,6 +13,7 @@ from tournaments.models import (
     TournamentTeam, Squad, SquadMember, News,
     TeamColor, SquadType
 )
+from tournaments.join_codes import generate_join_code
 
 fake = Faker()
 
@@ -43,12 +43,6 @@ for _ in range(50):
         win_rate=round(random.uniform(40, 100), 2)
     ))
 
-def generate_unique_join_code():
-    while True:
-        code = uuid.uuid4().hex[:10].upper()
-        if not Team.objects.filter(join_code=code).exists():
-            return code
-
 print("Creating teams...")
 teams = []
 team_leads = [p for p in players if p.is_team_lead]
@@ -63,7 +57,7 @@ for i in range(min(4, len(team_leads))):
     team = Team.objects.create(
         name=random.choice(team_names),
         lead_player=lead,
-        join_code=generate_unique_join_code()
+        join_code=generate_join_code()
     )
     teams.append(team)
     TeamMember.objects.create(team=team, player=lead)
@@ -119,7 +113,8 @@ for i, color in enumerate(TeamColor):
 
     print(f"Creating squads for {team.name} ({color})...")
 
-    for squad_type in SquadType.choices:
+    min_squads, max_squads = tournament.get_squad_limits()
+    for squad_type in SquadType.choices[:max_squads]:
         squad = Squad.objects.create(
             participant=participant,
             squad_type=squad_type[0]
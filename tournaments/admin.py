@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Player, Team, TeamMember, SocialAccount, Tournament, TournamentParticipant, TournamentMatch, News, TournamentTeam, Squad, SquadMember
+from .models import Player, Team, TeamMember, SocialAccount, Tournament, TournamentParticipant, TournamentWaitlistEntry, TournamentMatch, News, TournamentTeam, Squad, SquadMember, PlayerMatchStat, ScrimQueueEntry, ScrimMatch, NotificationOutbox, BracketGenerationJob
 
 @admin.register(Player)
 class PlayerAdmin(admin.ModelAdmin):
@@ -28,7 +28,13 @@ class TournamentAdmin(admin.ModelAdmin):
 
 @admin.register(TournamentParticipant)
 class TournamentParticipantAdmin(admin.ModelAdmin):
-    list_display = ('tournament', 'team', 'registered_at')
+    list_display = ('tournament', 'team', 'registered_at', 'seed', 'protected_seed')
+    list_editable = ('protected_seed',)
+    raw_id_fields = ('tournament', 'team')
+
+@admin.register(TournamentWaitlistEntry)
+class TournamentWaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('tournament', 'team', 'created_at')
     raw_id_fields = ('tournament', 'team')
 
 @admin.register(TournamentMatch)
@@ -84,4 +90,34 @@ class SquadMemberAdmin(admin.ModelAdmin):
 @admin.register(SocialAccount)
 class SocialAccountAdmin(admin.ModelAdmin):
     list_display = ('user', 'provider', 'uid')
-    search_fields = ('user__username', 'provider', 'uid')
\ No newline at end of file
+    search_fields = ('user__username', 'provider', 'uid')
+
+@admin.register(PlayerMatchStat)
+class PlayerMatchStatAdmin(admin.ModelAdmin):
+    list_display = ('match', 'player', 'team', 'kills', 'deaths', 'won', 'points')
+    list_filter = ('won',)
+    raw_id_fields = ('match', 'player', 'team')
+
+@admin.register(ScrimQueueEntry)
+class ScrimQueueEntryAdmin(admin.ModelAdmin):
+    list_display = ('team', 'region', 'platform', 'mode', 'rating', 'status', 'created_at')
+    list_filter = ('status', 'region', 'platform', 'mode')
+    raw_id_fields = ('team', 'queued_by', 'match')
+
+@admin.register(ScrimMatch)
+class ScrimMatchAdmin(admin.ModelAdmin):
+    list_display = ('team1', 'team2', 'region', 'mode', 'is_completed', 'created_at')
+    list_filter = ('region', 'platform', 'mode', 'is_completed')
+    raw_id_fields = ('team1', 'team2', 'winner')
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ('event', 'target_type', 'target_id', 'status', 'attempts', 'available_at', 'sent_at')
+    list_filter = ('status', 'event', 'target_type')
+    search_fields = ('dedupe_key',)
+
+@admin.register(BracketGenerationJob)
+class BracketGenerationJobAdmin(admin.ModelAdmin):
+    list_display = ('tournament', 'status', 'progress', 'matches_created', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    raw_id_fields = ('tournament', 'requested_by')
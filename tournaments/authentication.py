@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import Player
+
+SNAPSHOT_FIELDS = {
+    'id', 'email', 'username', 'is_active', 'is_staff', 'is_superuser',
+    'is_admin', 'is_team_lead', 'is_team_captain', 'is_online', 'last_activity', 'tier',
+}
+
+# Saves touching these drop the cached snapshot; activity bookkeeping does not.
+INVALIDATING_FIELDS = SNAPSHOT_FIELDS - {'last_activity', 'is_online'}
+
+
+def get_snapshot_fields():
+    # Model.from_db expects loaded values in concrete field order.
+    return [f.attname for f in Player._meta.concrete_fields if f.attname in SNAPSHOT_FIELDS]
+
+
+def snapshot_cache_key(user_id):
+    return f'auth:player:{user_id}'
+
+
+def invalidate_user_snapshot(user_id):
+    cache.delete(snapshot_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that rebuilds request.user from a short-lived cached
+    snapshot instead of loading the Player row on every request. Fields outside
+    the snapshot are deferred and load on first access."""
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Revocation compares against the password hash, which is never cached.
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        field_names = get_snapshot_fields()
+        key = snapshot_cache_key(user_id)
+        values = cache.get(key)
+
+        if values is None:
+            values = Player.objects.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).values_list(*field_names).first()
+            if values is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            cache.set(key, values, getattr(settings, 'AUTH_USER_CACHE_TTL', 60))
+
+        user = Player.from_db(DEFAULT_DB_ALIAS, field_names, values)
+        # Lets Player.save skip the cached columns nobody changed (see models.py).
+        user._auth_snapshot = dict(zip(field_names, values))
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return user
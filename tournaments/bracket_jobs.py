@@ -0,0 +1,201 @@
+# tournaments/bracket_jobs.py
+import threading
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import notifications
+from .models import BracketGenerationJob, Tournament, TournamentMatch
+
+SUPPORTED_BRACKET_TYPES = ('SINGLE_ELIM', 'SWISS', 'ROUND_ROBIN')
+ACTIVE_STATUSES = ('QUEUED', 'RUNNING')
+
+
+class BracketJobError(Exception):
+    pass
+
+
+def bracket_rounds(tournament: Tournament, bracket) -> Tuple[Dict, List[Tuple[int, List[Tuple]]], int]:
+    """Normalises each generator's output to (bracket_structure JSON,
+    [(round_number, [(team1_id, team2_id, winner_id), ...]), ...],
+    total number of rounds the format needs)."""
+    if tournament.bracket_type == 'SINGLE_ELIM':
+        pairs = [(match['team1'], match['team2'], match.get('winner')) for match in bracket['matches']]
+        return bracket, [(1, pairs)], (2 * len(pairs) - 1).bit_length()
+
+    if tournament.bracket_type == 'SWISS':
+        round_number = max(tournament.current_round, 1)
+        pairs = [(a.team_id, b.team_id, None) for a, b in bracket]
+        structure = {'round': round_number, 'matches': [
+            {'team1': team1, 'team2': team2, 'match_num': number}
+            for number, (team1, team2, _) in enumerate(pairs, start=1)
+        ]}
+        # Swiss needs ceil(log2(field)) rounds to separate a single leader.
+        total = max((tournament.participants.count() - 1).bit_length(), round_number)
+        return structure, [(round_number, pairs)], total
+
+    if tournament.bracket_type == 'ROUND_ROBIN':
+        rounds = [
+            (number, [(a.team_id, b.team_id, None) for a, b in pairings])
+            for number, pairings in enumerate(bracket, start=1)
+        ]
+        structure = {'rounds': [
+            {'round_num': number, 'matches': [[team1, team2] for team1, team2, _ in pairs]}
+            for number, pairs in rounds
+        ]}
+        return structure, rounds, len(rounds)
+
+    raise BracketJobError(f"{tournament.get_bracket_type_display()} brackets are not supported yet")
+
+
+def expire_stale_jobs(tournament: Optional[Tournament] = None, now=None) -> int:
+    """Marks QUEUED or RUNNING jobs older than BRACKET_JOB_TIMEOUT_SECONDS as
+    FAILED, so a lost worker or message cannot lock a tournament out of
+    generating its bracket. Returns how many were expired."""
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=getattr(settings, 'BRACKET_JOB_TIMEOUT_SECONDS', 900))
+    stale = BracketGenerationJob.objects.filter(status__in=ACTIVE_STATUSES).filter(
+        Q(started_at__lt=cutoff) | Q(started_at__isnull=True, created_at__lt=cutoff)
+    )
+    if tournament is not None:
+        stale = stale.filter(tournament=tournament)
+    return stale.update(status='FAILED', error='Timed out before it finished', finished_at=now)
+
+
+def start_bracket_job(tournament: Tournament, user, idempotency_key: Optional[str] = None) -> Tuple[BracketGenerationJob, bool]:
+    """Returns (job, created). A repeated idempotency key, or any job still
+    queued or running for the tournament, is returned instead of a new one."""
+    expire_stale_jobs(tournament)
+    jobs = BracketGenerationJob.objects.filter(tournament=tournament)
+    lookup = Q(status__in=ACTIVE_STATUSES)
+    if idempotency_key:
+        lookup = Q(idempotency_key=idempotency_key) | lookup
+    existing = jobs.filter(lookup).order_by('-id').first()
+    if existing:
+        return existing, False
+
+    try:
+        with transaction.atomic():
+            job = BracketGenerationJob.objects.create(
+                tournament=tournament, requested_by=user if user and user.is_authenticated else None,
+                idempotency_key=idempotency_key or None,
+            )
+    except IntegrityError:
+        # Lost a race with an identical request; hand back the winner's job.
+        return jobs.filter(lookup).order_by('-id').first(), False
+
+    transaction.on_commit(lambda: _dispatch(job.pk))
+    return job, True
+
+
+def _dispatch(job_id: int):
+    runner = getattr(settings, 'BRACKET_JOB_RUNNER', 'thread')
+    try:
+        if runner == 'celery':
+            from backend.celery import app
+            app.send_task('tournaments.tasks.generate_bracket_job', args=[job_id])
+        elif runner == 'thread':
+            threading.Thread(target=_run_in_thread, args=(job_id,), name=f'bracket-job-{job_id}', daemon=True).start()
+        # 'worker': run_queued_jobs picks it up.
+    except Exception as e:
+        # Left QUEUED, the job would block the tournament until it expired.
+        BracketGenerationJob.objects.filter(pk=job_id, status='QUEUED').update(
+            status='FAILED', error=f'Could not queue the job: {e}', finished_at=timezone.now()
+        )
+
+
+def _run_in_thread(job_id: int):
+    try:
+        run_bracket_job(job_id)
+    finally:
+        # The thread's own connection; the request's is untouched.
+        connection.close()
+
+
+def run_queued_jobs() -> int:
+    """Runs every QUEUED job, oldest first, after expiring stale ones.
+    Claims are atomic, so this can run beside the thread runner or several
+    copies of itself. Returns how many jobs this call ran."""
+    expire_stale_jobs()
+    job_ids = BracketGenerationJob.objects.filter(status='QUEUED').order_by('id').values_list('id', flat=True)
+    return sum(run_bracket_job(job_id) is not None for job_id in list(job_ids))
+
+
+def _set_progress(job: BracketGenerationJob, progress: int):
+    job.progress = progress
+    BracketGenerationJob.objects.filter(pk=job.pk).update(progress=progress)
+
+
+def _build_matches(tournament: Tournament, rounds: List[Tuple[int, List[Tuple]]]) -> List[TournamentMatch]:
+    now = timezone.now()
+    matches = []
+    for round_number, pairs in rounds:
+        for number, (team1_id, team2_id, winner_id) in enumerate(pairs, start=1):
+            matches.append(TournamentMatch(
+                tournament=tournament, round_number=round_number, match_number=number,
+                team1_id=team1_id, team2_id=team2_id, mode=tournament.mode,
+                scheduled_time=tournament.start_date if round_number == rounds[0][0] else None,
+                # A bye is settled the moment it is created.
+                winner_id=winner_id, is_completed=winner_id is not None,
+                completed_at=now if winner_id is not None else None,
+            ))
+    return matches
+
+
+def _clear_unplayed(tournament: Tournament, round_numbers: List[int]):
+    existing = TournamentMatch.objects.filter(tournament=tournament, round_number__in=round_numbers)
+    existing.filter(Q(is_completed=False) | Q(team2__isnull=True), rated=False).delete()
+    if existing.exists():
+        raise BracketJobError('These rounds already have results; they cannot be regenerated')
+
+
+def run_bracket_job(job_id: int) -> Optional[BracketGenerationJob]:
+    """Generates the bracket and creates its matches in committed chunks so
+    pollers see progress. Safe to call twice for one job: only the call that
+    moves it from QUEUED to RUNNING does any work."""
+    claimed = BracketGenerationJob.objects.filter(pk=job_id, status='QUEUED').update(
+        status='RUNNING', started_at=timezone.now(), progress=0
+    )
+    if not claimed:
+        return None
+    job = BracketGenerationJob.objects.select_related('tournament').get(pk=job_id)
+    tournament = job.tournament
+    chunk_size = getattr(settings, 'BRACKET_JOB_CHUNK_SIZE', 500)
+    created_ids = []
+
+    try:
+        structure, rounds, total_rounds = bracket_rounds(tournament, tournament.generate_bracket())
+        _set_progress(job, 20)
+
+        round_numbers = [round_number for round_number, _ in rounds]
+        with transaction.atomic():
+            _clear_unplayed(tournament, round_numbers)
+
+        matches = _build_matches(tournament, rounds)
+        for start in range(0, len(matches), chunk_size):
+            chunk = TournamentMatch.objects.bulk_create(matches[start:start + chunk_size])
+            created_ids.extend(match.pk for match in chunk)
+            _set_progress(job, 20 + 75 * len(created_ids) // len(matches))
+
+        with transaction.atomic():
+            # Expired as stale meanwhile: a retry may already be running.
+            if not BracketGenerationJob.objects.select_for_update().filter(pk=job.pk, status='RUNNING').exists():
+                raise BracketJobError('Timed out before it finished')
+            tournament.bracket_structure = structure
+            tournament.is_started = True
+            tournament.current_round = round_numbers[0]
+            tournament.total_rounds = total_rounds
+            tournament.save(update_fields=['bracket_structure', 'is_started', 'current_round', 'total_rounds'])
+            notifications.bracket_generated(tournament)
+            job.status, job.progress, job.finished_at = 'SUCCEEDED', 100, timezone.now()
+            job.rounds, job.matches_created = round_numbers, len(created_ids)
+            job.save(update_fields=['status', 'progress', 'finished_at', 'rounds', 'matches_created'])
+    except Exception as e:
+        TournamentMatch.objects.filter(pk__in=created_ids).delete()
+        job.status, job.error, job.finished_at = 'FAILED', str(e) or e.__class__.__name__, timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+    return job
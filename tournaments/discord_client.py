@@ -0,0 +1,312 @@
+# tournaments/discord_client.py
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from django.conf import settings
+from django.core.cache import BaseCache, cache
+
+DISCORD_API_URL = 'https://discord.com/api/v10'
+DM_CHANNEL_ROUTE = 'POST /users/@me/channels'
+
+
+class DiscordError(Exception):
+    def __init__(self, message: str, status: Optional[int] = None, retryable: bool = False):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+
+
+class DiscordRateLimited(DiscordError):
+    def __init__(self, retry_after: float, route: str, is_global: bool = False):
+        super().__init__(f'Rate limited on {route} for {retry_after:.2f}s', status=429, retryable=True)
+        self.retry_after = retry_after
+        self.route = route
+        self.is_global = is_global
+
+
+class TokenBucket:
+    """`capacity` requests per `per_seconds`, refilled continuously. Not
+    thread-safe: one bucket belongs to one event loop."""
+
+    def __init__(self, capacity: int, per_seconds: float):
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> bool:
+        if self.delay() > 0:
+            return False
+        self.tokens -= 1
+        return True
+
+    async def acquire(self):
+        # No await between the check and the take, so this is atomic on one loop.
+        while not self.take():
+            await asyncio.sleep(self.delay())
+
+    def block(self, seconds: float):
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def sync(self, limit: int, remaining: int, reset_after: float):
+        # Trust the provider's view of the bucket over our own estimate; with
+        # nothing left, wait for its reset rather than our refill rate.
+        if limit:
+            self.capacity = limit
+            if remaining == limit - 1 and reset_after > 0:
+                # First request of a fresh window: reset_after spans all of it.
+                self.rate = limit / reset_after
+        self.tokens = min(self.tokens, float(remaining))
+        if remaining <= 0:
+            self.block(reset_after)
+
+
+class RouteRateLimiter:
+    """A global bucket plus one lazily created bucket per route. Buckets start
+    from the configured defaults and follow the provider's X-RateLimit-*
+    headers once responses arrive."""
+
+    def __init__(self, global_limit: int = 50, route_limit: int = 5, route_window: float = 5.0):
+        self.global_bucket = TokenBucket(global_limit, 1.0)
+        self.route_limit = route_limit
+        self.route_window = route_window
+        self.routes: Dict[str, TokenBucket] = {}
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            global_limit=getattr(settings, 'DISCORD_GLOBAL_RATE_LIMIT', 50),
+            route_limit=getattr(settings, 'DISCORD_ROUTE_RATE_LIMIT', 5),
+            route_window=getattr(settings, 'DISCORD_ROUTE_RATE_WINDOW', 5.0),
+        )
+
+    def bucket(self, route: str) -> TokenBucket:
+        bucket = self.routes.get(route)
+        if bucket is None:
+            bucket = self.routes[route] = TokenBucket(self.route_limit, self.route_window)
+        return bucket
+
+    async def acquire(self, route: str):
+        await self.bucket(route).acquire()
+        await self.global_bucket.acquire()
+
+    def update(self, route: str, headers) -> None:
+        try:
+            limit = int(headers['X-RateLimit-Limit'])
+            remaining = int(headers['X-RateLimit-Remaining'])
+            reset_after = float(headers['X-RateLimit-Reset-After'])
+        except (KeyError, TypeError, ValueError):
+            return
+        self.bucket(route).sync(limit, remaining, reset_after)
+
+    def penalize(self, error: DiscordRateLimited) -> None:
+        bucket = self.global_bucket if error.is_global else self.bucket(error.route)
+        bucket.block(error.retry_after)
+
+
+class DiscordBotClient:
+    """Sends DMs through the Discord REST API with a bot token: open the DM
+    channel, then post to it. Every request waits on the limiter for its route
+    first.
+
+    Opening a channel goes through one route shared by every recipient, so
+    channel ids are kept in `channels` and in `channel_cache` (the Django
+    cache by default) and only opened once per discord_id."""
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        limiter: Optional[RouteRateLimiter] = None,
+        channel_cache: Optional[BaseCache] = cache,
+    ):
+        self.token = token or getattr(settings, 'DISCORD_BOT_TOKEN', None)
+        self.limiter = limiter or RouteRateLimiter.from_settings()
+        self.channels: Dict[str, str] = {}
+        self.channel_cache = channel_cache
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=DISCORD_API_URL,
+                headers={'Authorization': f'Bot {self.token}'},
+                timeout=httpx.Timeout(getattr(settings, 'SOCIAL_PROVIDER_READ_TIMEOUT', 5)),
+            )
+        return self._http
+
+    async def _request(self, route: str, method: str, path: str, **kwargs) -> Dict:
+        await self.limiter.acquire(route)
+        try:
+            response = await self._get_http_client().request(method, path, **kwargs)
+        except httpx.HTTPError as exc:
+            raise DiscordError(f'Discord request failed: {exc}', retryable=True) from exc
+
+        self.limiter.update(route, response.headers)
+        if response.status_code == 429:
+            body = response.json()
+            error = DiscordRateLimited(float(body.get('retry_after', 1.0)), route, bool(body.get('global')))
+            self.limiter.penalize(error)
+            raise error
+        if response.status_code >= 400:
+            raise DiscordError(
+                f'Discord returned {response.status_code}', status=response.status_code,
+                retryable=response.status_code >= 500,
+            )
+        return response.json()
+
+    @staticmethod
+    def _channel_key(discord_id: str) -> str:
+        return f'discord:dm-channel:{discord_id}'
+
+    async def _open_channel(self, discord_id: str) -> str:
+        channel_id = self.channels.get(discord_id)
+        if channel_id is None and self.channel_cache is not None:
+            channel_id = await self.channel_cache.aget(self._channel_key(discord_id))
+        if channel_id is None:
+            channel = await self._request(
+                DM_CHANNEL_ROUTE, 'POST', '/users/@me/channels', json={'recipient_id': discord_id}
+            )
+            channel_id = channel['id']
+            if self.channel_cache is not None:
+                await self.channel_cache.aset(
+                    self._channel_key(discord_id), channel_id,
+                    getattr(settings, 'DISCORD_DM_CHANNEL_CACHE_SECONDS', 30 * 24 * 3600),
+                )
+        self.channels[discord_id] = channel_id
+        return channel_id
+
+    async def send_direct_message(self, discord_id: str, message: str) -> None:
+        channel_id = await self._open_channel(discord_id)
+        try:
+            await self._request(
+                f'channel:{channel_id}', 'POST', f'/channels/{channel_id}/messages', json={'content': message}
+            )
+        except DiscordError as e:
+            if e.status == 404:
+                # The cached channel is gone; the next attempt reopens it.
+                self.channels.pop(discord_id, None)
+                if self.channel_cache is not None:
+                    await self.channel_cache.adelete(self._channel_key(discord_id))
+                e.retryable = True
+            raise
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+class FixedWindowBucket:
+    """How Discord counts on its side: `limit` requests per window, with the
+    window starting at its first request and resetting all at once."""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.count = 0
+        self.reset_at = 0.0
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        if now >= self.reset_at:
+            self.count = 0
+            self.reset_at = now + self.window
+        if self.count >= self.limit:
+            return False
+        self.count += 1
+        return True
+
+    def reset_after(self) -> float:
+        return max(self.reset_at - time.monotonic(), 0.0)
+
+
+class FakeDiscordClient(DiscordBotClient):
+    """DiscordBotClient with the HTTP call replaced by an in-process provider
+    that enforces the same limits server-side (channel opens included),
+    answers with rate-limit headers and 429s, and records what was delivered.
+    Used by tests and the benchmark_discord_fanout command. Channel ids are
+    only kept in memory unless a `channel_cache` is passed."""
+
+    def __init__(
+        self,
+        limiter: Optional[RouteRateLimiter] = None,
+        latency: float = 0.0,
+        global_limit: int = 50,
+        route_limit: int = 5,
+        route_window: float = 5.0,
+        unreachable: Iterable[str] = (),
+        channel_cache: Optional[BaseCache] = None,
+    ):
+        super().__init__(
+            token='fake', limiter=limiter or RouteRateLimiter(global_limit, route_limit, route_window),
+            channel_cache=channel_cache,
+        )
+        self.latency = latency
+        self.server_global = FixedWindowBucket(global_limit, 1.0)
+        self.route_limit = route_limit
+        self.route_window = route_window
+        self.server_routes: Dict[str, FixedWindowBucket] = {}
+        self.unreachable = set(unreachable)
+        self.delivered: List[Tuple[str, str]] = []
+        self.channels_opened = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _request(self, route: str, method: str, path: str, **kwargs) -> Dict:
+        await self.limiter.acquire(route)
+
+        bucket = self.server_routes.get(route)
+        if bucket is None:
+            bucket = self.server_routes[route] = FixedWindowBucket(self.route_limit, self.route_window)
+        for server_bucket, is_global in ((self.server_global, True), (bucket, False)):
+            if not server_bucket.take():
+                self.rate_limited += 1
+                error = DiscordRateLimited(server_bucket.reset_after(), route, is_global)
+                self.limiter.penalize(error)
+                raise error
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+        self.limiter.update(route, {
+            'X-RateLimit-Limit': bucket.limit,
+            'X-RateLimit-Remaining': bucket.limit - bucket.count,
+            'X-RateLimit-Reset-After': bucket.reset_after(),
+        })
+        if route == DM_CHANNEL_ROUTE:
+            self.channels_opened += 1
+            return {'id': f"dm-{kwargs['json']['recipient_id']}"}
+
+        discord_id = path.split('/')[2][len('dm-'):]
+        if discord_id in self.unreachable:
+            raise DiscordError('Cannot send messages to this user', status=403)
+        self.delivered.append((discord_id, kwargs['json']['content']))
+        return {}
+
+
+def get_discord_client():
+    # DISCORD_FAKE_CLIENT keeps local runs and load tests off the real API.
+    if getattr(settings, 'DISCORD_FAKE_CLIENT', False):
+        return FakeDiscordClient(limiter=RouteRateLimiter.from_settings())
+    return DiscordBotClient()
@@ -0,0 +1,187 @@
+# tournaments/hashing.py
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, get_hasher, make_password
+
+from .models import Player
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 with the work factor taken from PASSWORD_HASH_ITERATIONS, so each
+    environment can size it. Hashes made with a different count are upgraded
+    on the next successful login via must_update()."""
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_ITERATIONS', PBKDF2PasswordHasher.iterations)
+
+
+class HashingOverloaded(Exception):
+    pass
+
+
+class HashTimings:
+    def __init__(self):
+        self.queue_wait = 0.0
+        self.hashing = 0.0
+
+    def add(self, queue_wait: float, hashing: float):
+        self.queue_wait += queue_wait
+        self.hashing += hashing
+
+    def server_timing(self) -> str:
+        return f'hash-queue;dur={self.queue_wait * 1000:.1f}, hash;dur={self.hashing * 1000:.1f}'
+
+
+class StageMetrics:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def snapshot(self) -> Dict:
+        return {
+            'count': self.count,
+            'avg_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'max_ms': self.max * 1000,
+        }
+
+
+class PasswordHashingPool:
+    """Runs PBKDF2 on a dedicated thread pool. hashlib releases the GIL while
+    hashing, so the pool gives real parallelism while capping how many request
+    threads can be tied up by it. At most `max_pending` jobs (queued plus running)
+    are admitted; anything beyond that is shed immediately."""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+        self.stages = {'queue_wait': StageMetrics(), 'hashing': StageMetrics()}
+
+    def _submit(self, fn: Callable, args: tuple, block: bool = False) -> Future:
+        if not self._slots.acquire(blocking=block):
+            with self._lock:
+                self.rejected += 1
+            raise HashingOverloaded('Password hashing queue is full')
+
+        with self._lock:
+            self.pending += 1
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            try:
+                return fn(*args), started - submitted, time.perf_counter() - started
+            finally:
+                with self._lock:
+                    self.pending -= 1
+                self._slots.release()
+
+        return self.executor.submit(job)
+
+    def _collect(self, future: Future, timings: Optional[HashTimings]):
+        result, queue_wait, hashing = future.result()
+        with self._lock:
+            self.stages['queue_wait'].observe(queue_wait)
+            self.stages['hashing'].observe(hashing)
+        if timings is not None:
+            timings.add(queue_wait, hashing)
+        return result
+
+    def run(self, fn: Callable, *args, timings: Optional[HashTimings] = None):
+        return self._collect(self._submit(fn, args), timings)
+
+    def map(self, fn: Callable, items: Iterable, timings: Optional[HashTimings] = None) -> List:
+        """fn over every item, in order. A batch holds at most half the
+        workers at a time so it cannot crowd out logins and signups; it is
+        shed like run() only if no slot is free when it starts."""
+        in_flight = max(1, self.workers // 2)
+        results, futures = [], deque()
+        for index, item in enumerate(items):
+            if len(futures) >= in_flight:
+                results.append(self._collect(futures.popleft(), timings))
+            futures.append(self._submit(fn, (item,), block=index > 0))
+        results.extend(self._collect(future, timings) for future in futures)
+        return results
+
+    @contextmanager
+    def admit(self, timings: Optional[HashTimings] = None):
+        """Takes a slot for hashing done on the caller's own thread, shedding
+        like run() when none is free. For work that has to stay on the
+        request thread, such as authenticate()."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingOverloaded('Password hashing queue is full')
+
+        with self._lock:
+            self.pending += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            hashing = time.perf_counter() - started
+            with self._lock:
+                self.pending -= 1
+                self.stages['hashing'].observe(hashing)
+            self._slots.release()
+            if timings is not None:
+                timings.add(0.0, hashing)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'rejected': self.rejected,
+                'iterations': getattr(get_hasher(), 'iterations', None),
+                'stages': {name: stage.snapshot() for name, stage in self.stages.items()},
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool() -> PasswordHashingPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = getattr(settings, 'PASSWORD_HASHING_WORKERS', None) or os.cpu_count() or 2
+                _pool = PasswordHashingPool(
+                    workers=workers,
+                    max_pending=getattr(settings, 'PASSWORD_HASHING_MAX_PENDING', workers * 4),
+                )
+    return _pool
+
+
+def hash_password(raw_password: str, timings: Optional[HashTimings] = None) -> str:
+    return get_hashing_pool().run(make_password, raw_password, timings=timings)
+
+
+def authenticate_player(request, email: str, password: str, timings: Optional[HashTimings] = None) -> Optional[Player]:
+    # Through authenticate(), so every configured backend runs, hashes are
+    # upgraded and user_login_failed fires. The check hashes on this request
+    # thread; the pool only decides whether there is room for it.
+    with get_hashing_pool().admit(timings=timings):
+        return authenticate(request, email=email, password=password)
@@ -0,0 +1,202 @@
+# tournaments/importer.py
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+
+from .hashing import PasswordHashingPool
+from .leaderboard import append_new_players
+from .models import Player
+
+IMPORT_FIELDS = ('email', 'username', 'password', 'tier', 'country_code', 'discord_id')
+TIERS = {choice[0] for choice in Player.TIER_CHOICES}
+USERNAME_MAX_LENGTH = Player._meta.get_field('username').max_length
+
+
+def _init_worker():
+    # Spawned workers (non-fork platforms) start without Django configured.
+    import django
+    django.setup()
+
+
+def _hash_password(args: Tuple[str, Optional[int]]) -> str:
+    raw_password, iterations = args
+    if iterations is None:
+        return make_password(raw_password)
+    hasher = get_hasher()
+    return hasher.encode(raw_password, hasher.salt(), iterations)
+
+
+def parse_rows(stream: io.TextIOBase, fmt: str) -> Iterator[Tuple[int, Dict]]:
+    if fmt == 'csv':
+        for line_no, row in enumerate(csv.DictReader(stream), start=2):
+            yield line_no, row
+    elif fmt == 'ndjson':
+        for line_no, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_no, row if isinstance(row, dict) else {'__invalid__': True}
+    else:
+        raise ValueError(f'Unsupported import format: {fmt}')
+
+
+def detect_format(filename: str) -> str:
+    return 'ndjson' if filename.lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+
+
+class PlayerImporter:
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        workers: Optional[int] = None,
+        iterations: Optional[int] = None,
+        pool: Optional[PasswordHashingPool] = None,
+    ):
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 2
+        self.iterations = iterations
+        # Web requests hash on the shared pool (and are shed with it) rather
+        # than forking processes; `workers` only applies without one.
+        self.pool = pool
+
+    def _clean(self, row: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+        if row.get('__invalid__'):
+            return None, 'Row is not a JSON object'
+
+        cleaned = {field: (str(row.get(field) or '').strip()) for field in IMPORT_FIELDS}
+        cleaned['email'] = Player.objects.normalize_email(cleaned['email'])
+        cleaned['username'] = Player.normalize_username(cleaned['username'])
+        cleaned['tier'] = cleaned['tier'].upper() or 'BRONZE'
+        cleaned['country_code'] = cleaned['country_code'] or None
+        cleaned['discord_id'] = cleaned['discord_id'] or None
+
+        if not cleaned['email']:
+            return None, 'email is required'
+        try:
+            validate_email(cleaned['email'])
+        except ValidationError:
+            return None, 'email is invalid'
+        if not cleaned['username']:
+            return None, 'username is required'
+        if len(cleaned['username']) > USERNAME_MAX_LENGTH:
+            return None, 'username is too long'
+        if cleaned['tier'] not in TIERS:
+            return None, f"tier must be one of {', '.join(sorted(TIERS))}"
+        if cleaned['country_code'] and len(cleaned['country_code']) != 2:
+            return None, 'country_code must be two letters'
+        return cleaned, None
+
+    def _existing(self, field: str, values: List[str], ignore_case: bool = False) -> set:
+        players = Player.objects.all()
+        if ignore_case:
+            # Matches the in-file check: Foo@x.com and foo@x.com are one email.
+            players = players.annotate(folded=Lower(field))
+            values, field = [value.lower() for value in values], 'folded'
+        existing = set()
+        for start in range(0, len(values), self.chunk_size):
+            chunk = values[start:start + self.chunk_size]
+            existing.update(players.filter(**{f'{field}__in': chunk}).values_list(field, flat=True))
+        return existing
+
+    def _hash_all(self, passwords: List[str]) -> List[str]:
+        jobs = [(password, self.iterations) for password in passwords if password]
+        if self.pool is not None:
+            hashed = iter(self.pool.map(_hash_password, jobs))
+        elif self.workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+                hashed = iter(pool.map(_hash_password, jobs, chunksize=max(1, len(jobs) // (self.workers * 4))))
+        else:
+            hashed = iter(map(_hash_password, jobs))
+        # Rows without a password get an unusable one (no hashing cost) and must reset it.
+        return [next(hashed) if password else make_password(None) for password in passwords]
+
+    def _create_one_by_one(self, players: List[Player], line_numbers: List[int], rejected: List[Dict]) -> List[Player]:
+        created = []
+        for line_no, player in zip(line_numbers, players):
+            player.pk = None
+            try:
+                with transaction.atomic():
+                    Player.objects.bulk_create([player])
+            except IntegrityError:
+                rejected.append({'row': line_no, 'email': player.email, 'reason': 'email or username already taken'})
+            else:
+                created.append(player)
+        append_new_players([player.pk for player in created], batch_size=self.chunk_size)
+        return created
+
+    def run(self, rows: Iterable[Tuple[int, Dict]]) -> Dict:
+        rejected = []
+        accepted = []
+        seen_emails = set()
+        seen_usernames = set()
+        total = 0
+
+        for line_no, row in rows:
+            total += 1
+            cleaned, error = self._clean(row)
+            if error is None and cleaned['email'].lower() in seen_emails:
+                error = 'duplicate email in file'
+            if error is None and cleaned['username'] in seen_usernames:
+                error = 'duplicate username in file'
+            if error:
+                rejected.append({'row': line_no, 'email': (row or {}).get('email'), 'reason': error})
+                continue
+            seen_emails.add(cleaned['email'].lower())
+            seen_usernames.add(cleaned['username'])
+            accepted.append((line_no, cleaned))
+
+        taken_emails = self._existing('email', [c['email'] for _, c in accepted], ignore_case=True)
+        taken_usernames = self._existing('username', [c['username'] for _, c in accepted])
+
+        to_create = []
+        for line_no, cleaned in accepted:
+            if cleaned['email'].lower() in taken_emails:
+                rejected.append({'row': line_no, 'email': cleaned['email'], 'reason': 'email already registered'})
+            elif cleaned['username'] in taken_usernames:
+                rejected.append({'row': line_no, 'email': cleaned['email'], 'reason': 'username already taken'})
+            else:
+                to_create.append((line_no, cleaned))
+
+        passwords = self._hash_all([cleaned['password'] for _, cleaned in to_create])
+        players = [
+            Player(
+                email=cleaned['email'],
+                username=cleaned['username'],
+                password=password,
+                tier=cleaned['tier'],
+                country_code=cleaned['country_code'],
+                discord_id=cleaned['discord_id'],
+            )
+            for (_, cleaned), password in zip(to_create, passwords)
+        ]
+
+        try:
+            with transaction.atomic():
+                Player.objects.bulk_create(players, batch_size=self.chunk_size)
+                # bulk_create skips post_save, so place the new players on the leaderboard here.
+                append_new_players([player.pk for player in players], batch_size=self.chunk_size)
+        except IntegrityError:
+            # Someone else registered one of these emails or usernames after the
+            # check above; insert row by row so only the colliding rows are rejected.
+            players = self._create_one_by_one(players, [line_no for line_no, _ in to_create], rejected)
+
+        rejected.sort(key=lambda item: item['row'])
+        return {
+            'total': total,
+            'created': len(players),
+            'rejected_count': len(rejected),
+            'rejected': rejected,
+        }
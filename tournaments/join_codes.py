@@ -0,0 +1,92 @@
+# tournaments/join_codes.py
+import hashlib
+import hmac
+import threading
+from typing import Callable
+
+from django.conf import settings
+
+ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+CODE_LENGTH = 10
+
+# A code is the keyed permutation of a 51-bit sequence number issued by the
+# database. 2**51 < 36**10, so every sequence number fits in ten base-36
+# characters.
+SEQUENCE_BITS = 51
+
+HALF_BITS = 26
+HALF_MASK = (1 << HALF_BITS) - 1
+FEISTEL_ROUNDS = 4
+
+
+def normalize_join_code(code) -> str:
+    return (code or '').strip().upper()
+
+
+def issue_sequence_number() -> int:
+    # One auto-increment row per code: the database never hands the same id to
+    # two workers, and does not reuse it after a restart or a clock step.
+    from .models import JoinCodeSequence
+    return JoinCodeSequence.objects.create().pk
+
+
+class JoinCodeGenerator:
+    """Turns sequence numbers into join codes.
+
+    The numbers come from `next_sequence`, by default the JoinCodeSequence
+    table, so they never repeat across processes. Each one is run through a
+    Feistel network keyed from SECRET_KEY. That network is a bijection, so
+    distinct sequence numbers give distinct codes, and consecutive codes do not
+    look consecutive.
+    """
+
+    def __init__(self, key: bytes, next_sequence: Callable[[], int] = issue_sequence_number):
+        self.key = key
+        self.next_sequence = next_sequence
+
+    def _round(self, round_index: int, half: int) -> int:
+        message = round_index.to_bytes(1, 'big') + half.to_bytes(4, 'big')
+        digest = hmac.new(self.key, message, hashlib.sha256).digest()
+        return int.from_bytes(digest[:4], 'big') & HALF_MASK
+
+    def permute(self, value: int) -> int:
+        # Feistel over 52 bits, cycle-walked back into the 51-bit domain.
+        while True:
+            left, right = value >> HALF_BITS, value & HALF_MASK
+            for round_index in range(FEISTEL_ROUNDS):
+                left, right = right, left ^ self._round(round_index, right)
+            value = (left << HALF_BITS) | right
+            if value < (1 << SEQUENCE_BITS):
+                return value
+
+    @staticmethod
+    def encode(value: int) -> str:
+        chars = []
+        for _ in range(CODE_LENGTH):
+            value, index = divmod(value, len(ALPHABET))
+            chars.append(ALPHABET[index])
+        return ''.join(reversed(chars))
+
+    def code_for(self, sequence: int) -> str:
+        return self.encode(self.permute(sequence))
+
+    def generate(self) -> str:
+        return self.code_for(self.next_sequence())
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_join_code_generator() -> JoinCodeGenerator:
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                key = hashlib.sha256(f'join-code:{settings.SECRET_KEY}'.encode()).digest()
+                _generator = JoinCodeGenerator(key)
+    return _generator
+
+
+def generate_join_code() -> str:
+    return get_join_code_generator().generate()
@@ -0,0 +1,276 @@
+# tournaments/leaderboard.py
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+
+from .models import LeaderboardBucket, LeaderboardEntry, LeaderboardPartition, Player
+
+SCOPES = ('global', 'tier', 'country')
+
+
+def partition_keys(tier: Optional[str], country_code: Optional[str]) -> List[str]:
+    keys = ['global']
+    if tier:
+        keys.append(f'tier:{tier}')
+    if country_code:
+        keys.append(f'country:{country_code.lower()}')
+    return keys
+
+
+def partition_key(scope: str, value: Optional[str] = None) -> str:
+    if scope == 'global':
+        return 'global'
+    if scope == 'tier':
+        return f'tier:{(value or "").upper()}'
+    return f'country:{(value or "").lower()}'
+
+
+def _partition_ids(keys: Iterable[str]) -> Dict[str, int]:
+    keys = set(keys)
+    ids = dict(LeaderboardPartition.objects.filter(key__in=keys).values_list('key', 'id'))
+    missing = keys - set(ids)
+    if missing:
+        LeaderboardPartition.objects.bulk_create(
+            [LeaderboardPartition(key=key) for key in missing], ignore_conflicts=True
+        )
+        ids.update(LeaderboardPartition.objects.filter(key__in=missing).values_list('key', 'id'))
+    return ids
+
+
+def _apply_deltas(buckets: Dict[Tuple[int, int], int], sizes: Dict[int, int]):
+    # Creates any missing buckets empty, then moves every count with an
+    # F() update, in (partition, points) order so concurrent syncs lock
+    # the rows in the same order. Emptied buckets stay: deleting one could
+    # race a sync that is about to increment it.
+    buckets = {item: delta for item, delta in buckets.items() if delta}
+    LeaderboardBucket.objects.bulk_create([
+        LeaderboardBucket(partition_id=partition_id, points=points)
+        for (partition_id, points), delta in buckets.items() if delta > 0
+    ], ignore_conflicts=True)
+    for (partition_id, points), delta in sorted(buckets.items()):
+        LeaderboardBucket.objects.filter(partition_id=partition_id, points=points).update(count=F('count') + delta)
+    for partition_id, delta in sorted(sizes.items()):
+        if delta:
+            LeaderboardPartition.objects.filter(id=partition_id).update(size=F('size') + delta)
+
+
+def _sync(player_ids: Iterable[int], keep: bool = True):
+    ids = sorted(set(player_ids))
+    with transaction.atomic():
+        # Locking the players serialises syncs of the same player, so no
+        # two of them apply the same move to the histogram.
+        players = list(Player.objects.select_for_update().filter(id__in=ids).order_by('id').values_list(
+            'id', 'points', 'tier', 'country_code'
+        ))
+        wanted = {}
+        for player_id, points, tier, country_code in players if keep else ():
+            for key in partition_keys(tier, country_code):
+                wanted[key, player_id] = points
+        current = {
+            (key, player_id): (entry_id, partition_id, points)
+            for entry_id, key, partition_id, player_id, points in LeaderboardEntry.objects.filter(
+                player_id__in=ids
+            ).values_list('id', 'partition__key', 'partition_id', 'player_id', 'points')
+        }
+        partitions = _partition_ids(key for key, _ in wanted.keys() - current.keys())
+        buckets, sizes = Counter(), Counter()
+
+        stale = [item for item in current if item not in wanted]
+        if stale:
+            LeaderboardEntry.objects.filter(id__in=[current[item][0] for item in stale]).delete()
+        for item in stale:
+            _, partition_id, points = current[item]
+            buckets[partition_id, points] -= 1
+            sizes[partition_id] -= 1
+
+        new = [item for item in wanted if item not in current]
+        if new:
+            LeaderboardEntry.objects.bulk_create([
+                LeaderboardEntry(partition_id=partitions[key], player_id=player_id, points=wanted[key, player_id])
+                for key, player_id in new
+            ])
+        for key, player_id in new:
+            buckets[partitions[key], wanted[key, player_id]] += 1
+            sizes[partitions[key]] += 1
+
+        moved = [item for item, points in wanted.items() if item in current and current[item][2] != points]
+        if moved:
+            LeaderboardEntry.objects.bulk_update(
+                [LeaderboardEntry(id=current[item][0], points=wanted[item]) for item in moved], ['points']
+            )
+        for item in moved:
+            _, partition_id, points = current[item]
+            buckets[partition_id, points] -= 1
+            buckets[partition_id, wanted[item]] += 1
+
+        _apply_deltas(buckets, sizes)
+
+
+def sync_players(player_ids: Iterable[int]):
+    """Brings each player's entries in line with their current points, tier
+    and country, and moves them between the partitions' histogram buckets.
+    A write touches only the players' own rows and the buckets they leave
+    and join; no other entry moves."""
+    _sync(player_ids)
+
+
+def append_new_players(player_ids: Iterable[int], batch_size: int = 5000):
+    """Bulk path for freshly created players (imports), a batch at a time."""
+    player_ids = list(player_ids)
+    for start in range(0, len(player_ids), batch_size):
+        sync_players(player_ids[start:start + batch_size])
+
+
+def remove_player(player_id: int):
+    _sync([player_id], keep=False)
+
+
+def sync_player(player_id: int):
+    sync_players([player_id])
+
+
+def rebuild_leaderboard(batch_size: int = 5000) -> Dict[str, int]:
+    """Recomputes every partition, its histogram and its size from Player in
+    one pass; returns each partition's size."""
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardBucket.objects.all().delete()
+        LeaderboardPartition.objects.all().delete()
+
+        partitions = {}
+        histogram = Counter()
+        batch = []
+        players = Player.objects.order_by('id').values_list('id', 'points', 'tier', 'country_code')
+        for player_id, points, tier, country_code in players.iterator(chunk_size=batch_size):
+            for key in partition_keys(tier, country_code):
+                partition = partitions.get(key)
+                if partition is None:
+                    partition = partitions[key] = LeaderboardPartition.objects.create(key=key)
+                partition.size += 1
+                histogram[partition.id, points] += 1
+                batch.append(LeaderboardEntry(partition_id=partition.id, player_id=player_id, points=points))
+            if len(batch) >= batch_size:
+                LeaderboardEntry.objects.bulk_create(batch)
+                batch = []
+        LeaderboardEntry.objects.bulk_create(batch)
+        LeaderboardBucket.objects.bulk_create([
+            LeaderboardBucket(partition_id=partition_id, points=points, count=count)
+            for (partition_id, points), count in histogram.items()
+        ], batch_size=batch_size)
+        LeaderboardPartition.objects.bulk_update(partitions.values(), ['size'], batch_size=batch_size)
+
+    return {key: partition.size for key, partition in partitions.items()}
+
+
+def _partition(key: str) -> Optional[Tuple[int, int]]:
+    return LeaderboardPartition.objects.filter(key=key).values_list('id', 'size').first()
+
+
+def rank_of(partition_id: int, player_id: int, points: int) -> int:
+    # 1-based position in (points DESC, player_id ASC) order: the buckets
+    # above the player's points, then the ties ahead of them in their own.
+    above = LeaderboardBucket.objects.filter(partition_id=partition_id, points__gt=points).aggregate(
+        total=Sum('count')
+    )['total'] or 0
+    ties = LeaderboardEntry.objects.filter(partition_id=partition_id, points=points, player_id__lt=player_id).count()
+    return 1 + above + ties
+
+
+def _neighbours(partition_id: int, player_id: int, points: int, limit: int, after: bool) -> List[LeaderboardEntry]:
+    # Up to `limit` entries directly after (or before) the player, nearest
+    # first: ties on points first, then the next band, each a single seek.
+    entries = LeaderboardEntry.objects.filter(partition_id=partition_id)
+    if after:
+        parts = (
+            entries.filter(points=points, player_id__gt=player_id).order_by('player_id'),
+            entries.filter(points__lt=points).order_by('-points', 'player_id'),
+        )
+    else:
+        parts = (
+            entries.filter(points=points, player_id__lt=player_id).order_by('-player_id'),
+            entries.filter(points__gt=points).order_by('points', '-player_id'),
+        )
+    found = []
+    for part in parts:
+        if len(found) >= limit:
+            break
+        found.extend(_with_player(part)[:limit - len(found)])
+    return found
+
+
+def _with_player(entries):
+    return entries.select_related('player').only(
+        'points', 'player_id', 'player__username', 'player__tier', 'player__country_code'
+    )
+
+
+def _serialize(entries, first_rank: int) -> List[Dict]:
+    return [
+        {
+            'rank': rank,
+            'player_id': entry.player_id,
+            'username': entry.player.username,
+            'points': entry.points,
+            'tier': entry.player.tier,
+            'country_code': entry.player.country_code,
+        }
+        for rank, entry in enumerate(entries, start=first_rank)
+    ]
+
+
+def encode_cursor(points: int, player_id: int) -> str:
+    return f'{points}:{player_id}'
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """Raises ValueError for anything encode_cursor did not produce."""
+    points, player_id = cursor.split(':')
+    return int(points), int(player_id)
+
+
+def top(key: str, limit: int, after: Optional[Tuple[int, int]] = None) -> Dict:
+    """A page of the partition in rank order. `after` is the (points,
+    player_id) of the last entry on the previous page; pages are keyset
+    seeks on leaderboard_order_idx, never OFFSETs."""
+    partition = _partition(key)
+    if partition is None:
+        return {'partition': key, 'total': 0, 'entries': [], 'next': None}
+    partition_id, size = partition
+
+    entries = LeaderboardEntry.objects.filter(partition_id=partition_id)
+    if after is not None:
+        points, player_id = after
+        entries = entries.filter(Q(points__lt=points) | Q(points=points, player_id__gt=player_id))
+    page = list(_with_player(entries).order_by('-points', 'player_id')[:limit])
+    first_rank = rank_of(partition_id, page[0].player_id, page[0].points) if page else None
+    last = page[-1] if len(page) == limit else None
+    return {
+        'partition': key,
+        'total': size,
+        'entries': _serialize(page, first_rank),
+        'next': encode_cursor(last.points, last.player_id) if last else None,
+    }
+
+
+def around(key: str, player_id: int, radius: int) -> Dict:
+    partition = _partition(key)
+    points = None
+    if partition is not None:
+        points = LeaderboardEntry.objects.filter(
+            partition_id=partition[0], player_id=player_id
+        ).values_list('points', flat=True).first()
+    if points is None:
+        return {'partition': key, 'rank': None, 'total': None, 'entries': []}
+    partition_id, size = partition
+    rank = rank_of(partition_id, player_id, points)
+    before = _neighbours(partition_id, player_id, points, radius, after=False)[::-1]
+    me = list(_with_player(LeaderboardEntry.objects.filter(partition_id=partition_id, player_id=player_id)))
+    after = _neighbours(partition_id, player_id, points, radius, after=True)
+    return {
+        'partition': key,
+        'rank': rank,
+        'total': size,
+        'entries': _serialize(before + me + after, rank - len(before)),
+    }
@@ -0,0 +1,102 @@
+# tournaments/lifecycle.py
+from typing import Dict
+
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Tournament, TournamentMatch, TournamentWaitlistEntry
+from .services import RegistrationWaitlist
+
+
+def _round_matches(offset: int = 0):
+    return TournamentMatch.objects.filter(tournament=OuterRef('pk'), round_number=OuterRef('current_round') + offset)
+
+
+def _round_finished():
+    # The current round has matches and every one of them is settled.
+    return Q(Exists(_round_matches())) & ~Q(Exists(_round_matches().filter(is_completed=False)))
+
+
+def _pair_winners(rows):
+    # [(tournament_id, round_number, match_number, winner_id, mode), ...] in
+    # match order -> next-round matches: winners of 1 and 2 meet, 3 and 4...
+    by_tournament = {}
+    for tournament_id, round_number, _, winner_id, mode in rows:
+        by_tournament.setdefault((tournament_id, round_number, mode), []).append(winner_id)
+
+    matches = []
+    for (tournament_id, round_number, mode), winners in by_tournament.items():
+        for number, index in enumerate(range(0, len(winners), 2), start=1):
+            team1_id = winners[index]
+            team2_id = winners[index + 1] if index + 1 < len(winners) else None
+            if team1_id is None:
+                team1_id, team2_id = team2_id, None
+            if team1_id is None:
+                continue
+            matches.append(TournamentMatch(
+                tournament_id=tournament_id, round_number=round_number + 1, match_number=number,
+                team1_id=team1_id, team2_id=team2_id, mode=mode,
+                # Nobody to play: the lone winner goes straight through.
+                winner_id=team1_id if team2_id is None else None, is_completed=team2_id is None,
+                completed_at=timezone.now() if team2_id is None else None,
+            ))
+    return matches
+
+
+def promote_waitlists() -> int:
+    """Seats queued teams wherever a seat is free while registration is open,
+    e.g. after a withdrawal from the queue or a raised max_players."""
+    pending = Tournament.objects.filter(
+        Exists(TournamentWaitlistEntry.objects.filter(tournament=OuterRef('pk'))),
+        is_active=True, status='REGISTRATION_OPEN',
+    ).annotate(seated=Count('participants')).filter(seated__lt=F('max_players'))
+    return sum(len(RegistrationWaitlist(tournament).promote()) for tournament in pending)
+
+
+def advance_lifecycles(now=None) -> Dict[str, int]:
+    """Moves every active tournament as far along its lifecycle as it can go
+    this tick, with one bulk statement per transition:
+
+    REGISTRATION_OPEN -> REGISTRATION_CLOSED shortly before start_date,
+    -> IN_PROGRESS at start_date, current round advanced once every match in
+    it is settled (creating the next single-elimination round from the
+    winners), -> COMPLETED once the last round is settled. Queued teams are
+    seated first so free seats are filled before registration closes."""
+    now = now or timezone.now()
+    close_before = Tournament.registration_close_before()
+    active = Tournament.objects.filter(is_active=True)
+    counts = {'waitlist_promoted': promote_waitlists()}
+
+    with transaction.atomic():
+        counts['registration_closed'] = active.filter(
+            status='REGISTRATION_OPEN', start_date__lte=now + close_before
+        ).update(status='REGISTRATION_CLOSED')
+
+        counts['started'] = active.filter(status='REGISTRATION_CLOSED', start_date__lte=now).update(
+            status='IN_PROGRESS', is_started=True, current_round=Greatest(F('current_round'), 1)
+        )
+
+        running = active.filter(status='IN_PROGRESS')
+        needs_next_round = running.filter(
+            _round_finished(), bracket_type='SINGLE_ELIM', current_round__lt=F('total_rounds'),
+        ).exclude(Exists(_round_matches(1)))
+        winners = TournamentMatch.objects.filter(
+            tournament__in=needs_next_round, round_number=F('tournament__current_round')
+        ).order_by('tournament_id', 'match_number').values_list(
+            'tournament_id', 'round_number', 'match_number', 'winner_id', 'tournament__mode'
+        )
+        counts['matches_created'] = len(TournamentMatch.objects.bulk_create(_pair_winners(winners)))
+
+        counts['rounds_advanced'] = running.filter(
+            _round_finished(), Exists(_round_matches(1))
+        ).filter(
+            Q(total_rounds__isnull=True) | Q(current_round__lt=F('total_rounds'))
+        ).update(current_round=F('current_round') + 1)
+
+        counts['completed'] = running.filter(
+            total_rounds__isnull=False, current_round__gte=F('total_rounds'),
+        ).filter(_round_finished()).update(status='COMPLETED', is_completed=True)
+
+    return counts
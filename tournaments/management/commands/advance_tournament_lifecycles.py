@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tournaments.lifecycle import advance_lifecycles
+
+
+class Command(BaseCommand):
+    help = 'Advance tournament statuses and rounds; once by default, or every --interval seconds.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0, help='Seconds between ticks; 0 runs a single tick.')
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            started = time.perf_counter()
+            counts = advance_lifecycles()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(f"Advanced lifecycles in {elapsed:.2f}s: {counts}"))
+            if not interval:
+                break
+            time.sleep(max(interval - elapsed, 0))
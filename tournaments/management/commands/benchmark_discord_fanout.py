@@ -0,0 +1,57 @@
+import asyncio
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from tournaments.discord_client import FakeDiscordClient
+from tournaments.services import DiscordNotifier
+
+
+class Command(BaseCommand):
+    help = 'Broadcast to N synthetic players through FakeDiscordClient and report throughput; no network or database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=500)
+        parser.add_argument('--latency', type=float, default=0.05, help='Simulated seconds per API call.')
+        parser.add_argument('--global-limit', type=int, default=50, help='Requests per second across all routes.')
+        parser.add_argument('--route-limit', type=int, default=5, help='Requests per route per --route-window seconds.')
+        parser.add_argument('--route-window', type=float, default=5.0)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--unreachable', type=int, default=0, help='How many players have DMs closed.')
+        parser.add_argument(
+            '--warm-channels', action='store_true',
+            help='Start with every DM channel id already cached, as on a repeat broadcast.',
+        )
+
+    def handle(self, *args, **options):
+        players = options['players']
+        recipients = {player_id: f'{900000 + player_id}' for player_id in range(1, players + 1)}
+        recipients[players + 1] = None
+        client = FakeDiscordClient(
+            latency=options['latency'],
+            global_limit=options['global_limit'],
+            route_limit=options['route_limit'],
+            route_window=options['route_window'],
+            unreachable=list(recipients.values())[:options['unreachable']],
+        )
+        if options['warm_channels']:
+            client.channels.update({discord_id: f'dm-{discord_id}' for discord_id in recipients.values() if discord_id})
+        notifier = DiscordNotifier(client, max_concurrency=options['concurrency'])
+
+        started = time.perf_counter()
+        results = asyncio.run(notifier.deliver(recipients, 'Your match starts in 15 minutes.'))
+        elapsed = time.perf_counter() - started
+
+        statuses = Counter(result['status'] for result in results)
+        floor = max(players / options['global_limit'] - 1, 0)
+        if not options['warm_channels']:
+            # Every channel open shares one route bucket.
+            floor = max(floor, (players / options['route_limit'] - 1) * options['route_window'])
+        self.stdout.write(f"Statuses: {dict(statuses)}")
+        self.stdout.write(f"429s from the fake provider: {client.rate_limited}; peak in flight: {client.max_in_flight}")
+        self.stdout.write(f"DM channels opened: {client.channels_opened}")
+        self.stdout.write(f"Sequential estimate: {players * options['latency']:.2f}s; rate-limit floor: {floor:.2f}s")
+        self.stdout.write(self.style.SUCCESS(
+            f"Delivered {statuses['sent']} of {players} messages in {elapsed:.2f}s ({statuses['sent'] / elapsed:.0f}/s)"
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tournaments.query_plans import check_query_plans, hot_querysets
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot querysets and fail if any of them falls back to a sequential scan.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Querysets to check; all of them by default.')
+
+    def handle(self, *args, **options):
+        names = options['names'] or list(hot_querysets())
+        unknown = set(names) - set(hot_querysets())
+        if unknown:
+            raise CommandError(f"Unknown querysets: {', '.join(sorted(unknown))}")
+
+        failures = check_query_plans(names)
+        for name, tables in failures.items():
+            self.stderr.write(f"{name}: sequential scan on {', '.join(tables)}")
+        if failures:
+            raise CommandError(f"{len(failures)} of {len(names)} querysets use sequential scans")
+        self.stdout.write(self.style.SUCCESS(f"All {len(names)} querysets use an index"))
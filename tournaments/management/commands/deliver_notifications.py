@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tournaments.notifications import drain_outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver due notification outbox rows; once by default, or every --interval seconds.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0, help='Seconds between passes; 0 runs a single pass.')
+        parser.add_argument('--max-batches', type=int, default=50)
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            started = time.perf_counter()
+            processed = drain_outbox(max_batches=options['max_batches'])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(f"Processed {processed} notifications in {elapsed:.2f}s"))
+            if not interval:
+                break
+            time.sleep(max(interval - elapsed, 0))
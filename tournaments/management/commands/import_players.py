@@ -0,0 +1,52 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tournaments.importer import PlayerImporter, detect_format, parse_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create players from a CSV or NDJSON file (columns: email, username, password, tier, country_code, discord_id).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='Defaults to the file extension.')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, help='Hashing processes; defaults to the CPU count.')
+        parser.add_argument(
+            '--iterations', type=int,
+            help='PBKDF2 iterations for imported hashes. Lower counts import faster and are '
+                 'upgraded to PASSWORD_HASH_ITERATIONS on first login.'
+        )
+        parser.add_argument('--report', help='Write the full rejection report to this JSON file.')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+        importer = PlayerImporter(
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            iterations=options['iterations'],
+        )
+
+        started = time.perf_counter()
+        try:
+            with open(options['path'], newline='', encoding='utf-8') as stream:
+                report = importer.run(parse_rows(stream, fmt))
+        except (OSError, UnicodeDecodeError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as out:
+                json.dump(report, out, indent=2)
+
+        for item in report['rejected'][:20]:
+            self.stdout.write(f"row {item['row']}: {item['reason']} ({item['email']})")
+        if report['rejected_count'] > 20:
+            self.stdout.write(f"... {report['rejected_count'] - 20} more rejected rows")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} of {report['total']} players in {elapsed:.1f}s "
+            f"({report['rejected_count']} rejected)"
+        ))
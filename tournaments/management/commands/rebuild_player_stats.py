@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tournaments.stats import rebuild_player_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute player match counters, K/D and win rate from recorded match stats (points are left as they are).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Players aggregated per query.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        updated = rebuild_player_stats(chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {updated} players in {elapsed:.2f}s"))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tournaments.ratings import recompute_all_ratings
+
+
+class Command(BaseCommand):
+    help = 'Reset team and player skill ratings and replay every completed match in order.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk_update statement.')
+        parser.add_argument('--teams-only', action='store_true', help='Leave player ratings untouched.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = recompute_all_ratings(
+            batch_size=options['batch_size'],
+            include_players=not options['teams_only'],
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Replayed {result['matches']} matches in {result['waves']} waves; "
+            f"rated {result['teams']} teams and {result['players']} players in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tournaments.bracket_jobs import run_queued_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued bracket generation jobs; once by default, or every --interval seconds.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0, help='Seconds between passes; 0 runs a single pass.')
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            started = time.perf_counter()
+            ran = run_queued_jobs()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(f"Ran {ran} bracket jobs in {elapsed:.2f}s"))
+            if not interval:
+                break
+            time.sleep(max(interval - elapsed, 0))
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand
+
+from tournaments.providers import PROVIDER_ENDPOINTS
+
+
+def stub_profile(provider, access_token):
+    uid = str(int(hashlib.sha256(access_token.encode()).hexdigest()[:12], 16))
+    profile = {
+        'id': uid,
+        'email': f'{provider}_{uid}@stub.local',
+        'username': f'{provider}_{uid[:8]}',
+        'name': f'{provider}_{uid[:8]}',
+    }
+    if provider == 'twitch':
+        return {'data': [profile]}
+    return profile
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+    error_rate = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status_code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _params(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            body = self.rfile.read(length).decode()
+            params.update({key: values[0] for key, values in parse_qs(body).items()})
+        return url.path.strip('/').split('/'), params
+
+    def _handle(self):
+        parts, params = self._params()
+        if len(parts) != 2 or parts[0] not in PROVIDER_ENDPOINTS:
+            return self._send(404, {'error': 'not_found'})
+
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            return self._send(503, {'error': 'stub_unavailable'})
+
+        provider, endpoint = parts
+        if endpoint == 'token':
+            code = params.get('code')
+            if not code:
+                return self._send(400, {'error': 'invalid_grant'})
+            return self._send(200, {
+                'access_token': f'stub-{provider}-{code}',
+                'token_type': 'Bearer',
+                'expires_in': 604800,
+            })
+
+        if endpoint == 'me':
+            auth = self.headers.get('Authorization', '')
+            access_token = auth[len('Bearer '):] if auth.startswith('Bearer ') else params.get('access_token')
+            if not access_token:
+                return self._send(401, {'error': 'invalid_token'})
+            return self._send(200, stub_profile(provider, access_token))
+
+        return self._send(404, {'error': 'not_found'})
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+class Command(BaseCommand):
+    help = 'Serve fake Discord/Twitch/Facebook OAuth endpoints for offline load tests of the social auth flows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency-ms', type=int, default=0, help='Delay added to every response.')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503.')
+
+    def handle(self, *args, **options):
+        handler = type('ConfiguredStubHandler', (StubHandler,), {
+            'latency': options['latency_ms'] / 1000,
+            'error_rate': options['error_rate'],
+        })
+        server = ThreadingHTTPServer((options['host'], options['port']), handler)
+        url = f"http://{options['host']}:{options['port']}"
+        self.stdout.write(f'Provider stub listening on {url}')
+        self.stdout.write(f'Run the API with SOCIAL_PROVIDER_STUB_URL={url} to route social auth here.')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tournaments.scrims import run_matchmaking_tick
+
+
+class Command(BaseCommand):
+    help = 'Run scrim matchmaking ticks; once by default, or every --interval seconds.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0, help='Seconds between ticks; 0 runs a single tick.')
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            started = time.perf_counter()
+            created = run_matchmaking_tick()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(f"Created {created} scrims in {elapsed:.2f}s"))
+            if not interval:
+                break
+            time.sleep(max(interval - elapsed, 0))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tournaments.notifications import send_match_reminders
+
+
+class Command(BaseCommand):
+    help = 'Enqueue reminders for matches starting soon; once by default, or every --interval seconds.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0, help='Seconds between passes; 0 runs a single pass.')
+        parser.add_argument(
+            '--window', type=int, default=None,
+            help='Minutes ahead to look; defaults to MATCH_REMINDER_WINDOW_MINUTES. Keep it wider than --interval.',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            started = time.perf_counter()
+            enqueued = send_match_reminders(window_minutes=options['window'])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(f"Enqueued {enqueued} reminders in {elapsed:.2f}s"))
+            if not interval:
+                break
+            time.sleep(max(interval - elapsed, 0))
@@ -0,0 +1,88 @@
+# tournaments/membership.py
+from typing import Dict, FrozenSet, Optional
+
+from django.db.models import FilteredRelation, Q
+
+from .models import Team
+
+
+class MembershipResolver:
+    """The requesting user's teams, roles and led teams, loaded with a single
+    query on first use and reused by every permission check in the request."""
+
+    def __init__(self, user):
+        self.user = user
+        self._roles: Optional[Dict[int, str]] = None
+        self._led: FrozenSet[int] = frozenset()
+
+    def _load(self):
+        if self._roles is not None:
+            return
+        self._roles = {}
+        if not getattr(self.user, 'is_authenticated', False):
+            return
+
+        # One LEFT JOIN onto the user's own TeamMember row; (team, player) is
+        # unique so each team comes back once and no DISTINCT is needed.
+        rows = Team.objects.annotate(
+            membership=FilteredRelation('members', condition=Q(members__player=self.user))
+        ).filter(
+            Q(lead_player=self.user) | Q(membership__isnull=False)
+        ).values_list('id', 'lead_player_id', 'membership__role')
+
+        led = set()
+        for team_id, lead_player_id, role in rows:
+            if role is not None:
+                self._roles[team_id] = role
+            if lead_player_id == self.user.pk:
+                led.add(team_id)
+        self._led = frozenset(led)
+
+    @property
+    def team_ids(self) -> FrozenSet[int]:
+        self._load()
+        return frozenset(self._roles) | self._led
+
+    @property
+    def member_team_ids(self) -> FrozenSet[int]:
+        self._load()
+        return frozenset(self._roles)
+
+    @property
+    def led_team_ids(self) -> FrozenSet[int]:
+        self._load()
+        return self._led
+
+    def role(self, team_id) -> Optional[str]:
+        self._load()
+        return self._roles.get(_as_id(team_id))
+
+    def is_member(self, team_id) -> bool:
+        self._load()
+        return _as_id(team_id) in self._roles
+
+    def leads(self, team_id) -> bool:
+        self._load()
+        return _as_id(team_id) in self._led
+
+    def team_ids_with_role(self, *roles) -> FrozenSet[int]:
+        self._load()
+        return frozenset(team_id for team_id, role in self._roles.items() if role in roles)
+
+
+def _as_id(team_id) -> Optional[int]:
+    try:
+        return int(team_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_membership(request) -> MembershipResolver:
+    # Stored on the underlying HttpRequest so DRF views, permission classes
+    # and plain Django code all share one resolver per request.
+    http_request = getattr(request, '_request', request)
+    resolver = getattr(http_request, '_membership_resolver', None)
+    if resolver is None or resolver.user is not request.user:
+        resolver = MembershipResolver(request.user)
+        http_request._membership_resolver = resolver
+    return resolver
@@ -1,24 +1,51 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 from .models import Player
 from django.conf import settings
 
 class OnlineStatusMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
         self.online_threshold = getattr(settings, 'ONLINE_THRESHOLD_MINUTES', 5)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         response = self.get_response(request)
         
         if request.user.is_authenticated:
-            ip_address = self.get_client_ip(request)
-            Player.objects.filter(pk=request.user.pk).update(
-                last_activity=timezone.now(),
-                last_login_ip=ip_address
-            )
-            self.update_online_status(request.user)
+            self.record_activity(request, request.user)
             
         return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+
+        # DRF views replace request.user with the JWT user; otherwise it is still the
+        # lazy session user, which must be resolved without blocking the event loop.
+        user = request.user
+        if type(user) is SimpleLazyObject:
+            user = await request.auser()
+
+        if user.is_authenticated:
+            await sync_to_async(self.record_activity)(request, user)
+
+        return response
+
+    def record_activity(self, request, user):
+        ip_address = self.get_client_ip(request)
+        Player.objects.filter(pk=user.pk).update(
+            last_activity=timezone.now(),
+            last_login_ip=ip_address
+        )
+        self.update_online_status(user)
     
     def get_client_ip(self, request):
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -31,4 +58,4 @@ class OnlineStatusMiddleware:
         is_now_online = user.last_activity >= threshold
         
         if was_online != is_now_online:
-            Player.objects.filter(pk=user.pk).update(is_online=is_now_online)
\ No newline at end of file
+            Player.objects.filter(pk=user.pk).update(is_online=is_now_online)
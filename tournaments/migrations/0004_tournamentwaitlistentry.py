@@ -0,0 +1,82 @@
+# Generated by Django 5.2.3 on 2026-10-19 16:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0003_squadmember_action_role_alter_team_join_code'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='squadmember',
+            name='country',
+        ),
+        migrations.RemoveField(
+            model_name='squadmember',
+            name='kill_death_ratio',
+        ),
+        migrations.RemoveField(
+            model_name='squadmember',
+            name='points',
+        ),
+        migrations.RemoveField(
+            model_name='squadmember',
+            name='rank',
+        ),
+        migrations.RemoveField(
+            model_name='squadmember',
+            name='win_rate',
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='country_code',
+            field=models.CharField(blank=True, max_length=2, null=True),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='kill_death_ratio',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='points',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='rank',
+            field=models.CharField(choices=[('RECRUIT', 'Recruit'), ('PRIVATE', 'Private'), ('CORPORAL', 'Corporal'), ('SERGEANT', 'Sergeant'), ('STAFF_SERGEANT', 'Staff Sergeant'), ('SERGEANT_MAJOR', 'Sergeant Major'), ('LIEUTENANT', 'Lieutenant'), ('CAPTAIN', 'Captain'), ('MAJOR', 'Major'), ('COLONEL', 'Colonel'), ('GENERAL', 'General')], default='Private', max_length=30),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='win_rate',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AlterField(
+            model_name='squad',
+            name='participant',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='squads', to='tournaments.tournamentparticipant'),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='join_code',
+            field=models.CharField(default='4E4CD5E36D', max_length=10, unique=True),
+        ),
+        migrations.CreateModel(
+            name='TournamentWaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='tournaments.team')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='tournaments.tournament')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tournament', 'id'], name='waitlist_queue_idx')],
+                'unique_together': {('team', 'tournament')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:06
+
+import tournaments.join_codes
+from django.db import migrations, models
+
+
+def uppercase_join_codes(apps, schema_editor):
+    Team = apps.get_model('tournaments', 'Team')
+    taken = set(Team.objects.values_list('join_code', flat=True))
+    for team in Team.objects.exclude(join_code__regex=r'^[0-9A-Z]*$').only('id', 'join_code'):
+        code = team.join_code.strip().upper()
+        if code in taken:
+            # Codes that only differed by case get a fresh one.
+            code = tournaments.join_codes.generate_join_code()
+        taken.add(code)
+        team.join_code = code
+        team.save(update_fields=['join_code'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0004_tournamentwaitlistentry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='team',
+            name='join_code',
+            field=models.CharField(default=tournaments.join_codes.generate_join_code, max_length=10, unique=True),
+        ),
+        migrations.RunPython(uppercase_join_codes, migrations.RunPython.noop),
+    ]
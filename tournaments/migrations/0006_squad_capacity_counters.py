@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:14
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Squad = apps.get_model('tournaments', 'Squad')
+    SquadMember = apps.get_model('tournaments', 'SquadMember')
+    TournamentParticipant = apps.get_model('tournaments', 'TournamentParticipant')
+
+    Squad.objects.update(member_count=Coalesce(Subquery(
+        SquadMember.objects.filter(squad=OuterRef('pk')).values('squad').annotate(total=Count('id')).values('total')
+    ), 0))
+    TournamentParticipant.objects.update(squad_count=Coalesce(Subquery(
+        Squad.objects.filter(participant=OuterRef('pk')).values('participant').annotate(total=Count('id')).values('total')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0005_team_join_code_generator'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='squad',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tournamentparticipant',
+            name='squad_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
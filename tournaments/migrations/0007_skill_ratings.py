@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0006_squad_capacity_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='skill_rating',
+            field=models.FloatField(default=1000.0),
+        ),
+        migrations.AddField(
+            model_name='tournamentmatch',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tournamentmatch',
+            name='rated',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_leaderboard(apps, schema_editor):
+    Player = apps.get_model('tournaments', 'Player')
+    LeaderboardPartition = apps.get_model('tournaments', 'LeaderboardPartition')
+    LeaderboardEntry = apps.get_model('tournaments', 'LeaderboardEntry')
+    LeaderboardBucket = apps.get_model('tournaments', 'LeaderboardBucket')
+
+    partitions = {}
+    histogram = {}
+    batch = []
+    players = Player.objects.order_by('id').values_list('id', 'points', 'tier', 'country_code')
+    for player_id, points, tier, country_code in players.iterator(chunk_size=5000):
+        keys = ['global', f'tier:{tier}'] + ([f'country:{country_code.lower()}'] if country_code else [])
+        for key in keys:
+            if key not in partitions:
+                partitions[key] = LeaderboardPartition.objects.create(key=key)
+            partition = partitions[key]
+            partition.size += 1
+            histogram[partition.id, points] = histogram.get((partition.id, points), 0) + 1
+            batch.append(LeaderboardEntry(partition=partition, player_id=player_id, points=points))
+    LeaderboardEntry.objects.bulk_create(batch, batch_size=5000)
+    LeaderboardBucket.objects.bulk_create([
+        LeaderboardBucket(partition_id=partition_id, points=points, count=count)
+        for (partition_id, points), count in histogram.items()
+    ], batch_size=5000)
+    LeaderboardPartition.objects.bulk_update(partitions.values(), ['size'], batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0007_skill_ratings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardPartition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=40, unique=True)),
+                ('size', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField()),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+                ('partition', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='tournaments.leaderboardpartition')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['partition', '-points', 'player'], name='leaderboard_order_idx')],
+                'unique_together': {('partition', 'player')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaderboardBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('partition', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='tournaments.leaderboardpartition')),
+            ],
+            options={
+                'unique_together': {('partition', 'points')},
+            },
+        ),
+        migrations.RunPython(build_leaderboard, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0009_player_match_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournamentparticipant',
+            name='protected_seed',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tournamentparticipant',
+            name='seed',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0010_participant_seed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrimMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(choices=[('NA', 'North America'), ('EU', 'Europe'), ('ASIA', 'Asia'), ('OCE', 'Oceania'), ('GLOBAL', 'Global')], max_length=10)),
+                ('platform', models.CharField(choices=[('PC', 'PC'), ('CONSOLE', 'Console'), ('MOBILE', 'Mobile'), ('CROSS', 'Cross-Platform')], max_length=10)),
+                ('mode', models.CharField(choices=[('16v16', '16v16'), ('32v32', '32v32'), ('64v64', '64v64')], max_length=10)),
+                ('team1_rating', models.FloatField()),
+                ('team2_rating', models.FloatField()),
+                ('team1_score', models.IntegerField(default=0)),
+                ('team2_score', models.IntegerField(default=0)),
+                ('is_completed', models.BooleanField(default=False)),
+                ('scheduled_time', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('team1', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scrims_as_team1', to='tournaments.team')),
+                ('team2', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scrims_as_team2', to='tournaments.team')),
+                ('winner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='won_scrims', to='tournaments.team')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScrimQueueEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(choices=[('NA', 'North America'), ('EU', 'Europe'), ('ASIA', 'Asia'), ('OCE', 'Oceania'), ('GLOBAL', 'Global')], max_length=10)),
+                ('platform', models.CharField(choices=[('PC', 'PC'), ('CONSOLE', 'Console'), ('MOBILE', 'Mobile'), ('CROSS', 'Cross-Platform')], max_length=10)),
+                ('mode', models.CharField(choices=[('16v16', '16v16'), ('32v32', '32v32'), ('64v64', '64v64')], max_length=10)),
+                ('rating', models.FloatField()),
+                ('status', models.CharField(choices=[('WAITING', 'Waiting'), ('MATCHED', 'Matched'), ('CANCELLED', 'Cancelled')], default='WAITING', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('matched_at', models.DateTimeField(blank=True, null=True)),
+                ('match', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='queue_entries', to='tournaments.scrimmatch')),
+                ('queued_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scrim_queue_entries', to='tournaments.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'region', 'platform', 'mode', 'rating'], name='scrim_queue_bucket_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'WAITING')), fields=('team',), name='scrim_queue_one_waiting_per_team')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:39
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0011_scrim_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('TEAM_REGISTERED', 'Team registered'), ('BRACKET_GENERATED', 'Bracket generated'), ('MATCH_SCHEDULED', 'Match scheduled'), ('MATCH_RESULT', 'Match result')], max_length=30)),
+                ('target_type', models.CharField(choices=[('PLAYER', 'Player'), ('TEAM', 'Team'), ('TOURNAMENT', 'Tournament')], max_length=10)),
+                ('target_id', models.PositiveIntegerField()),
+                ('message', models.TextField()),
+                ('dedupe_key', models.CharField(blank=True, max_length=120, null=True, unique=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SENDING', 'Sending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('retry_player_ids', models.JSONField(blank=True, default=list)),
+                ('results', models.JSONField(blank=True, default=dict)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'available_at', 'id'], name='outbox_due_idx')],
+            },
+        ),
+    ]
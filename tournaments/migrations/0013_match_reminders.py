@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0012_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournamentmatch',
+            name='reminder_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='notificationoutbox',
+            name='event',
+            field=models.CharField(choices=[('TEAM_REGISTERED', 'Team registered'), ('BRACKET_GENERATED', 'Bracket generated'), ('MATCH_SCHEDULED', 'Match scheduled'), ('MATCH_RESULT', 'Match result'), ('MATCH_REMINDER', 'Match reminder')], max_length=30),
+        ),
+        migrations.AddIndex(
+            model_name='tournamentmatch',
+            index=models.Index(condition=models.Q(('is_completed', False), ('reminder_sent_at__isnull', True)), fields=['scheduled_time'], name='match_reminder_due_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:47
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_status(apps, schema_editor):
+    # Derive the status the old flag/date checks implied; the lifecycle task
+    # takes over from here.
+    Tournament = apps.get_model('tournaments', 'Tournament')
+    Tournament.objects.filter(is_completed=True).update(status='COMPLETED')
+    Tournament.objects.filter(is_completed=False).exclude(is_started=False, start_date__gt=timezone.now()).update(
+        status='IN_PROGRESS'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0014_bracket_generation_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='status',
+            field=models.CharField(choices=[('REGISTRATION_OPEN', 'Registration open'), ('REGISTRATION_CLOSED', 'Registration closed'), ('IN_PROGRESS', 'In progress'), ('COMPLETED', 'Completed')], default='REGISTRATION_OPEN', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='total_rounds',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['status', 'start_date'], name='tournament_status_start_idx'),
+        ),
+        migrations.RunPython(backfill_status, migrations.RunPython.noop),
+    ]
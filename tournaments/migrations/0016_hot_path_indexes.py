@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tournaments', '0015_tournament_lifecycle'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['last_activity'], name='player_last_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['is_online', 'last_activity'], name='player_online_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teammember',
+            index=models.Index(fields=['player', 'role'], name='team_member_player_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['start_date'], name='tournament_active_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournamentmatch',
+            index=models.Index(fields=['tournament', 'scheduled_time'], name='match_tournament_time_idx'),
+        ),
+    ]
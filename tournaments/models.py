@@ -1,6 +1,12 @@
-from django.db import models
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser, Group, Permission
-import uuid
+from .join_codes import generate_join_code, normalize_join_code
 import json
 
 class Player(AbstractUser):
@@ -44,8 +50,19 @@ class Player(AbstractUser):
     win_rate = models.FloatField(default=0.0) 
     rank = models.CharField(max_length=30, choices=RANK_CHOICES, default='Private')
 
+    # Running totals behind points / kill_death_ratio / win_rate (see stats.py).
+    matches_played = models.PositiveIntegerField(default=0)
+    matches_won = models.PositiveIntegerField(default=0)
+    kills = models.PositiveIntegerField(default=0)
+    deaths = models.PositiveIntegerField(default=0)
+
     class Meta:
         db_table = 'tournaments_player'
+        indexes = [
+            models.Index(fields=['last_activity'], name='player_last_activity_idx'),
+            # update_online_statuses flips is_online for one side of the threshold.
+            models.Index(fields=['is_online', 'last_activity'], name='player_online_activity_idx'),
+        ]
 
     groups = models.ManyToManyField(
         Group,
@@ -59,6 +76,35 @@ class Player(AbstractUser):
         blank=True,
     )
     
+    # Mirrored into LeaderboardEntry by the post_save signal.
+    LEADERBOARD_FIELDS = frozenset({'points', 'tier', 'country_code'})
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the leaderboard signal skip saves that leave these untouched.
+        instance._leaderboard_values = {
+            name: instance.__dict__[name] for name in cls.LEADERBOARD_FIELDS if name in instance.__dict__
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        # request.user from CachedJWTAuthentication is built from a cached row that
+        # may be stale; a full save writes back only what changed since then, plus
+        # auto_now fields (last_activity), which save() itself always bumps.
+        snapshot = self.__dict__.get('_auth_snapshot')
+        if snapshot is not None and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                f.attname for f in self._meta.concrete_fields
+                if not f.primary_key and f.attname not in deferred
+                and (getattr(f, 'auto_now', False) or f.attname not in snapshot
+                     or getattr(self, f.attname) != snapshot[f.attname])
+            ]
+        super().save(*args, **kwargs)
+        if snapshot is not None:
+            snapshot.update({name: getattr(self, name) for name in kwargs.get('update_fields') or () if name in snapshot})
+
     def update_activity(self, ip_address=None):
         self.last_activity = timezone.now()
         if ip_address:
@@ -81,18 +127,43 @@ class Player(AbstractUser):
     def __str__(self):
         return self.email
 
+class JoinCodeSequence(models.Model):
+    # Rows exist only for their auto-increment ids, which join_codes.py
+    # permutes into team join codes.
+    pass
+
+class TeamManager(models.Manager):
+    def get_by_join_code(self, code):
+        return self.get(join_code=normalize_join_code(code))
+
 class Team(models.Model):
     name = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
     lead_player = models.OneToOneField(Player, on_delete=models.CASCADE, related_name='led_team')
-    join_code = models.CharField(max_length=10, unique=True, default=uuid.uuid4().hex[:10].upper())
+    join_code = models.CharField(max_length=10, unique=True, default=generate_join_code)
     is_active = models.BooleanField(default=True)
     tier = models.CharField(max_length=20, choices=Player.TIER_CHOICES, default='BRONZE')
+    skill_rating = models.FloatField(default=1000.0)
+
+    objects = TeamManager()
     
     def save(self, *args, **kwargs):
         if not self.pk and not self.tier:
             self.tier = self.lead_player.tier
-        super().save(*args, **kwargs)
+        # Codes are stored upper-case so lookups can use the plain unique index.
+        self.join_code = normalize_join_code(self.join_code)
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        # Generated codes cannot repeat, but a hand-picked or reused one can;
+        # give the new team a fresh code rather than failing the request.
+        for attempt in range(3):
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == 2 or not Team.objects.filter(join_code=self.join_code).exists():
+                    raise
+                self.join_code = generate_join_code()
 
     def __str__(self):
         return self.name
@@ -110,6 +181,9 @@ class TeamMember(models.Model):
     
     class Meta:
         unique_together = ('team', 'player')
+        indexes = [
+            models.Index(fields=['player', 'role'], name='team_member_player_role_idx'),
+        ]
     
     def __str__(self):
         return f"{self.player.email} in {self.team.name}"
@@ -156,6 +230,14 @@ class Tournament(models.Model):
         ('NHL', 'NHL'),
         ('OTHER', 'Other'),
     ]
+
+    STATUS_CHOICES = [
+        ('REGISTRATION_OPEN', 'Registration open'),
+        ('REGISTRATION_CLOSED', 'Registration closed'),
+        ('IN_PROGRESS', 'In progress'),
+        ('COMPLETED', 'Completed'),
+    ]
+    UPCOMING_STATUSES = ('REGISTRATION_OPEN', 'REGISTRATION_CLOSED')
     
     game = models.CharField(
         max_length=20,
@@ -180,23 +262,109 @@ class Tournament(models.Model):
     is_started = models.BooleanField(default=False)
     is_completed = models.BooleanField(default=False)
     current_round = models.IntegerField(default=0)
+    # Advanced by the lifecycle task (see lifecycle.py). Until its next tick the
+    # status can lag start_date, so the filters below also check the date.
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='REGISTRATION_OPEN')
+    # Rounds the bracket needs, set when it is generated.
+    total_rounds = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'start_date'], name='tournament_status_start_idx'),
+            # Partial rather than (is_active, start_date): a bare boolean filter
+            # cannot seek on SQLite, and inactive tournaments are never listed.
+            models.Index(fields=['start_date'], name='tournament_active_start_idx', condition=Q(is_active=True)),
+        ]
+
+    @staticmethod
+    def registration_close_before() -> timedelta:
+        return timedelta(minutes=getattr(settings, 'TOURNAMENT_REGISTRATION_CLOSE_MINUTES', 30))
+
+    @classmethod
+    def upcoming_q(cls, now=None) -> Q:
+        return Q(status__in=cls.UPCOMING_STATUSES, start_date__gt=now or timezone.now())
+
+    @classmethod
+    def ongoing_q(cls, now=None) -> Q:
+        # Started but not yet ticked over counts as ongoing too.
+        return Q(status='IN_PROGRESS') | Q(
+            status__in=cls.UPCOMING_STATUSES, start_date__lte=now or timezone.now(), is_completed=False
+        )
+
+    @classmethod
+    def registration_open_q(cls, now=None) -> Q:
+        return Q(status='REGISTRATION_OPEN', start_date__gt=(now or timezone.now()) + cls.registration_close_before())
+
+    def registration_is_open(self, now=None) -> bool:
+        return self.status == 'REGISTRATION_OPEN' and (
+            self.start_date > (now or timezone.now()) + self.registration_close_before()
+        )
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.status == 'REGISTRATION_OPEN':
+            self._set_status_from_dates()
+        # Staff still mark tournaments completed (or not) through is_completed
+        # in the admin; keep status in step so the status filters agree.
+        if self.is_completed != (self.status == 'COMPLETED'):
+            if self.is_completed:
+                self.status = 'COMPLETED'
+            else:
+                self.status = 'REGISTRATION_OPEN'
+                self._set_status_from_dates()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'status', 'is_started', 'current_round'}
+        super().save(*args, **kwargs)
+
+    def _set_status_from_dates(self):
+        # Where the lifecycle task would put it, rather than waiting a tick.
+        start_date = self._meta.get_field('start_date').to_python(self.start_date)
+        if start_date is None:
+            return
+        if timezone.is_naive(start_date):
+            start_date = timezone.make_aware(start_date)
+        now = timezone.now()
+        if self.is_completed:
+            self.status = 'COMPLETED'
+        elif start_date <= now:
+            self.status, self.is_started = 'IN_PROGRESS', True
+            self.current_round = max(self.current_round, 1)
+        elif start_date <= now + self.registration_close_before():
+            self.status = 'REGISTRATION_CLOSED'
 
     def generate_bracket(self):
         if self.bracket_type == 'SWISS':
             return self._generate_swiss_bracket()
         elif self.bracket_type == 'SINGLE_ELIM':
             return self._generate_single_elim_bracket()
+        elif self.bracket_type == 'ROUND_ROBIN':
+            return self._generate_round_robin_bracket()
 
     def _generate_swiss_bracket(self):
+        from .seeding import SeedingService
         from .services import SwissPairing
-        participants = list(self.participants.all().select_related('team'))
+        participants = SeedingService(self).seed()
         return SwissPairing(participants).generate_round(self.current_round)
 
+    def _generate_round_robin_bracket(self):
+        from .seeding import SeedingService
+        from .services import RoundRobinSchedule
+        participants = SeedingService(self).seed()
+        return RoundRobinSchedule(participants).generate_rounds()
+
     def _generate_single_elim_bracket(self):
+        from .seeding import SeedingService
         from .services import SingleEliminationBracket
-        participants = list(self.participants.all().select_related('team'))
+        participants = SeedingService(self).seed()
         return SingleEliminationBracket(participants).generate_bracket()
 
+    def get_team_size(self):
+        # '32v32' -> 32 players per side
+        try:
+            return int(self.mode.split('v')[0])
+        except (AttributeError, ValueError):
+            return 0
+
     def get_squad_limits(self):
         limits = {
             '16v16': (2, 4),
@@ -205,31 +373,73 @@ class Tournament(models.Model):
         }
         return limits.get(self.mode, (0, 0))
     
+    def get_squad_player_cap(self):
+        caps = {
+            '16v16': 8,
+            '32v32': 6,
+            '64v64': 8,
+        }
+        return caps.get(self.mode, 0)
+
     def can_create_more_squads(self, participant):
         min_squads, max_squads = self.get_squad_limits()
-        if max_squads == 0:
-            return False
-        
-        existing_squads = Squad.objects.filter(
-            participant=participant
-        ).count()
-        
-        return existing_squads < max_squads
+        return participant.squad_count < max_squads
 
     def __str__(self):
         return self.title
 
+class SquadCapacityError(Exception):
+    pass
+
 class TournamentParticipant(models.Model):
     team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='tournaments')
     tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name='participants')
     registered_at = models.DateTimeField(auto_now_add=True)
+    # Maintained by Squad.save and the post_delete signal; never COUNT squads to enforce limits.
+    squad_count = models.PositiveIntegerField(default=0)
+    # Written by SeedingService; protected_seed is set by admins and always wins.
+    seed = models.PositiveIntegerField(null=True, blank=True)
+    protected_seed = models.PositiveIntegerField(null=True, blank=True)
     
     class Meta:
         unique_together = ('team', 'tournament')
+
+    def reserve_squad_slot(self):
+        mode = Tournament.objects.filter(id=self.tournament_id).values_list('mode', flat=True).first()
+        min_squads, max_squads = Tournament(mode=mode).get_squad_limits()
+        # The row lock taken by the conditional UPDATE makes check-and-increment atomic.
+        reserved = TournamentParticipant.objects.filter(
+            pk=self.pk, squad_count__lt=max_squads
+        ).update(squad_count=F('squad_count') + 1)
+        if not reserved:
+            raise SquadCapacityError(f"Squad limit of {max_squads} reached for this team.")
+
+    def refresh_capacity_counters(self):
+        # For bulk paths that bypass Squad.save / SquadMember.save.
+        Squad.objects.filter(participant=self).update(member_count=Coalesce(Subquery(
+            SquadMember.objects.filter(squad=OuterRef('pk')).values('squad').annotate(total=Count('id')).values('total')
+        ), 0))
+        self.squad_count = Squad.objects.filter(participant=self).count()
+        TournamentParticipant.objects.filter(pk=self.pk).update(squad_count=self.squad_count)
     
     def __str__(self):
         return f"{self.team.name} in {self.tournament.title}"
 
+class TournamentWaitlistEntry(models.Model):
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='waitlist_entries')
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name='waitlist')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('team', 'tournament')
+        indexes = [
+            # Queue order is insertion order; positions are counted off this index.
+            models.Index(fields=['tournament', 'id'], name='waitlist_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.team.name} waitlisted for {self.tournament.title}"
+
 class TournamentMatch(models.Model):
     tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name='matches')
     round_number = models.IntegerField()
@@ -245,14 +455,46 @@ class TournamentMatch(models.Model):
 
     is_completed = models.BooleanField(default=False)
     scheduled_time = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    # Set once the result has been applied to skill ratings (see ratings.py).
+    rated = models.BooleanField(default=False)
+    # Claimed by the reminder task so each match is announced once.
+    reminder_sent_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ('tournament', 'round_number', 'match_number')
+        indexes = [
+            models.Index(fields=['tournament', 'scheduled_time'], name='match_tournament_time_idx'),
+            # Only matches still waiting for a reminder, ordered by start time.
+            models.Index(
+                fields=['scheduled_time'], name='match_reminder_due_idx',
+                condition=Q(reminder_sent_at__isnull=True, is_completed=False),
+            ),
+        ]
 
     def __str__(self):
         return f"Match {self.match_number} (Round {self.round_number}) in {self.tournament.title}"
 
 
+class PlayerMatchStat(models.Model):
+    match = models.ForeignKey(TournamentMatch, on_delete=models.CASCADE, related_name='player_stats')
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='match_stats')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='player_match_stats')
+    kills = models.PositiveIntegerField(default=0)
+    deaths = models.PositiveIntegerField(default=0)
+    won = models.BooleanField(default=False)
+    points = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('match', 'player')
+        indexes = [
+            models.Index(fields=['player', 'match'], name='player_match_stat_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.player_id} in match {self.match_id}: {self.kills}/{self.deaths}"
+
 class SocialToken(models.Model):
     player = models.OneToOneField(Player, on_delete=models.CASCADE, related_name='social_token')
     provider = models.CharField(max_length=30)
@@ -330,12 +572,31 @@ class Squad(models.Model):
         max_length=15,
         choices=SquadType.choices
     )
+    member_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         unique_together = ('participant', 'squad_type')
         verbose_name = 'Squad'
         verbose_name_plural = 'Squads'
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.participant_id:
+            with transaction.atomic():
+                self.participant.reserve_squad_slot()
+                super().save(*args, **kwargs)
+            return
+        super().save(*args, **kwargs)
+
+    def reserve_member_slot(self):
+        updated = Squad.objects.filter(pk=self.pk)
+        cap = None
+        if self.participant_id:
+            mode = Tournament.objects.filter(participants=self.participant_id).values_list('mode', flat=True).first()
+            cap = Tournament(mode=mode).get_squad_player_cap()
+            updated = updated.filter(member_count__lt=cap)
+        if not updated.update(member_count=F('member_count') + 1):
+            raise SquadCapacityError(f"Squad is full ({cap} players).")
+
     def __str__(self):
         return f"{self.participant.team.name} - {self.squad_type} Squad in {self.participant.tournament.title}"
 
@@ -364,5 +625,180 @@ class SquadMember(models.Model):
             models.UniqueConstraint(fields=['squad'], condition=models.Q(role='LEADER'), name='unique_leader_per_squad'),
         ]
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            with transaction.atomic():
+                self.squad.reserve_member_slot()
+                super().save(*args, **kwargs)
+            return
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.player.email} in {self.squad} - {self.role}"
+class LeaderboardPartition(models.Model):
+    # 'global', 'tier:GOLD', 'country:us'
+    key = models.CharField(max_length=40, unique=True)
+    # Number of entries, kept in step by leaderboard.py.
+    size = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.key
+
+class LeaderboardEntry(models.Model):
+    partition = models.ForeignKey(LeaderboardPartition, on_delete=models.CASCADE, related_name='entries')
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    # Ranks follow (points DESC, player_id ASC); see LeaderboardBucket.
+    points = models.IntegerField()
+
+    class Meta:
+        unique_together = ('partition', 'player')
+        indexes = [
+            models.Index(fields=['partition', '-points', 'player'], name='leaderboard_order_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.player_id} ({self.points}) in {self.partition_id}"
+
+class LeaderboardBucket(models.Model):
+    # Points histogram of a partition: a rank is the sum of the buckets above
+    # a player's points plus the ties ahead of them in their own bucket.
+    partition = models.ForeignKey(LeaderboardPartition, on_delete=models.CASCADE, related_name='buckets')
+    points = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('partition', 'points')
+
+    def __str__(self):
+        return f"{self.count} at {self.points} in {self.partition_id}"
+
+class ScrimMatch(models.Model):
+    team1 = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='scrims_as_team1')
+    team2 = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='scrims_as_team2')
+    winner = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, blank=True, related_name='won_scrims')
+    region = models.CharField(max_length=10, choices=Tournament.REGION_CHOICES)
+    platform = models.CharField(max_length=10, choices=Tournament.PLATFORM_CHOICES)
+    mode = models.CharField(max_length=10, choices=Tournament.MODE_CHOICES)
+    # Team ratings when the pair was made, for tuning the matcher's window.
+    team1_rating = models.FloatField()
+    team2_rating = models.FloatField()
+    team1_score = models.IntegerField(default=0)
+    team2_score = models.IntegerField(default=0)
+    is_completed = models.BooleanField(default=False)
+    scheduled_time = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Scrim {self.team1_id} vs {self.team2_id} ({self.region} {self.mode})"
+
+class ScrimQueueEntry(models.Model):
+    STATUS_CHOICES = [
+        ('WAITING', 'Waiting'),
+        ('MATCHED', 'Matched'),
+        ('CANCELLED', 'Cancelled'),
+    ]
+
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='scrim_queue_entries')
+    queued_by = models.ForeignKey(Player, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    region = models.CharField(max_length=10, choices=Tournament.REGION_CHOICES)
+    platform = models.CharField(max_length=10, choices=Tournament.PLATFORM_CHOICES)
+    mode = models.CharField(max_length=10, choices=Tournament.MODE_CHOICES)
+    # Team.skill_rating when queued; the matcher never re-reads Team.
+    rating = models.FloatField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='WAITING')
+    match = models.ForeignKey(ScrimMatch, on_delete=models.SET_NULL, null=True, blank=True, related_name='queue_entries')
+    created_at = models.DateTimeField(auto_now_add=True)
+    matched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['team'], condition=Q(status='WAITING'), name='scrim_queue_one_waiting_per_team'
+            ),
+        ]
+        indexes = [
+            # Each tick reads one bucket's waiting entries in rating order.
+            models.Index(fields=['status', 'region', 'platform', 'mode', 'rating'], name='scrim_queue_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.team_id} queued for {self.region} {self.platform} {self.mode} ({self.status})"
+
+class NotificationOutbox(models.Model):
+    EVENT_CHOICES = [
+        ('TEAM_REGISTERED', 'Team registered'),
+        ('BRACKET_GENERATED', 'Bracket generated'),
+        ('MATCH_SCHEDULED', 'Match scheduled'),
+        ('MATCH_RESULT', 'Match result'),
+        ('MATCH_REMINDER', 'Match reminder'),
+    ]
+    TARGET_CHOICES = [
+        ('PLAYER', 'Player'),
+        ('TEAM', 'Team'),
+        ('TOURNAMENT', 'Tournament'),
+    ]
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    ]
+
+    event = models.CharField(max_length=30, choices=EVENT_CHOICES)
+    target_type = models.CharField(max_length=10, choices=TARGET_CHOICES)
+    target_id = models.PositiveIntegerField()
+    message = models.TextField()
+    # Rows sharing a key are enqueued once; None means no deduplication.
+    dedupe_key = models.CharField(max_length=120, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    # After a partial failure only these players are retried.
+    retry_player_ids = models.JSONField(default=list, blank=True)
+    results = models.JSONField(default=dict, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker claims due rows oldest first straight off this index.
+            models.Index(fields=['status', 'available_at', 'id'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event} -> {self.target_type.lower()} {self.target_id} ({self.status})"
+
+class BracketGenerationJob(models.Model):
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('SUCCEEDED', 'Succeeded'),
+        ('FAILED', 'Failed'),
+    ]
+
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name='bracket_jobs')
+    requested_by = models.ForeignKey(Player, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='QUEUED')
+    progress = models.PositiveSmallIntegerField(default=0)
+    # Set on success: which rounds were created and how many matches.
+    rounds = models.JSONField(default=list, blank=True)
+    matches_created = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tournament', 'idempotency_key'], name='bracket_job_idempotency_key'),
+            models.UniqueConstraint(
+                fields=['tournament'], condition=Q(status__in=['QUEUED', 'RUNNING']),
+                name='bracket_job_one_active_per_tournament',
+            ),
+        ]
+
     def __str__(self):
-        return f"{self.player.email} in {self.squad} - {self.role}"
\ No newline at end of file
+        return f"Bracket job {self.pk} for {self.tournament_id} ({self.status} {self.progress}%)"
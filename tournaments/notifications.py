@@ -0,0 +1,225 @@
+# tournaments/notifications.py
+import hashlib
+from collections import Counter
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import NotificationOutbox, Player, TeamMember, TournamentMatch
+
+
+def enqueue(event: str, target_type: str, target_id: int, message: str,
+            dedupe_key: Optional[str] = None, available_at=None) -> None:
+    """Adds one outbox row. Call it inside the transaction that records the
+    event so the notification exists exactly when the event does."""
+    enqueue_many([NotificationOutbox(
+        event=event, target_type=target_type, target_id=target_id, message=message,
+        dedupe_key=dedupe_key, available_at=available_at or timezone.now(),
+    )])
+
+
+def enqueue_many(rows: List[NotificationOutbox]) -> None:
+    # ignore_conflicts turns a repeated dedupe_key into a no-op instead of an
+    # IntegrityError that would poison the caller's transaction.
+    if rows:
+        NotificationOutbox.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def team_registered(*participants) -> None:
+    enqueue_many([
+        NotificationOutbox(
+            event='TEAM_REGISTERED', target_type='TEAM', target_id=participant.team_id,
+            message=f"You're registered for {participant.tournament.title}.",
+            dedupe_key=f'registered:{participant.tournament_id}:{participant.team_id}',
+        )
+        for participant in participants
+    ])
+
+
+def bracket_generated(tournament) -> None:
+    enqueue(
+        'BRACKET_GENERATED', 'TOURNAMENT', tournament.id,
+        f"The bracket for {tournament.title} is live.",
+        dedupe_key=f'bracket:{tournament.id}:{tournament.current_round}',
+    )
+
+
+def match_scheduled(match) -> None:
+    when = timezone.localtime(match.scheduled_time).strftime('%Y-%m-%d %H:%M %Z')
+    enqueue_many([
+        NotificationOutbox(
+            event='MATCH_SCHEDULED', target_type='TEAM', target_id=team_id,
+            message=f"Round {match.round_number} match {match.match_number} is scheduled for {when}.",
+            dedupe_key=f'scheduled:{match.id}:{team_id}:{match.scheduled_time.isoformat()}',
+        )
+        for team_id in filter(None, (match.team1_id, match.team2_id))
+    ])
+
+
+def match_result(match) -> None:
+    enqueue_many([
+        NotificationOutbox(
+            event='MATCH_RESULT', target_type='TEAM', target_id=team_id,
+            message=f"Your team {'won' if team_id == match.winner_id else 'lost'} "
+                    f"round {match.round_number} match {match.match_number}.",
+            dedupe_key=f'result:{match.id}:{team_id}:{match.winner_id}',
+        )
+        for team_id in filter(None, (match.team1_id, match.team2_id))
+    ])
+
+
+def send_match_reminders(now=None, window_minutes: Optional[int] = None) -> int:
+    """Enqueues one MATCH_REMINDER per team covering all of its matches that
+    start within the window, and stamps those matches so no later or
+    concurrent run repeats them. Three queries however many matches are due.
+    Returns the number of reminders enqueued."""
+    now = now or timezone.now()
+    window = timedelta(minutes=window_minutes or getattr(settings, 'MATCH_REMINDER_WINDOW_MINUTES', 30))
+
+    with transaction.atomic():
+        due = list(TournamentMatch.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+            reminder_sent_at__isnull=True, is_completed=False,
+            scheduled_time__gt=now, scheduled_time__lte=now + window,
+        ).order_by('scheduled_time', 'id').values_list(
+            'id', 'team1_id', 'team2_id', 'round_number', 'match_number', 'scheduled_time', 'tournament__title'
+        ))
+        if not due:
+            return 0
+        TournamentMatch.objects.filter(id__in=[row[0] for row in due]).update(reminder_sent_at=now)
+
+        per_team = {}
+        for match_id, team1_id, team2_id, round_number, match_number, scheduled_time, title in due:
+            when = timezone.localtime(scheduled_time).strftime('%H:%M %Z')
+            line = f"{title} round {round_number} match {match_number} at {when}"
+            for team_id in filter(None, (team1_id, team2_id)):
+                per_team.setdefault(team_id, []).append((match_id, line))
+
+        rows = []
+        for team_id, matches in per_team.items():
+            match_ids = ','.join(str(match_id) for match_id, _ in matches)
+            rows.append(NotificationOutbox(
+                event='MATCH_REMINDER', target_type='TEAM', target_id=team_id,
+                message='Upcoming: ' + '; '.join(line for _, line in matches) + '.',
+                dedupe_key=f"reminder:{team_id}:{hashlib.sha1(match_ids.encode()).hexdigest()[:16]}",
+                available_at=now,
+            ))
+        enqueue_many(rows)
+    return len(rows)
+
+
+def claim_batch(batch_size: int, now=None) -> List[NotificationOutbox]:
+    """Marks up to `batch_size` due rows SENDING and returns them. Rows locked
+    by another worker are skipped, so workers never block on each other."""
+    now = now or timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'NOTIFICATION_CLAIM_TIMEOUT_SECONDS', 300))
+    with transaction.atomic():
+        rows = list(NotificationOutbox.objects.select_for_update(skip_locked=True).filter(
+            Q(status='PENDING', available_at__lte=now) | Q(status='SENDING', claimed_at__lt=stale)
+        ).order_by('available_at', 'id')[:batch_size])
+        if rows:
+            NotificationOutbox.objects.filter(id__in=[row.id for row in rows]).update(status='SENDING', claimed_at=now)
+    return rows
+
+
+def resolve_recipients(rows: Iterable[NotificationOutbox]) -> Dict[int, Dict[int, Optional[str]]]:
+    """{row id: {player_id: discord_id}} with one query per target type."""
+    ids = {'PLAYER': set(), 'TEAM': set(), 'TOURNAMENT': set()}
+    for row in rows:
+        ids[row.target_type].add(row.target_id)
+
+    players = {}
+    if ids['PLAYER']:
+        players = {
+            player_id: {player_id: discord_id}
+            for player_id, discord_id in Player.objects.filter(id__in=ids['PLAYER']).values_list('id', 'discord_id')
+        }
+    teams, tournaments = {}, {}
+    if ids['TEAM']:
+        for team_id, player_id, discord_id in TeamMember.objects.filter(team_id__in=ids['TEAM']).values_list(
+            'team_id', 'player_id', 'player__discord_id'
+        ):
+            teams.setdefault(team_id, {})[player_id] = discord_id
+    if ids['TOURNAMENT']:
+        for tournament_id, player_id, discord_id in TeamMember.objects.filter(
+            team__tournaments__tournament_id__in=ids['TOURNAMENT']
+        ).values_list('team__tournaments__tournament_id', 'player_id', 'player__discord_id'):
+            tournaments.setdefault(tournament_id, {})[player_id] = discord_id
+
+    targets = {'PLAYER': players, 'TEAM': teams, 'TOURNAMENT': tournaments}
+    resolved = {}
+    for row in rows:
+        recipients = targets[row.target_type].get(row.target_id, {})
+        if row.retry_player_ids:
+            retry = set(row.retry_player_ids)
+            recipients = {player_id: discord_id for player_id, discord_id in recipients.items() if player_id in retry}
+        resolved[row.id] = recipients
+    return resolved
+
+
+def retry_delay(attempts: int) -> timedelta:
+    base = getattr(settings, 'NOTIFICATION_RETRY_BASE_SECONDS', 30)
+    ceiling = getattr(settings, 'NOTIFICATION_RETRY_MAX_SECONDS', 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), ceiling))
+
+
+def _finish(row: NotificationOutbox, results: List[Dict], now) -> None:
+    row.attempts += 1
+    row.claimed_at = None
+    retry = [result for result in results if result['retryable']]
+    final = not retry or row.attempts >= getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 5)
+
+    # Totals accumulate across attempts; players still being retried are not counted yet.
+    totals = Counter(row.results.get('totals', {}))
+    totals.update(result['status'] for result in results if final or not result['retryable'])
+    row.results = {'totals': dict(totals)}
+    row.last_error = retry[0]['error'] or '' if retry else ''
+
+    if not retry:
+        row.status, row.sent_at, row.retry_player_ids = 'SENT', now, []
+    elif final:
+        row.status, row.retry_player_ids = 'FAILED', []
+    else:
+        row.status = 'PENDING'
+        row.available_at = now + retry_delay(row.attempts)
+        row.retry_player_ids = [result['player_id'] for result in retry]
+
+
+def deliver_batch(batch_size: Optional[int] = None, client=None, now=None) -> int:
+    """Claims one batch, sends it through DiscordNotifier and records each
+    row's outcome. A fixed number of queries per batch, none held open while
+    waiting on Discord. Returns the number of rows processed."""
+    from .discord_client import get_discord_client
+    from .services import DiscordNotifier
+
+    batch_size = batch_size or getattr(settings, 'NOTIFICATION_BATCH_SIZE', 100)
+    now = now or timezone.now()
+    rows = claim_batch(batch_size, now)
+    if not rows:
+        return 0
+
+    recipients = resolve_recipients(rows)
+    notifier = DiscordNotifier(client or get_discord_client())
+    outcomes = async_to_sync(notifier.deliver_many)([(recipients[row.id], row.message) for row in rows])
+
+    finished = timezone.now()
+    for row, results in zip(rows, outcomes):
+        _finish(row, results, finished)
+    NotificationOutbox.objects.bulk_update(
+        rows, ['status', 'attempts', 'available_at', 'claimed_at', 'retry_player_ids', 'results', 'last_error', 'sent_at']
+    )
+    return len(rows)
+
+
+def drain_outbox(max_batches: int = 50, client=None) -> int:
+    processed = 0
+    for _ in range(max_batches):
+        count = deliver_batch(client=client)
+        processed += count
+        if not count:
+            break
+    return processed
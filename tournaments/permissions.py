@@ -0,0 +1,16 @@
+# tournaments/permissions.py
+from rest_framework.permissions import BasePermission
+
+from .membership import get_membership
+from .models import Team
+
+
+class IsTeamLead(BasePermission):
+    message = 'Only the team lead can do this.'
+
+    def has_permission(self, request, view):
+        return bool(get_membership(request).led_team_ids)
+
+    def has_object_permission(self, request, view, obj):
+        team_id = obj.pk if isinstance(obj, Team) else getattr(obj, 'team_id', None)
+        return get_membership(request).leads(team_id)
@@ -0,0 +1,405 @@
+# tournaments/providers.py
+import asyncio
+import hashlib
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class ProviderError(Exception):
+    pass
+
+
+class ProviderUnavailable(ProviderError):
+    pass
+
+
+PROVIDER_ENDPOINTS = {
+    'discord': {
+        'token_url': 'https://discord.com/api/oauth2/token',
+        'profile_url': 'https://discord.com/api/users/@me',
+    },
+    'twitch': {
+        'token_url': 'https://id.twitch.tv/oauth2/token',
+        'profile_url': 'https://api.twitch.tv/helix/users',
+    },
+    'facebook': {
+        'token_url': 'https://graph.facebook.com/v19.0/oauth/access_token',
+        'profile_url': 'https://graph.facebook.com/me',
+    },
+}
+
+
+def get_redirect_uri(provider: str) -> str:
+    # Must match the URI the frontend sent to the provider's authorize page;
+    # only Discord's follows CLIENT_URL there.
+    if provider == 'discord':
+        client_url = os.environ.get('CLIENT_URL', 'http://localhost:3000')
+        return f'{client_url}/login_callback?provider={provider}'
+    return f'http://localhost:3000/login_callback?provider={provider}'
+
+
+def get_endpoint(provider: str, name: str) -> str:
+    if provider not in PROVIDER_ENDPOINTS:
+        raise ProviderError('Unsupported provider')
+
+    # Point every provider at the local stub (see the run_provider_stub command) for offline load tests.
+    stub_url = getattr(settings, 'SOCIAL_PROVIDER_STUB_URL', None)
+    if stub_url:
+        path = 'token' if name == 'token_url' else 'me'
+        return f"{stub_url.rstrip('/')}/{provider}/{path}"
+    return PROVIDER_ENDPOINTS[provider][name]
+
+
+def build_token_request(provider: str, code: str) -> Dict:
+    app = settings.SOCIALACCOUNT_PROVIDERS[provider]['APP']
+    payload = {
+        'client_id': app['client_id'],
+        'client_secret': app['secret'],
+        'code': code,
+        'redirect_uri': get_redirect_uri(provider),
+    }
+    if provider == 'facebook':
+        return {'method': 'GET', 'params': payload}
+
+    payload['grant_type'] = 'authorization_code'
+    return {
+        'method': 'POST',
+        'data': payload,
+        'headers': {'Content-Type': 'application/x-www-form-urlencoded'},
+    }
+
+
+def build_profile_request(provider: str, access_token: str) -> Dict:
+    if provider == 'facebook':
+        return {'params': {'access_token': access_token, 'fields': 'id,name,email'}}
+
+    headers = {'Authorization': f'Bearer {access_token}'}
+    if provider == 'twitch':
+        headers['Client-Id'] = settings.SOCIALACCOUNT_PROVIDERS['twitch']['APP']['client_id']
+    return {'headers': headers}
+
+
+def parse_profile(provider: str, payload: Dict) -> Dict:
+    if provider == 'twitch':
+        users = payload.get('data') or [{}]
+        return users[0]
+    return payload
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures, then lets a single
+    trial call through once `reset_timeout` seconds have passed."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Half-open: push the deadline out so only this caller probes the provider.
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+
+class IdentityCache:
+    """Bounded LRU of verified provider profiles, keyed by provider and a hash of
+    the access token so raw tokens are never kept in memory as keys."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(provider: str, access_token: str) -> str:
+        return f"{provider}:{hashlib.sha256(access_token.encode()).hexdigest()}"
+
+    def get(self, provider: str, access_token: str) -> Optional[Dict]:
+        key = self.make_key(provider, access_token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, provider: str, access_token: str, profile: Dict):
+        key = self.make_key(provider, access_token)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, profile)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+_identity_cache = None
+
+
+def get_identity_cache() -> IdentityCache:
+    global _identity_cache
+    if _identity_cache is None:
+        _identity_cache = IdentityCache(
+            max_size=getattr(settings, 'SOCIAL_IDENTITY_CACHE_SIZE', 10000),
+            ttl=getattr(settings, 'SOCIAL_IDENTITY_CACHE_TTL', 300),
+        )
+    return _identity_cache
+
+
+RETRY_STATUSES = (429, 502, 503, 504)
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    # Shared by the sync and async clients so both see the same provider health.
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(
+                failure_threshold=getattr(settings, 'SOCIAL_PROVIDER_BREAKER_THRESHOLD', 5),
+                reset_timeout=getattr(settings, 'SOCIAL_PROVIDER_BREAKER_RESET', 30),
+            )
+        return _breakers[provider]
+
+
+def check_response(provider: str, breaker: CircuitBreaker, status_code: int):
+    if status_code >= 500 or status_code == 429:
+        breaker.record_failure()
+        raise ProviderUnavailable(f'{provider} returned {status_code}')
+
+    # A 4xx is the caller's bad code or token, not a sign the provider is down.
+    breaker.record_success()
+    if status_code != 200:
+        raise ProviderError(f'Invalid {provider.capitalize()} credentials')
+
+
+def parse_json(provider: str, response) -> Dict:
+    # Proxies and provider outages sometimes answer with an HTML page.
+    try:
+        return response.json()
+    except ValueError:
+        raise ProviderError(f'{provider} returned an invalid response')
+
+
+class ProviderClient:
+    def __init__(self):
+        self.connect_timeout = getattr(settings, 'SOCIAL_PROVIDER_CONNECT_TIMEOUT', 3.05)
+        self.read_timeout = getattr(settings, 'SOCIAL_PROVIDER_READ_TIMEOUT', 5)
+        self.session = self._build_session(self._retry_policy(idempotent=True))
+        # A code can only be exchanged once, so a retry after the provider has
+        # seen it fails with invalid_grant; only retry failed connections.
+        self.token_session = self._build_session(self._retry_policy(idempotent=False))
+
+    def _retry_policy(self, idempotent: bool) -> Retry:
+        if not idempotent:
+            return Retry(total=2, connect=2, read=0, status=0, other=0, raise_on_status=False)
+        return Retry(
+            total=getattr(settings, 'SOCIAL_PROVIDER_MAX_RETRIES', 2),
+            connect=2,
+            read=1,
+            status=2,
+            backoff_factor=0.2,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({'GET'}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+
+    def _build_session(self, retries: Retry) -> requests.Session:
+        adapter = HTTPAdapter(
+            pool_connections=len(PROVIDER_ENDPOINTS) * 2,
+            pool_maxsize=getattr(settings, 'SOCIAL_PROVIDER_POOL_SIZE', 20),
+            max_retries=retries,
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _request(self, provider: str, method: str, url: str, session: Optional[requests.Session] = None, **kwargs) -> Dict:
+        breaker = get_breaker(provider)
+        if not breaker.allow_request():
+            raise ProviderUnavailable(f'{provider} is temporarily unavailable')
+
+        try:
+            response = (session or self.session).request(
+                method, url, timeout=(self.connect_timeout, self.read_timeout), **kwargs
+            )
+        except requests.RequestException as exc:
+            breaker.record_failure()
+            raise ProviderUnavailable(f'{provider} request failed: {exc}') from exc
+
+        check_response(provider, breaker, response.status_code)
+        return parse_json(provider, response)
+
+    def exchange_code(self, provider: str, code: str) -> str:
+        request = build_token_request(provider, code)
+        method = request.pop('method')
+        payload = self._request(
+            provider, method, get_endpoint(provider, 'token_url'), session=self.token_session, **request
+        )
+        return payload['access_token']
+
+    def fetch_profile(self, provider: str, access_token: str) -> Dict:
+        request = build_profile_request(provider, access_token)
+        payload = self._request(provider, 'GET', get_endpoint(provider, 'profile_url'), **request)
+        return parse_profile(provider, payload)
+
+    def verify_token(self, provider: str, access_token: str) -> Dict:
+        cache = get_identity_cache()
+        profile = cache.get(provider, access_token)
+        if profile is None:
+            profile = self.fetch_profile(provider, access_token)
+            cache.set(provider, access_token, profile)
+        return profile
+
+
+class AsyncProviderClient:
+    def __init__(self):
+        self.timeout = httpx.Timeout(
+            getattr(settings, 'SOCIAL_PROVIDER_READ_TIMEOUT', 5),
+            connect=getattr(settings, 'SOCIAL_PROVIDER_CONNECT_TIMEOUT', 3.05),
+        )
+        self.limits = httpx.Limits(
+            max_connections=getattr(settings, 'SOCIAL_PROVIDER_ASYNC_MAX_CONNECTIONS', 200),
+            max_keepalive_connections=getattr(settings, 'SOCIAL_PROVIDER_POOL_SIZE', 20),
+        )
+        self.max_retries = getattr(settings, 'SOCIAL_PROVIDER_MAX_RETRIES', 2)
+        # httpx pools are bound to the event loop that created them. Under ASGI there is a
+        # single long-lived loop; the WSGI dev server runs each async view in a fresh one.
+        self._http_clients = weakref.WeakKeyDictionary()
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._http_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                transport=httpx.AsyncHTTPTransport(retries=self.max_retries, limits=self.limits),
+            )
+            self._http_clients[loop] = client
+        return client
+
+    async def _request(self, provider: str, method: str, url: str, retry: bool = True, **kwargs) -> Dict:
+        breaker = get_breaker(provider)
+        if not breaker.allow_request():
+            raise ProviderUnavailable(f'{provider} is temporarily unavailable')
+
+        client = self._get_http_client()
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.HTTPError as exc:
+                breaker.record_failure()
+                raise ProviderUnavailable(f'{provider} request failed: {exc}') from exc
+
+            # The transport already retries failed connections; a code exchange the
+            # provider answered must not be replayed (see ProviderClient).
+            if not retry or response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                break
+            await asyncio.sleep(0.2 * (2 ** attempt))
+
+        check_response(provider, breaker, response.status_code)
+        return parse_json(provider, response)
+
+    async def exchange_code(self, provider: str, code: str) -> str:
+        request = build_token_request(provider, code)
+        method = request.pop('method')
+        payload = await self._request(provider, method, get_endpoint(provider, 'token_url'), retry=False, **request)
+        return payload['access_token']
+
+    async def fetch_profile(self, provider: str, access_token: str) -> Dict:
+        request = build_profile_request(provider, access_token)
+        payload = await self._request(provider, 'GET', get_endpoint(provider, 'profile_url'), **request)
+        return parse_profile(provider, payload)
+
+    async def verify_token(self, provider: str, access_token: str) -> Dict:
+        cache = get_identity_cache()
+        profile = cache.get(provider, access_token)
+        if profile is None:
+            profile = await self.fetch_profile(provider, access_token)
+            cache.set(provider, access_token, profile)
+        return profile
+
+
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+
+def get_provider_client() -> ProviderClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ProviderClient()
+    return _client
+
+
+def get_async_provider_client() -> AsyncProviderClient:
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                _async_client = AsyncProviderClient()
+    return _async_client
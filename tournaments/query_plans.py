@@ -0,0 +1,70 @@
+# tournaments/query_plans.py
+import re
+from typing import Callable, Dict, List, Optional
+
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import Player, TeamMember, Tournament, TournamentMatch
+
+SQLITE_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)')
+POSTGRES_SCAN = re.compile(r'\bSeq Scan on (\w+)')
+
+
+def sequential_scans(queryset: QuerySet) -> List[str]:
+    """Tables the database would read end to end to answer `queryset`.
+    Backends other than SQLite and PostgreSQL are not checked."""
+    if connection.vendor == 'sqlite':
+        # "SCAN t USING [COVERING] INDEX i" walks an index, not the table.
+        return [
+            match.group(1) for match in map(SQLITE_SCAN.search, queryset.explain().splitlines())
+            if match and 'USING' not in match.string and match.group(1) != 'CONSTANT'
+        ]
+    if connection.vendor == 'postgresql':
+        # Seeded test tables are tiny, so the planner would pick a seq scan on
+        # cost alone; with it disabled one is only chosen when no index fits.
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+        return POSTGRES_SCAN.findall(plan)
+    return []
+
+
+def hot_querysets(now=None) -> Dict[str, Callable[[], QuerySet]]:
+    """The filters the busiest views and periodic tasks run, keyed by a short
+    name. Ids are placeholders; only the plan matters."""
+    now = now or timezone.now()
+    threshold = now - timezone.timedelta(minutes=5)
+    return {
+        # TournamentListView, UpcomingTournamentView
+        'upcoming_tournaments': lambda: Tournament.objects.filter(
+            Tournament.upcoming_q(now), is_active=True
+        ).order_by('start_date'),
+        'active_tournaments_by_start': lambda: Tournament.objects.filter(
+            is_active=True, start_date__gte=now
+        ).order_by('start_date'),
+        # TournamentMatchViewSet with ?tournament_id=
+        'tournament_schedule': lambda: TournamentMatch.objects.filter(tournament_id=1).order_by('scheduled_time', 'id'),
+        'tournament_round': lambda: TournamentMatch.objects.filter(tournament_id=1, round_number=1),
+        # update_online_statuses
+        'stale_online_players': lambda: Player.objects.filter(is_online=True, last_activity__lt=threshold),
+        'returning_players': lambda: Player.objects.filter(is_online=False, last_activity__gte=threshold),
+        # member_stats
+        'recently_active_players': lambda: Player.objects.filter(last_activity__gte=threshold),
+        # Teams a player captains or co-leads
+        'player_roles': lambda: TeamMember.objects.filter(player_id=1, role__in=('CAPTAIN', 'CO_LEAD')),
+    }
+
+
+def check_query_plans(names: Optional[List[str]] = None) -> Dict[str, List[str]]:
+    """{name: [scanned tables]} for every hot queryset that falls back to a
+    sequential scan; empty when all of them use an index."""
+    querysets = hot_querysets()
+    failures = {}
+    for name in names or querysets:
+        scans = sequential_scans(querysets[name]())
+        if scans:
+            failures[name] = scans
+    return failures
@@ -0,0 +1,289 @@
+# tournaments/ratings.py
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Coalesce
+
+from .models import Player, SquadMember, Team, TeamMember, TournamentMatch
+
+BASE_RATING = 1000.0
+
+
+def get_k_factor() -> float:
+    return float(getattr(settings, 'RATING_K_FACTOR', 32))
+
+
+def expected_score(rating, opponent_rating):
+    # Works on floats and NumPy arrays alike.
+    return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / 400.0))
+
+
+def match_score(match_winner_id, team1_id) -> float:
+    if match_winner_id is None:
+        return 0.5
+    return 1.0 if match_winner_id == team1_id else 0.0
+
+
+def match_roster(tournament_id: int, team_id: int) -> List[int]:
+    # Players who were squadded for the tournament, else the team's current roster.
+    players = list(SquadMember.objects.filter(
+        squad__participant__tournament_id=tournament_id,
+        squad__participant__team_id=team_id,
+    ).values_list('player_id', flat=True).distinct())
+    if not players:
+        players = list(TeamMember.objects.filter(team_id=team_id).values_list('player_id', flat=True))
+    return players
+
+
+def record_match_result(match: TournamentMatch) -> bool:
+    """Applies one completed match to team and player ratings. Each match is
+    rated once; changing a winner afterwards needs a full recompute."""
+    if not (match.is_completed and match.team1_id and match.team2_id):
+        return False
+
+    k = get_k_factor()
+    with transaction.atomic():
+        claimed = TournamentMatch.objects.filter(pk=match.pk, rated=False).update(rated=True)
+        if not claimed:
+            return False
+
+        teams = {
+            team.id: team for team in
+            Team.objects.select_for_update().filter(id__in=[match.team1_id, match.team2_id]).order_by('id')
+        }
+        team1, team2 = teams[match.team1_id], teams[match.team2_id]
+        score1 = match_score(match.winner_id, team1.id)
+        rating1, rating2 = team1.skill_rating, team2.skill_rating
+
+        expected1 = expected_score(rating1, rating2)
+        team1.skill_rating = rating1 + k * (score1 - expected1)
+        team2.skill_rating = rating2 + k * ((1.0 - score1) - (1.0 - expected1))
+        Team.objects.bulk_update([team1, team2], ['skill_rating'])
+
+        # A player on both rosters gets both updates, summed before rounding,
+        # the same as replay_ratings does within a wave.
+        sides = [
+            (match_roster(match.tournament_id, team_id), score, opponent_rating)
+            for team_id, score, opponent_rating in (
+                (team1.id, score1, rating2),
+                (team2.id, 1.0 - score1, rating1),
+            )
+        ]
+        players = {
+            player.id: player for player in Player.objects.select_for_update().filter(
+                id__in={player_id for roster, _, _ in sides for player_id in roster}
+            ).only('id', 'skill_rating')
+        }
+        deltas = dict.fromkeys(players, 0.0)
+        for roster, score, opponent_rating in sides:
+            for player_id in roster:
+                if player_id in players:
+                    deltas[player_id] += k * (score - expected_score(players[player_id].skill_rating, opponent_rating))
+        for player_id, player in players.items():
+            player.skill_rating = round(player.skill_rating + deltas[player_id])
+        Player.objects.bulk_update(list(players.values()), ['skill_rating'])
+
+    match.rated = True
+    return True
+
+
+def _prune_rosters(team1: np.ndarray, team2: np.ndarray, n_teams: int, rosters, n_players: int):
+    # A player who only ever played for one team plays a subset of that
+    # team's matches, in the same order, so the team's ordering already
+    # covers theirs. Only players who changed teams need tracking.
+    side1, side2, roster_ptr, roster_players = rosters
+    n_rosters = len(roster_ptr) - 1
+    lowest, highest = np.full(n_rosters, n_teams), np.full(n_rosters, -1)
+    for side, team in ((side1, team1), (side2, team2)):
+        np.minimum.at(lowest, side, team)
+        np.maximum.at(highest, side, team)
+
+    owner = np.repeat(np.arange(n_rosters), np.diff(roster_ptr))
+    player_lowest, player_highest = np.full(n_players, n_teams), np.full(n_players, -1)
+    np.minimum.at(player_lowest, roster_players, lowest[owner])
+    np.maximum.at(player_highest, roster_players, highest[owner])
+    keep = (player_lowest != player_highest)[roster_players]
+    kept_ptr = np.concatenate(([0], np.cumsum(np.bincount(owner[keep], minlength=n_rosters))))
+    return side1, side2, kept_ptr, roster_players[keep]
+
+
+def _assign_waves(team1: np.ndarray, team2: np.ndarray, n_teams: int, rosters=None, n_players: int = 0) -> np.ndarray:
+    # A match's wave is one past the latest wave any of its teams or rostered
+    # players has played in, so every team's and every player's matches keep
+    # their chronological order and nobody appears in two matches of a wave.
+    # Updating a whole wave at once is then exactly the same as replaying its
+    # matches one by one.
+    #
+    # Each team's or player's consecutive matches form an edge; a wave is a
+    # layer of the resulting DAG, peeled off Kahn-style.
+    n = len(team1)
+    waves = np.zeros(n, dtype=np.int64)
+    if not n:
+        return waves
+    matches = np.arange(n)
+    entities, owners = [team1, team2], [matches, matches]
+    if rosters is not None:
+        side1, side2, roster_ptr, roster_players = _prune_rosters(team1, team2, n_teams, rosters, n_players)
+        for side in (side1, side2):
+            players, owner = _expand(side, roster_ptr, roster_players)
+            entities.append(players + n_teams)
+            owners.append(owner)
+    occurrences = np.sort(np.concatenate(entities).astype(np.int64) * n + np.concatenate(owners))
+    entity, match = np.divmod(occurrences, n)
+    follows = (entity[1:] == entity[:-1]) & (match[1:] != match[:-1])
+    # Both teams of a match usually hand it the same predecessors; keep each edge once.
+    edges = np.sort(match[:-1][follows] * n + match[1:][follows])
+    first = np.ones(len(edges), dtype=bool)
+    first[1:] = edges[1:] != edges[:-1]
+    src, dst = np.divmod(edges[first], n)
+
+    out_ptr = np.concatenate(([0], np.cumsum(np.bincount(src, minlength=n))))
+    pending = np.bincount(dst, minlength=n)
+    edge_ids = np.arange(len(dst))
+    frontier = np.flatnonzero(pending == 0)
+    wave = 0
+    while frontier.size:
+        wave += 1
+        waves[frontier] = wave
+        released = dst[_expand(frontier, out_ptr, edge_ids)[0]]
+        np.subtract.at(pending, released, 1)
+        frontier = np.unique(released[pending[released] == 0])
+    return waves
+
+
+def _expand(roster_ids: np.ndarray, roster_ptr: np.ndarray, roster_players: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    starts = roster_ptr[roster_ids]
+    lengths = roster_ptr[roster_ids + 1] - starts
+    owners = np.repeat(np.arange(len(roster_ids)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return roster_players[np.repeat(starts, lengths) + offsets], owners
+
+
+def replay_ratings(
+    team1: np.ndarray,
+    team2: np.ndarray,
+    score1: np.ndarray,
+    team_ratings: np.ndarray,
+    k: float,
+    rosters: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None,
+    player_ratings: Optional[np.ndarray] = None,
+) -> int:
+    """Replays matches (already in chronological order, teams as dense indices)
+    in place on `team_ratings`. `rosters` is (side1_roster, side2_roster,
+    roster_ptr, roster_players) in CSR form, used to update `player_ratings`.
+    Returns the number of waves."""
+    waves = _assign_waves(
+        team1, team2, len(team_ratings), rosters, len(player_ratings) if player_ratings is not None else 0
+    )
+    order = np.argsort(waves, kind='stable')
+    bounds = np.flatnonzero(np.diff(waves[order])) + 1
+
+    for batch in np.split(order, bounds):
+        a, b = team1[batch], team2[batch]
+        rating_a, rating_b = team_ratings[a], team_ratings[b]
+        expected_a = expected_score(rating_a, rating_b)
+        change = k * (score1[batch] - expected_a)
+        team_ratings[a] += change
+        team_ratings[b] -= change
+
+        if rosters is None:
+            continue
+        side1, side2, roster_ptr, roster_players = rosters
+        updates = []
+        for roster_ids, score, opponent in (
+            (side1[batch], score1[batch], rating_b),
+            (side2[batch], 1.0 - score1[batch], rating_a),
+        ):
+            players, owners = _expand(roster_ids, roster_ptr, roster_players)
+            updates.append((players, k * (score[owners] - expected_score(player_ratings[players], opponent[owners]))))
+        # Both sides are scored from pre-match ratings, so a player on both
+        # rosters of one match gets both updates, summed.
+        for players, deltas in updates:
+            np.add.at(player_ratings, players, deltas)
+        # Stored ratings are whole numbers after every match (see record_match_result).
+        touched = np.unique(np.concatenate([players for players, _ in updates]))
+        player_ratings[touched] = np.round(player_ratings[touched])
+
+    return len(bounds) + 1 if len(order) else 0
+
+
+def _load_rosters(keys: List[Tuple[int, int]]) -> Dict[Tuple[int, int], List[int]]:
+    squadded = {}
+    for tournament_id, team_id, player_id in SquadMember.objects.values_list(
+        'squad__participant__tournament_id', 'squad__participant__team_id', 'player_id'
+    ).distinct().iterator(chunk_size=10000):
+        squadded.setdefault((tournament_id, team_id), []).append(player_id)
+
+    members = {}
+    for team_id, player_id in TeamMember.objects.values_list('team_id', 'player_id').iterator(chunk_size=10000):
+        members.setdefault(team_id, []).append(player_id)
+
+    return {key: squadded.get(key) or members.get(key[1], []) for key in keys}
+
+
+def recompute_all_ratings(batch_size: int = 2000, include_players: bool = True) -> Dict:
+    """Resets every rating to BASE_RATING and replays all completed matches in
+    completion order, writing results back with bulk_update."""
+    k = get_k_factor()
+    rows = TournamentMatch.objects.filter(
+        is_completed=True, team1__isnull=False, team2__isnull=False
+    ).order_by(
+        Coalesce('completed_at', 'scheduled_time').asc(nulls_last=True), 'id'
+    ).values_list('tournament_id', 'team1_id', 'team2_id', 'winner_id')
+
+    tournaments, raw1, raw2, winners = [], [], [], []
+    for tournament_id, team1_id, team2_id, winner_id in rows.iterator(chunk_size=batch_size * 10):
+        tournaments.append(tournament_id)
+        raw1.append(team1_id)
+        raw2.append(team2_id)
+        winners.append(winner_id or 0)
+
+    team_ids = np.fromiter(Team.objects.values_list('id', flat=True), dtype=np.int64)
+    team_ids.sort()
+    team1 = np.searchsorted(team_ids, np.asarray(raw1, dtype=np.int64))
+    team2 = np.searchsorted(team_ids, np.asarray(raw2, dtype=np.int64))
+    winner = np.asarray(winners, dtype=np.int64)
+    score1 = np.where(winner == 0, 0.5, (winner == np.asarray(raw1, dtype=np.int64)).astype(float))
+    team_ratings = np.full(len(team_ids), BASE_RATING)
+
+    rosters = None
+    player_ids = player_ratings = None
+    if include_players:
+        player_ids = np.fromiter(Player.objects.values_list('id', flat=True), dtype=np.int64)
+        player_ids.sort()
+        player_ratings = np.full(len(player_ids), BASE_RATING)
+
+        keys = sorted(set(zip(tournaments, raw1)) | set(zip(tournaments, raw2)))
+        roster_of = _load_rosters(keys)
+        key_index = {key: i for i, key in enumerate(keys)}
+        lengths = np.fromiter((len(roster_of[key]) for key in keys), dtype=np.int64, count=len(keys))
+        roster_ptr = np.concatenate(([0], np.cumsum(lengths)))
+        flat = [player_id for key in keys for player_id in roster_of[key]]
+        roster_players = np.searchsorted(player_ids, np.asarray(flat, dtype=np.int64))
+        side1 = np.fromiter((key_index[key] for key in zip(tournaments, raw1)), dtype=np.int64, count=len(raw1))
+        side2 = np.fromiter((key_index[key] for key in zip(tournaments, raw2)), dtype=np.int64, count=len(raw2))
+        rosters = (side1, side2, roster_ptr, roster_players)
+
+    waves = replay_ratings(team1, team2, score1, team_ratings, k, rosters, player_ratings)
+
+    with transaction.atomic():
+        Team.objects.bulk_update(
+            [Team(id=int(team_id), skill_rating=float(rating)) for team_id, rating in zip(team_ids, team_ratings)],
+            ['skill_rating'], batch_size=batch_size
+        )
+        if include_players:
+            Player.objects.bulk_update(
+                [Player(id=int(player_id), skill_rating=int(round(rating)))
+                 for player_id, rating in zip(player_ids, player_ratings)],
+                ['skill_rating'], batch_size=batch_size
+            )
+        TournamentMatch.objects.filter(is_completed=True, rated=False).update(rated=True)
+
+    return {
+        'matches': len(raw1),
+        'waves': waves,
+        'teams': len(team_ids),
+        'players': len(player_ids) if include_players else 0,
+    }
@@ -0,0 +1,162 @@
+# tournaments/scrims.py
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import ScrimMatch, ScrimQueueEntry, Team, Tournament
+
+
+class ScrimQueueError(Exception):
+    pass
+
+
+class _PresenceTree:
+    """Fenwick tree over positions 0..n-1 of a sorted array, tracking which
+    are still unmatched. Removal and nearest-neighbour lookups are O(log n)."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.count = size
+        self.tree = [0] * (size + 1)
+        for i in range(1, size + 1):
+            self.tree[i] += 1
+            parent = i + (i & -i)
+            if parent <= size:
+                self.tree[parent] += self.tree[i]
+        self.present = [True] * size
+        self.top_bit = 1 << max(size.bit_length() - 1, 0)
+
+    def remove(self, position: int):
+        self.present[position] = False
+        self.count -= 1
+        i = position + 1
+        while i <= self.size:
+            self.tree[i] -= 1
+            i += i & -i
+
+    def _prefix(self, position: int) -> int:
+        # Present positions in [0, position].
+        total, i = 0, position + 1
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def _kth(self, k: int) -> int:
+        # Position of the k-th (1-based) present element.
+        position, step = 0, self.top_bit
+        while step:
+            nxt = position + step
+            if nxt <= self.size and self.tree[nxt] < k:
+                position = nxt
+                k -= self.tree[nxt]
+            step >>= 1
+        return position
+
+    def neighbours(self, position: int) -> Tuple[Optional[int], Optional[int]]:
+        before = self._prefix(position - 1) if position else 0
+        lower = self._kth(before) if before else None
+        after = before + (1 if self.present[position] else 0)
+        upper = self._kth(after + 1) if after < self.count else None
+        return lower, upper
+
+
+def pair_by_rating(ratings: Sequence[float], windows: Sequence[float], priority: Iterable[int]) -> List[Tuple[int, int]]:
+    """Pairs positions of the ascending `ratings` list. Entries are visited in
+    `priority` order (longest waiting first) and take their nearest unmatched
+    neighbour if the gap fits inside either side's window."""
+    tree = _PresenceTree(len(ratings))
+    pairs = []
+    for position in priority:
+        if not tree.present[position]:
+            continue
+        best = None
+        for other in tree.neighbours(position):
+            if other is None:
+                continue
+            gap = abs(ratings[other] - ratings[position])
+            if gap <= max(windows[position], windows[other]) and (best is None or gap < best[0]):
+                best = (gap, other)
+        if best is not None:
+            tree.remove(position)
+            tree.remove(best[1])
+            pairs.append((position, best[1]))
+    return pairs
+
+
+def search_window(waited_seconds: float) -> float:
+    # Rating gap a team will accept; grows the longer it has been queued.
+    base = getattr(settings, 'SCRIM_WINDOW_BASE', 50)
+    per_minute = getattr(settings, 'SCRIM_WINDOW_PER_MINUTE', 25)
+    ceiling = getattr(settings, 'SCRIM_WINDOW_MAX', 400)
+    return min(base + per_minute * max(waited_seconds, 0) / 60.0, ceiling)
+
+
+def enqueue_team(team: Team, player, region: str, platform: str, mode: str) -> ScrimQueueEntry:
+    for value, choices, name in (
+        (region, Tournament.REGION_CHOICES, 'region'),
+        (platform, Tournament.PLATFORM_CHOICES, 'platform'),
+        (mode, Tournament.MODE_CHOICES, 'mode'),
+    ):
+        if value not in dict(choices):
+            raise ScrimQueueError(f"Invalid {name}: {value!r}")
+    try:
+        with transaction.atomic():
+            return ScrimQueueEntry.objects.create(
+                team=team, queued_by=player, region=region, platform=platform, mode=mode,
+                rating=team.skill_rating,
+            )
+    except IntegrityError:
+        raise ScrimQueueError('This team is already in the scrim queue')
+
+
+def cancel_entry(entry: ScrimQueueEntry) -> bool:
+    return bool(ScrimQueueEntry.objects.filter(pk=entry.pk, status='WAITING').update(status='CANCELLED'))
+
+
+def match_bucket(region: str, platform: str, mode: str, now=None) -> List[ScrimMatch]:
+    now = now or timezone.now()
+    batch_size = getattr(settings, 'SCRIM_MATCH_BATCH_SIZE', 500)
+    with transaction.atomic():
+        # skip_locked lets overlapping ticks work on whatever the other left.
+        entries = list(ScrimQueueEntry.objects.select_for_update(skip_locked=True).filter(
+            status='WAITING', region=region, platform=platform, mode=mode
+        ).order_by('rating', 'id').only('id', 'team_id', 'rating', 'created_at'))
+        if len(entries) < 2:
+            return []
+
+        ratings = [entry.rating for entry in entries]
+        windows = [search_window((now - entry.created_at).total_seconds()) for entry in entries]
+        priority = sorted(range(len(entries)), key=lambda i: (entries[i].created_at, entries[i].id))
+        pairs = pair_by_rating(ratings, windows, priority)
+        if not pairs:
+            return []
+
+        matches = ScrimMatch.objects.bulk_create([
+            ScrimMatch(
+                team1_id=entries[a].team_id, team2_id=entries[b].team_id,
+                team1_rating=entries[a].rating, team2_rating=entries[b].rating,
+                region=region, platform=platform, mode=mode,
+            )
+            for a, b in pairs
+        ], batch_size=batch_size)
+
+        matched = []
+        for match, (a, b) in zip(matches, pairs):
+            for entry in (entries[a], entries[b]):
+                entry.status, entry.match, entry.matched_at = 'MATCHED', match, now
+                matched.append(entry)
+        ScrimQueueEntry.objects.bulk_update(matched, ['status', 'match', 'matched_at'], batch_size=batch_size)
+    return matches
+
+
+def run_matchmaking_tick(now=None) -> int:
+    """One matchmaking pass over every region/platform/mode bucket with
+    waiting teams. Returns the number of scrims created."""
+    now = now or timezone.now()
+    buckets = ScrimQueueEntry.objects.filter(status='WAITING').values_list(
+        'region', 'platform', 'mode'
+    ).distinct().order_by()
+    return sum(len(match_bucket(region, platform, mode, now)) for region, platform, mode in buckets)
@@ -0,0 +1,115 @@
+# tournaments/seeding.py
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from django.db.models import Avg, Case, F, FloatField, IntegerField, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Player, Tournament, TournamentParticipant
+from .ratings import BASE_RATING
+
+# Index into Player.TIER_CHOICES, so DIAMOND > PLATINUM > ... > BRONZE.
+TIER_ORDER = [code for code, _ in Player.TIER_CHOICES]
+
+
+def bracket_order(size: int) -> List[int]:
+    """Seed numbers in slot order for a bracket of `size` (a power of two):
+    1 meets `size`, and the top two seeds can only meet in the final."""
+    order = [1]
+    while len(order) < size:
+        mirror = 2 * len(order) + 1
+        order = [seed for top in order for seed in (top, mirror - top)]
+    return order
+
+
+def seed_band(participant) -> int:
+    # Seeds 3-4, 5-8, 9-16... are interchangeable without changing who the
+    # top seeds can meet, so region swaps stay inside one band.
+    return (participant.seed - 1).bit_length()
+
+
+def is_protected(participant) -> bool:
+    return getattr(participant, 'protected_seed', None) is not None
+
+
+def separate_regions(pairs: Sequence[Tuple], band: Callable = lambda participant: 0) -> List[Tuple]:
+    """Swaps the lower side of first-round pairs whose teams share a region
+    with another unprotected lower side from the same band. Pairs that cannot
+    be fixed without creating a new clash are left as they are."""
+    def region(participant):
+        return getattr(participant, 'seed_region', None) if participant is not None else None
+
+    def clash(a, b):
+        return region(a) is not None and region(a) == region(b)
+
+    pairs = [list(pair) for pair in pairs]
+    for pair in pairs:
+        top, low = pair
+        if not clash(top, low) or is_protected(low):
+            continue
+        for other in pairs:
+            other_top, other_low = other
+            if other is pair or other_low is None or is_protected(other_low) or band(other_low) != band(low):
+                continue
+            if not clash(top, other_low) and not clash(other_top, low):
+                pair[1], other[1] = other_low, low
+                break
+    return [tuple(pair) for pair in pairs]
+
+
+def elimination_pairs(seeded: List[TournamentParticipant]) -> List[Tuple[TournamentParticipant, Optional[TournamentParticipant]]]:
+    # Byes go to the top seeds: a slot past the field size is an empty opponent.
+    size = 1
+    while size < len(seeded):
+        size *= 2
+    slots = [seeded[seed - 1] if seed <= len(seeded) else None for seed in bracket_order(size)]
+    return separate_regions(list(zip(slots[::2], slots[1::2])), band=seed_band)
+
+
+class SeedingService:
+    """Seeds a tournament's participants by the average skill_rating of their
+    team's members, with the team tier then registration time as tiebreaks.
+    Participants with a protected_seed keep that position."""
+
+    def __init__(self, tournament: Tournament):
+        self.tournament = tournament
+
+    def _load(self):
+        tier_rank = Case(
+            *[When(team__tier=code, then=Value(index)) for index, code in enumerate(TIER_ORDER)],
+            default=Value(-1), output_field=IntegerField(),
+        )
+        return TournamentParticipant.objects.filter(tournament=self.tournament).select_related('team').annotate(
+            seed_rating=Coalesce(
+                Avg('team__members__player__skill_rating', output_field=FloatField()),
+                Value(BASE_RATING), output_field=FloatField(),
+            ),
+            seed_tier=tier_rank,
+            seed_region=F('team__lead_player__country_code'),
+        )
+
+    def rank(self) -> List[TournamentParticipant]:
+        participants = sorted(
+            self._load(),
+            key=lambda p: (-p.seed_rating, -p.seed_tier, p.registered_at, p.id)
+        )
+
+        slots = [None] * len(participants)
+        unplaced = []
+        for participant in participants:
+            wanted = participant.protected_seed
+            if wanted and wanted <= len(slots) and slots[wanted - 1] is None:
+                slots[wanted - 1] = participant
+            else:
+                unplaced.append(participant)
+        remaining = iter(unplaced)
+        slots = [participant or next(remaining) for participant in slots]
+
+        for seed, participant in enumerate(slots, start=1):
+            participant.seed = seed
+        return slots
+
+    def seed(self, save: bool = True) -> List[TournamentParticipant]:
+        seeded = self.rank()
+        if save:
+            TournamentParticipant.objects.bulk_update(seeded, ['seed'])
+        return seeded
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Player, Team, TeamMember, Tournament, TournamentParticipant, TournamentMatch, News, TournamentTeam, Squad, SquadMember, Player
+from .models import Player, Team, TeamMember, Tournament, TournamentParticipant, TournamentWaitlistEntry, TournamentMatch, News, TournamentTeam, Squad, SquadMember, Player, ScrimQueueEntry, ScrimMatch, BracketGenerationJob
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
 
@@ -56,12 +56,69 @@ class TournamentParticipantSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = TournamentParticipant
-        fields = ['team', 'id', 'tournament', 'registered_at', 'squads']
+        fields = ['team', 'id', 'tournament', 'registered_at', 'seed', 'squads']
+        read_only_fields = ['seed']
 
     def get_squads(self, obj):
         return SquadSerializer(obj.squads.all().prefetch_related('members__player'), many=True).data
 
 
+class TournamentWaitlistEntrySerializer(serializers.ModelSerializer):
+    team_name = serializers.CharField(source='team.name', read_only=True)
+    position = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TournamentWaitlistEntry
+        fields = ['id', 'tournament', 'team', 'team_name', 'created_at', 'position']
+
+    def get_position(self, obj):
+        return self.context.get('position')
+
+
+class ScrimQueueEntrySerializer(serializers.ModelSerializer):
+    team_name = serializers.CharField(source='team.name', read_only=True)
+
+    class Meta:
+        model = ScrimQueueEntry
+        fields = ['id', 'team', 'team_name', 'region', 'platform', 'mode', 'rating', 'status', 'match', 'created_at', 'matched_at']
+
+
+class ScrimMatchSerializer(serializers.ModelSerializer):
+    team1_name = serializers.CharField(source='team1.name', read_only=True)
+    team2_name = serializers.CharField(source='team2.name', read_only=True)
+
+    class Meta:
+        model = ScrimMatch
+        fields = [
+            'id', 'team1', 'team1_name', 'team2', 'team2_name', 'winner', 'region', 'platform', 'mode',
+            'team1_rating', 'team2_rating', 'team1_score', 'team2_score', 'is_completed', 'scheduled_time', 'created_at'
+        ]
+
+
+class BracketGenerationJobSerializer(serializers.ModelSerializer):
+    status_url = serializers.SerializerMethodField()
+    matches_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BracketGenerationJob
+        fields = [
+            'id', 'tournament', 'status', 'progress', 'rounds', 'matches_created', 'error',
+            'created_at', 'started_at', 'finished_at', 'status_url', 'matches_url'
+        ]
+
+    def _url(self, path):
+        request = self.context.get('request')
+        return request.build_absolute_uri(path) if request else path
+
+    def get_status_url(self, obj):
+        return self._url(f'/api/tournaments/{obj.tournament_id}/bracket-jobs/{obj.id}/')
+
+    def get_matches_url(self, obj):
+        if obj.status != 'SUCCEEDED':
+            return None
+        return self._url(f'/api/tournament-matches/?tournament_id={obj.tournament_id}')
+
+
 class TournamentMatchSerializer(serializers.ModelSerializer):
     team1 = TeamSerializer(read_only=True)
     team2 = TeamSerializer(read_only=True)
@@ -150,6 +207,7 @@ class TournamentSerializer(serializers.ModelSerializer):
             'registered_players',
             'max_players',
             'is_active',
+            'status',
             'game'
         ]
     
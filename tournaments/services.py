@@ -1,8 +1,21 @@
 # tournaments/services.py
+import asyncio
+import bisect
+import heapq
+import math
 import random
 from collections import defaultdict
-from typing import List, Dict, Tuple
-from .models import Tournament, Team, TournamentParticipant
+from typing import List, Dict, Tuple, Optional
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from .models import (
+    Tournament, Team, TeamMember, TournamentParticipant, TournamentWaitlistEntry, Squad, SquadMember, SquadType
+)
+from . import notifications
+from .discord_client import DiscordError, DiscordRateLimited
+from .seeding import elimination_pairs, separate_regions
+from .squad_index import invalidate_team_squad_index
 
 class SwissPairing:
     def __init__(self, participants: List[TournamentParticipant]):
@@ -10,19 +23,31 @@ class SwissPairing:
         self.standings = self._initialize_standings()
     
     def _initialize_standings(self) -> Dict[int, Dict]:
+        # Participants arrive in seed order (see SeedingService).
         return {p.id: {
             'participant': p,
+            'seed': getattr(p, 'seed', None) or index,
             'points': 0,
             'opponents': set(),
             'tiebreakers': defaultdict(int)
-        } for p in self.participants}
+        } for index, p in enumerate(self.participants, start=1)}
+
+    def _initial_pairings(self, seeded: List[Dict]) -> List[Tuple]:
+        # Round one: top half meets bottom half (1 v N/2+1, 2 v N/2+2...);
+        # with an odd field the lowest seed sits out.
+        half = len(seeded) // 2
+        pairs = [(seeded[i]['participant'], seeded[i + half]['participant']) for i in range(half)]
+        return separate_regions(pairs)
 
     def generate_round(self, round_number: int) -> List[Tuple]:
-        # Sort by points, then tiebreakers
+        # Sort by points, then tiebreakers, then seed
         sorted_standings = sorted(
             self.standings.values(),
-            key=lambda x: (-x['points'], x['tiebreakers']['buchholz'], x['tiebreakers']['solkoff'])
+            key=lambda x: (-x['points'], x['tiebreakers']['buchholz'], x['tiebreakers']['solkoff'], x['seed'])
         )
+
+        if round_number <= 1 and not any(x['opponents'] for x in sorted_standings):
+            return self._initial_pairings(sorted_standings)
         
         pairings = []
         paired = set()
@@ -49,38 +74,23 @@ class SingleEliminationBracket:
         self.participants = participants
     
     def generate_bracket(self) -> Dict:
-        num_participants = len(self.participants)
         bracket = {
             'rounds': [],
             'matches': []
         }
         
-        # Seed participants
-        seeded = sorted(
-            self.participants, 
-            key=lambda p: p.team.tier, 
-            reverse=True
-        )
-        
-        # Create first round matches
+        # Participants arrive in seed order; the top seeds take any byes
         matches = []
-        for i in range(0, num_participants, 2):
-            if i+1 < num_participants:
-                matches.append({
-                    'team1': seeded[i].team.id,
-                    'team2': seeded[i+1].team.id,
-                    'round': 1,
-                    'match_num': len(matches) + 1
-                })
-            else:
-                # Handle bye if odd number of teams
-                matches.append({
-                    'team1': seeded[i].team.id,
-                    'team2': None,
-                    'round': 1,
-                    'match_num': len(matches) + 1,
-                    'winner': seeded[i].team.id
-                })
+        for top, low in elimination_pairs(self.participants):
+            match = {
+                'team1': top.team.id,
+                'team2': low.team.id if low else None,
+                'round': 1,
+                'match_num': len(matches) + 1
+            }
+            if low is None:
+                match['winner'] = top.team.id
+            matches.append(match)
         
         bracket['matches'] = matches
         bracket['rounds'] = [{
@@ -91,24 +101,375 @@ class SingleEliminationBracket:
         
         return bracket
 
+class RoundRobinSchedule:
+    def __init__(self, participants: List[TournamentParticipant]):
+        self.participants = participants
+
+    def generate_rounds(self) -> List[List[Tuple]]:
+        # Circle method: fix the first seed and rotate the rest. An odd field
+        # gets a None slot, and whoever meets it sits the round out.
+        slots = list(self.participants)
+        if len(slots) % 2:
+            slots.append(None)
+        rounds = []
+        for _ in range(len(slots) - 1):
+            half = len(slots) // 2
+            rounds.append([
+                (a, b) for a, b in zip(slots[:half], reversed(slots[half:]))
+                if a is not None and b is not None
+            ])
+            slots = [slots[0], slots[-1]] + slots[1:-1]
+        return rounds
+
+class RegistrationWaitlist:
+    def __init__(self, tournament: Tournament):
+        self.tournament = tournament
+
+    def is_open(self) -> bool:
+        return TournamentWaitlistEntry.objects.filter(tournament=self.tournament).exists()
+
+    def enqueue(self, team: Team) -> Tuple[TournamentWaitlistEntry, bool]:
+        return TournamentWaitlistEntry.objects.get_or_create(tournament=self.tournament, team=team)
+
+    @staticmethod
+    def position(entry: TournamentWaitlistEntry) -> int:
+        # Index range count on (tournament, id); no sort of the whole queue.
+        return TournamentWaitlistEntry.objects.filter(
+            tournament_id=entry.tournament_id,
+            id__lte=entry.id
+        ).count()
+
+    def promote(self) -> List[TournamentParticipant]:
+        with transaction.atomic():
+            tournament = Tournament.objects.select_for_update().get(pk=self.tournament.pk)
+            queue = TournamentWaitlistEntry.objects.filter(tournament=tournament)
+
+            # Teams that got a seat some other way no longer need their queue entry.
+            queue.filter(team__tournaments__tournament=tournament).delete()
+
+            registered = tournament.participants.count()
+            free_seats = tournament.max_players - registered
+            promoted = []
+
+            if free_seats > 0:
+                entries = list(queue.order_by('id')[:free_seats])
+                if entries:
+                    promoted = TournamentParticipant.objects.bulk_create([
+                        TournamentParticipant(tournament=tournament, team_id=entry.team_id)
+                        for entry in entries
+                    ])
+                    queue.filter(id__in=[entry.id for entry in entries]).delete()
+                    notifications.team_registered(*promoted)
+                    registered += len(promoted)
+
+            # bulk_create bypasses the post_save counter signal, so keep the count in step here.
+            tournament.registered_players = registered
+            tournament.save(update_fields=['registered_players'])
+
+        self.tournament.registered_players = registered
+        return promoted
+
+class BalancingError(Exception):
+    pass
+
+class SquadBalancer:
+    """Splits a participant's roster into squads of equal size with close skill
+    totals and a similar spread of action roles.
+
+    Players are placed strongest first: each goes to the open squad holding the
+    fewest players of their role, ties broken by the lowest skill total (a
+    role-aware LPT). Same-role swaps between the strongest and weakest squads
+    then narrow the skill spread without disturbing sizes or role mix.
+    """
+
+    ACTION_ROLES = [choice[0] for choice in SquadMember.ACTION_ROLE_CHOICES]
+    MAX_REFINEMENT_PASSES = 100
+
+    def __init__(self, participant: TournamentParticipant):
+        self.participant = participant
+        self.tournament = participant.tournament
+
+    def _load_roster(self) -> List[Dict]:
+        rows = TeamMember.objects.filter(team_id=self.participant.team_id).values_list(
+            'player_id', 'player__username', 'player__skill_rating', 'player__preferred_roles', 'role'
+        )
+        roster = []
+        for player_id, username, skill, preferred_roles, team_role in rows:
+            preferred = [str(role).upper() for role in (preferred_roles or [])]
+            action_role = next((role for role in preferred if role in self.ACTION_ROLES), 'INFANTRY')
+            roster.append({
+                'player_id': player_id,
+                'username': username,
+                'skill_rating': skill,
+                'action_role': action_role,
+                'team_role': team_role,
+            })
+        return roster
+
+    def _squad_count(self, players: int) -> int:
+        min_squads, max_squads = self.tournament.get_squad_limits()
+        per_squad = self.tournament.get_squad_player_cap()
+        if max_squads == 0 or per_squad == 0:
+            raise BalancingError(f'No squad limits defined for mode {self.tournament.mode}')
+        count = max(min_squads, min(max_squads, math.ceil(players / per_squad)))
+        return min(count, players, len(SquadType.choices))
+
+    def _distribute(self, players: List[Dict], count: int) -> List[List[Dict]]:
+        sizes = [len(players) // count + (1 if i < len(players) % count else 0) for i in range(count)]
+        squads = [[] for _ in range(count)]
+        totals = [0] * count
+        role_counts = [defaultdict(int) for _ in range(count)]
+
+        # One heap per role ordered by (players of that role, skill total). Entries
+        # go stale when a squad changes, so they are re-checked on pop.
+        heaps = {role: [(0, 0, i) for i in range(count)] for role in self.ACTION_ROLES}
+        for heap in heaps.values():
+            heapq.heapify(heap)
+
+        for player in sorted(players, key=lambda p: -p['skill_rating']):
+            role = player['action_role']
+            heap = heaps[role]
+            while True:
+                role_count, total, index = heapq.heappop(heap)
+                if len(squads[index]) >= sizes[index]:
+                    continue
+                if (role_count, total) != (role_counts[index][role], totals[index]):
+                    heapq.heappush(heap, (role_counts[index][role], totals[index], index))
+                    continue
+                break
+            squads[index].append(player)
+            totals[index] += player['skill_rating']
+            role_counts[index][role] += 1
+            if len(squads[index]) < sizes[index]:
+                heapq.heappush(heap, (role_counts[index][role], totals[index], index))
+
+        return squads
+
+    def _refine(self, squads: List[List[Dict]]) -> None:
+        totals = [sum(p['skill_rating'] for p in squad) for squad in squads]
+        for _ in range(self.MAX_REFINEMENT_PASSES):
+            high = max(range(len(squads)), key=totals.__getitem__)
+            low = min(range(len(squads)), key=totals.__getitem__)
+            gap = totals[high] - totals[low]
+            if gap <= 0:
+                return
+
+            # Swapping a for b (same role) moves d = a - b; any 0 < d < gap narrows
+            # the pair, and d closest to gap / 2 narrows it most.
+            best = None
+            low_by_role = defaultdict(list)
+            for position, player in enumerate(squads[low]):
+                low_by_role[player['action_role']].append((player['skill_rating'], position))
+            for candidates in low_by_role.values():
+                candidates.sort()
+            for high_pos, player in enumerate(squads[high]):
+                candidates = low_by_role.get(player['action_role'])
+                if not candidates:
+                    continue
+                target = player['skill_rating'] - gap / 2
+                at = bisect.bisect_left(candidates, (target, -1))
+                for low_skill, low_pos in candidates[max(0, at - 1):at + 1]:
+                    delta = player['skill_rating'] - low_skill
+                    if 0 < delta < gap and (best is None or abs(gap / 2 - delta) < abs(gap / 2 - best[0])):
+                        best = (delta, high_pos, low_pos)
+            if best is None:
+                return
+
+            delta, high_pos, low_pos = best
+            squads[high][high_pos], squads[low][low_pos] = squads[low][low_pos], squads[high][high_pos]
+            totals[high] -= delta
+            totals[low] += delta
+
+    def _assign_roles(self, squads: List[List[Dict]]) -> None:
+        for squad in squads:
+            for player in squad:
+                player['role'] = 'NONE'
+
+        everyone = [player for squad in squads for player in squad]
+        lead_id = self.participant.team.lead_player_id
+        captain = next((p for p in everyone if p['player_id'] == lead_id), None) or next(
+            (p for p in sorted(everyone, key=lambda p: -p['skill_rating']) if p['team_role'] == 'CAPTAIN'),
+            max(everyone, key=lambda p: p['skill_rating'])
+        )
+        captain['role'] = 'CAPTAIN'
+
+        for squad in squads:
+            leader = max((p for p in squad if p is not captain), key=lambda p: p['skill_rating'], default=None)
+            if leader:
+                leader['role'] = 'LEADER'
+
+    def plan(self) -> Dict:
+        roster = self._load_roster()
+        if not roster:
+            raise BalancingError('Team has no members to balance')
+
+        roster.sort(key=lambda p: -p['skill_rating'])
+        team_size = self.tournament.get_team_size()
+        _, max_squads = self.tournament.get_squad_limits()
+        seats = min(team_size, max_squads * self.tournament.get_squad_player_cap())
+        players, bench = roster[:seats], roster[seats:]
+
+        count = self._squad_count(len(players))
+        squads = self._distribute(players, count)
+        self._refine(squads)
+        self._assign_roles(squads)
+
+        existing = set(Squad.objects.filter(participant=self.participant).values_list('squad_type', flat=True))
+        order = [value for value, _ in SquadType.choices]
+        squad_types = sorted(order, key=lambda value: (value not in existing, order.index(value)))[:count]
+
+        planned = []
+        for squad_type, squad in zip(squad_types, squads):
+            total = sum(p['skill_rating'] for p in squad)
+            planned.append({
+                'squad_type': squad_type,
+                'total_skill': total,
+                'average_skill': round(total / len(squad), 1),
+                'members': [
+                    {key: p[key] for key in ('player_id', 'username', 'skill_rating', 'role', 'action_role')}
+                    for p in squad
+                ],
+            })
+
+        averages = [squad['average_skill'] for squad in planned]
+        return {
+            'participant': self.participant.id,
+            'squads': planned,
+            'skill_spread': round(max(averages) - min(averages), 1),
+            'unassigned': [p['player_id'] for p in bench],
+        }
+
+    def apply(self, dry_run: bool = False) -> Dict:
+        plan = self.plan()
+        if dry_run:
+            return plan
+
+        with transaction.atomic():
+            TournamentParticipant.objects.select_for_update().filter(pk=self.participant.pk).first()
+
+            planned_types = [squad['squad_type'] for squad in plan['squads']]
+            existing = {squad.squad_type: squad for squad in Squad.objects.filter(participant=self.participant)}
+            Squad.objects.bulk_create([
+                Squad(participant=self.participant, squad_type=squad_type)
+                for squad_type in planned_types if squad_type not in existing
+            ])
+            squads = {squad.squad_type: squad for squad in Squad.objects.filter(participant=self.participant)}
+
+            assignments = {
+                member['player_id']: (squads[squad['squad_type']].id, member['role'], member['action_role'])
+                for squad in plan['squads'] for member in squad['members']
+            }
+
+            current = SquadMember.objects.filter(squad__participant=self.participant)
+            current.exclude(player_id__in=assignments).delete()
+            # Clear unique roles first so the bulk update cannot clash mid-statement.
+            current.exclude(role='NONE').update(role='NONE')
+
+            updated = []
+            duplicates = []
+            for member in current.only('id', 'player_id'):
+                if member.player_id not in assignments:
+                    duplicates.append(member.id)
+                    continue
+                member.squad_id, member.role, member.action_role = assignments.pop(member.player_id)
+                updated.append(member)
+            if duplicates:
+                SquadMember.objects.filter(id__in=duplicates).delete()
+            SquadMember.objects.bulk_update(updated, ['squad', 'role', 'action_role'])
+            SquadMember.objects.bulk_create([
+                SquadMember(player_id=player_id, squad_id=squad_id, role=role, action_role=action_role)
+                for player_id, (squad_id, role, action_role) in assignments.items()
+            ])
+
+            Squad.objects.filter(participant=self.participant).exclude(squad_type__in=planned_types).delete()
+            self.participant.refresh_capacity_counters()
+            invalidate_team_squad_index(self.participant.team_id)
+
+        return plan
+
 class DiscordNotifier:
-    def __init__(self, client):
+    """Fans a message out to players' Discord DMs. Recipients are loaded in
+    one query; sends run concurrently, paced by the client's rate limiter,
+    and every player gets a result: sent, skipped (no discord_id),
+    not_found, failed or rate_limited."""
+
+    def __init__(self, client, max_concurrency: Optional[int] = None, max_attempts: Optional[int] = None):
         self.client = client
-    
-    async def notify_player(self, player_id: int, message: str):
+        self.max_concurrency = max_concurrency or getattr(settings, 'DISCORD_NOTIFY_CONCURRENCY', 50)
+        self.max_attempts = max_attempts or getattr(settings, 'DISCORD_NOTIFY_MAX_ATTEMPTS', 3)
+
+    @staticmethod
+    def _load_recipients(queryset) -> Dict[int, Optional[str]]:
+        return dict(queryset.values_list('id', 'discord_id'))
+
+    @staticmethod
+    def _result(player_id: int, status: str) -> Dict:
+        return {'player_id': player_id, 'status': status, 'attempts': 0, 'error': None, 'retryable': False}
+
+    async def _send(self, semaphore, player_id: int, discord_id: str, message: str) -> Dict:
+        result = self._result(player_id, 'failed')
+        async with semaphore:
+            for attempt in range(1, self.max_attempts + 1):
+                result['attempts'] = attempt
+                try:
+                    await self.client.send_direct_message(discord_id, message)
+                except DiscordRateLimited as e:
+                    # The client has already paused the bucket; just try again.
+                    result.update(status='rate_limited', error=str(e), retryable=True)
+                except DiscordError as e:
+                    result.update(status='failed', error=str(e), retryable=e.retryable)
+                    if not e.retryable:
+                        break
+                    await asyncio.sleep(0.2 * (2 ** (attempt - 1)))
+                else:
+                    result.update(status='sent', error=None, retryable=False)
+                    break
+        return result
+
+    async def deliver_many(self, batches: List[Tuple[Dict[int, Optional[str]], str]]) -> List[List[Dict]]:
+        # One semaphore across every (recipients, message) batch.
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        sends = [
+            (index, player_id, discord_id, message)
+            for index, (recipients, message) in enumerate(batches)
+            for player_id, discord_id in recipients.items() if discord_id
+        ]
+        outcomes = await asyncio.gather(*[
+            self._send(semaphore, player_id, discord_id, message) for _, player_id, discord_id, message in sends
+        ])
+        sent = {(index, result['player_id']): result for (index, *_), result in zip(sends, outcomes)}
+        return [
+            [sent.get((index, player_id)) or self._result(player_id, 'skipped') for player_id in recipients]
+            for index, (recipients, _) in enumerate(batches)
+        ]
+
+    async def deliver(self, recipients: Dict[int, Optional[str]], message: str) -> List[Dict]:
+        return (await self.deliver_many([(recipients, message)]))[0]
+
+    async def notify_players(self, player_ids: List[int], message: str) -> List[Dict]:
         from .models import Player
-        try:
-            player = Player.objects.get(id=player_id)
-            if player.discord_id:
-                await self.client.send_direct_message(
-                    player.discord_id,
-                    message
-                )
-        except Player.DoesNotExist:
-            pass
-    
-    async def notify_team(self, team_id: int, message: str):
-        from .models import TeamMember
-        members = TeamMember.objects.filter(team_id=team_id).select_related('player')
-        for member in members:
-            await self.notify_player(member.player.id, message)
\ No newline at end of file
+        recipients = await sync_to_async(self._load_recipients)(Player.objects.filter(id__in=player_ids))
+        results = await self.deliver(recipients, message)
+        results.extend(
+            self._result(player_id, 'not_found')
+            for player_id in dict.fromkeys(player_ids) if player_id not in recipients
+        )
+        return results
+
+    async def notify_player(self, player_id: int, message: str) -> Dict:
+        return (await self.notify_players([player_id], message))[0]
+
+    async def notify_team(self, team_id: int, message: str) -> List[Dict]:
+        from .models import Player
+        recipients = await sync_to_async(self._load_recipients)(
+            Player.objects.filter(teams__team_id=team_id).order_by('id')
+        )
+        return await self.deliver(recipients, message)
+
+    async def notify_tournament(self, tournament_id: int, message: str) -> List[Dict]:
+        # A player on two participating teams is messaged once.
+        from .models import Player
+        recipients = await sync_to_async(self._load_recipients)(
+            Player.objects.filter(teams__team__tournaments__tournament_id=tournament_id).distinct().order_by('id')
+        )
+        return await self.deliver(recipients, message)
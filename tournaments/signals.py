@@ -1,10 +1,71 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.db.models import F
+from django.db import transaction
 from django.dispatch import receiver
-from .models import TournamentParticipant
+from .models import Player, Tournament, TournamentParticipant, Squad, SquadMember
+from .authentication import INVALIDATING_FIELDS, invalidate_user_snapshot
+from .leaderboard import remove_player, sync_player
+from .services import RegistrationWaitlist
+from .squad_index import invalidate_squad
 
 @receiver(post_save, sender=TournamentParticipant)
 def update_tournament_registration_count(sender, instance, created, **kwargs):
     if created:
         tournament = instance.tournament
         tournament.registered_players = tournament.participants.count()
-        tournament.save()
\ No newline at end of file
+        tournament.save()
+
+@receiver(post_delete, sender=TournamentParticipant)
+def promote_waitlist_on_withdrawal(sender, instance, **kwargs):
+    tournament_id = instance.tournament_id
+
+    def promote():
+        # The tournament itself may be what was deleted (cascade).
+        tournament = Tournament.objects.filter(pk=tournament_id).first()
+        if tournament:
+            RegistrationWaitlist(tournament).promote()
+
+    transaction.on_commit(promote)
+
+@receiver(post_save, sender=Player)
+def invalidate_cached_player_on_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or INVALIDATING_FIELDS.intersection(update_fields):
+        invalidate_user_snapshot(instance.pk)
+
+@receiver(post_delete, sender=Player)
+def invalidate_cached_player_on_delete(sender, instance, **kwargs):
+    invalidate_user_snapshot(instance.pk)
+
+@receiver(post_delete, sender=Squad)
+def release_squad_slot(sender, instance, **kwargs):
+    if instance.participant_id:
+        TournamentParticipant.objects.filter(
+            pk=instance.participant_id, squad_count__gt=0
+        ).update(squad_count=F('squad_count') - 1)
+
+@receiver(post_delete, sender=SquadMember)
+def release_squad_member_slot(sender, instance, **kwargs):
+    Squad.objects.filter(pk=instance.squad_id, member_count__gt=0).update(member_count=F('member_count') - 1)
+
+@receiver(post_save, sender=SquadMember)
+@receiver(post_delete, sender=SquadMember)
+def invalidate_squad_index(sender, instance, **kwargs):
+    invalidate_squad(instance.squad_id, SquadMember._meta.get_field('squad').get_cached_value(instance, None))
+
+@receiver(post_delete, sender=Squad)
+def invalidate_squad_index_for_squad(sender, instance, **kwargs):
+    if instance.participant_id:
+        invalidate_squad(instance.pk, instance)
+
+@receiver(post_save, sender=Player)
+def sync_leaderboard_on_save(sender, instance, created, update_fields=None, **kwargs):
+    fields = Player.LEADERBOARD_FIELDS if update_fields is None else Player.LEADERBOARD_FIELDS.intersection(update_fields)
+    loaded = instance.__dict__.get('_leaderboard_values', {})
+    saved = {name: instance.__dict__[name] for name in fields if name in instance.__dict__}
+    if created or any(name not in loaded or loaded[name] != value for name, value in saved.items()):
+        sync_player(instance.pk)
+    instance._leaderboard_values = {**loaded, **saved}
+
+@receiver(pre_delete, sender=Player)
+def remove_from_leaderboard(sender, instance, **kwargs):
+    remove_player(instance.pk)
@@ -0,0 +1,67 @@
+# tournaments/squad_index.py
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from .models import Squad, SquadMember, Team
+
+INDEX_FIELDS = ('squad_id', 'tournament_id', 'squad_type', 'role', 'action_role')
+
+
+def squad_index_cache_key(team_id):
+    return f'squad-index:team:{team_id}'
+
+
+def build_team_squad_index(team_id):
+    """{player_id: [squad placement, ...]} for every squad the team has in any
+    tournament, or None when the team does not exist."""
+    rows = SquadMember.objects.filter(squad__participant__team_id=team_id).values_list(
+        'player_id', 'squad_id', 'squad__participant__tournament_id', 'squad__squad_type', 'role', 'action_role'
+    )
+    index = {}
+    for player_id, *placement in rows:
+        index.setdefault(player_id, []).append(dict(zip(INDEX_FIELDS, placement)))
+    if not index and not Team.objects.filter(id=team_id).exists():
+        return None
+    return index
+
+
+def cache_is_shared() -> bool:
+    # Invalidation only reaches the process that made the write when the cache
+    # is per-process; other workers would serve stale squads for the whole TTL.
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+def get_team_squad_index(team_id):
+    if not cache_is_shared():
+        return build_team_squad_index(team_id)
+
+    key = squad_index_cache_key(team_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached['players']
+
+    index = build_team_squad_index(team_id)
+    cache.set(key, {'players': index}, getattr(settings, 'SQUAD_INDEX_CACHE_TTL', 300))
+    return index
+
+
+def invalidate_team_squad_index(team_id):
+    key = squad_index_cache_key(team_id)
+    cache.delete(key)
+    # A request that rebuilt the index mid-transaction may have cached rows
+    # this transaction is about to change, so drop it again once committed.
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def invalidate_squad(squad_id, squad=None):
+    # Use the squad and participant the caller already loaded before querying.
+    participant = squad and Squad._meta.get_field('participant').get_cached_value(squad, None)
+    if participant is not None:
+        team_id = participant.team_id
+    else:
+        team_id = Squad.objects.filter(pk=squad_id).values_list('participant__team_id', flat=True).first()
+    if team_id is not None:
+        invalidate_team_squad_index(team_id)
@@ -0,0 +1,150 @@
+# tournaments/stats.py
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Greatest, Round
+
+from .leaderboard import sync_players
+from .models import Player, PlayerMatchStat, TournamentMatch
+from .ratings import match_roster
+
+
+class StatsError(Exception):
+    pass
+
+
+def match_points(won: bool) -> int:
+    if won:
+        return getattr(settings, 'PLAYER_POINTS_PER_WIN', 3)
+    return getattr(settings, 'PLAYER_POINTS_PER_LOSS', 1)
+
+
+def parse_player_stats(raw) -> Dict[int, Dict[str, int]]:
+    """[{'player_id': 1, 'kills': 4, 'deaths': 2}, ...] -> {1: {'kills': 4, 'deaths': 2}}"""
+    if raw in (None, ''):
+        return {}
+    if not isinstance(raw, list):
+        raise StatsError('player_stats must be a list')
+    parsed = {}
+    for item in raw:
+        try:
+            player_id = int(item['player_id'])
+            kills, deaths = int(item.get('kills', 0)), int(item.get('deaths', 0))
+        except (KeyError, TypeError, ValueError):
+            raise StatsError('Each player_stats item needs an integer player_id, kills and deaths')
+        if kills < 0 or deaths < 0:
+            raise StatsError('kills and deaths cannot be negative')
+        parsed[player_id] = {'kills': kills, 'deaths': deaths}
+    return parsed
+
+
+def derived_columns():
+    # Written from the running totals so readers keep fetching plain columns.
+    return {
+        'kill_death_ratio': Round(Cast(F('kills'), FloatField()) / Greatest(F('deaths'), 1), 2),
+        'win_rate': Case(
+            When(matches_played=0, then=Value(0.0)),
+            default=Round(Cast(F('matches_won'), FloatField()) * 100 / F('matches_played'), 2),
+            output_field=FloatField(),
+        ),
+    }
+
+
+def _add_totals(stats: List[PlayerMatchStat]):
+    # One UPDATE adds every player's deltas; a second refreshes the ratios.
+    ids = [stat.player_id for stat in stats]
+
+    def per_player(attr):
+        return Case(
+            *[When(id=stat.player_id, then=Value(int(getattr(stat, attr)))) for stat in stats],
+            default=Value(0), output_field=IntegerField(),
+        )
+
+    Player.objects.filter(id__in=ids).update(
+        matches_played=F('matches_played') + 1,
+        matches_won=F('matches_won') + per_player('won'),
+        kills=F('kills') + per_player('kills'),
+        deaths=F('deaths') + per_player('deaths'),
+        points=F('points') + per_player('points'),
+    )
+    Player.objects.filter(id__in=ids).update(**derived_columns())
+
+
+def record_match_stats(match: TournamentMatch, player_stats: Optional[Dict[int, Dict[str, int]]] = None) -> int:
+    """Stores one PlayerMatchStat per rostered player of a completed match and
+    folds them into the players' totals. A match is only recorded once."""
+    if not (match.is_completed and match.team1_id and match.team2_id):
+        return 0
+    player_stats = player_stats or {}
+
+    rosters = {
+        team_id: match_roster(match.tournament_id, team_id)
+        for team_id in (match.team1_id, match.team2_id)
+    }
+    team_of = {player_id: team_id for team_id, players in rosters.items() for player_id in players}
+    unknown = set(player_stats) - set(team_of)
+    if unknown:
+        raise StatsError(f"Players {sorted(unknown)} were not on either roster")
+
+    stats = []
+    for player_id, team_id in team_of.items():
+        won = team_id == match.winner_id
+        line = player_stats.get(player_id, {})
+        stats.append(PlayerMatchStat(
+            match=match, player_id=player_id, team_id=team_id,
+            kills=line.get('kills', 0), deaths=line.get('deaths', 0),
+            won=won, points=match_points(won),
+        ))
+
+    with transaction.atomic():
+        # Lock the match so concurrent set_winner calls cannot both record it.
+        TournamentMatch.objects.select_for_update().filter(pk=match.pk).first()
+        if PlayerMatchStat.objects.filter(match=match).exists():
+            return 0
+        PlayerMatchStat.objects.bulk_create(stats)
+        if stats:
+            _add_totals(stats)
+            sync_players(team_of)
+    return len(stats)
+
+
+def rebuild_player_stats(chunk_size: int = 2000) -> int:
+    """Recomputes every player's match counters, K/D and win rate from
+    PlayerMatchStat, one id-range chunk at a time so no single query
+    aggregates the whole table. Points are left alone: they also include
+    points granted outside matches and from before PlayerMatchStat existed."""
+    updated = 0
+    last_id = 0
+    while True:
+        ids = list(Player.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            break
+        last_id = ids[-1]
+
+        totals = {
+            row['player_id']: row
+            for row in PlayerMatchStat.objects.filter(player_id__in=ids).values('player_id').annotate(
+                played=Count('id'),
+                won=Count('id', filter=Q(won=True)),
+                total_kills=Sum('kills'),
+                total_deaths=Sum('deaths'),
+            )
+        }
+        players = []
+        for player_id in ids:
+            row = totals.get(player_id, {})
+            players.append(Player(
+                id=player_id,
+                matches_played=row.get('played', 0),
+                matches_won=row.get('won', 0),
+                kills=row.get('total_kills') or 0,
+                deaths=row.get('total_deaths') or 0,
+            ))
+        with transaction.atomic():
+            Player.objects.bulk_update(players, ['matches_played', 'matches_won', 'kills', 'deaths'])
+            Player.objects.filter(id__in=ids).update(**derived_columns())
+        updated += len(ids)
+
+    return updated
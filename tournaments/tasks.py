@@ -1,6 +1,10 @@
 from celery import shared_task
 from django.utils import timezone
+from .bracket_jobs import run_bracket_job
+from .lifecycle import advance_lifecycles
 from .models import Player
+from .notifications import drain_outbox, send_match_reminders
+from .scrims import run_matchmaking_tick
 
 @shared_task
 def update_online_statuses():
@@ -17,4 +21,35 @@ def update_online_statuses():
     Player.objects.filter(
         is_online=False,
         last_activity__gte=threshold
-    ).update(is_online=True)
\ No newline at end of file
+    ).update(is_online=True)
+
+
+@shared_task
+def run_scrim_matchmaking():
+    # Scheduled every few seconds; each tick pairs what it can and leaves the
+    # rest for the next one with a wider window.
+    return run_matchmaking_tick()
+
+
+@shared_task
+def deliver_notifications():
+    # Safe to run on several workers at once: batches are claimed with SKIP LOCKED.
+    return drain_outbox()
+
+
+@shared_task
+def send_match_reminder_notifications():
+    # Run every few minutes; the window is wider than the schedule interval
+    # and matches are stamped when claimed, so overlapping runs are harmless.
+    return send_match_reminders()
+
+
+@shared_task
+def generate_bracket_job(job_id):
+    job = run_bracket_job(job_id)
+    return job.status if job else None
+
+
+@shared_task
+def advance_tournament_lifecycles():
+    return advance_lifecycles()
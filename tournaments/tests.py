@@ -1,6 +1,41 @@
-from django.test import TestCase
+import collections
+import itertools
+import os
+import sys
+import tempfile
+import threading
+from unittest import mock
+from http.server import ThreadingHTTPServer
+import numpy as np
+from django.db import IntegrityError
+from django.core.cache import cache
+from django.utils import timezone
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth import get_user_model
-from .models import Team, Tournament, TournamentParticipant, TournamentMatch
+from rest_framework.test import APIClient
+from .management.commands.run_provider_stub import StubHandler
+from .authentication import CachedJWTAuthentication
+from .hashing import PasswordHashingPool
+from .join_codes import ALPHABET, CODE_LENGTH, JoinCodeGenerator
+from .membership import MembershipResolver
+from .squad_index import get_team_squad_index
+from .ratings import _assign_waves, recompute_all_ratings
+from . import leaderboard
+from .leaderboard import rebuild_leaderboard
+from .stats import rebuild_player_stats
+from .seeding import SeedingService, bracket_order
+from .scrims import pair_by_rating, run_matchmaking_tick
+from .discord_client import DiscordError, FakeDiscordClient, RouteRateLimiter, TokenBucket
+from . import notifications
+from .bracket_jobs import run_bracket_job, run_queued_jobs
+from .lifecycle import advance_lifecycles
+from .query_plans import check_query_plans, hot_querysets, sequential_scans
+from .notifications import claim_batch, deliver_batch
+from .services import DiscordNotifier
+from .providers import CircuitBreaker, IdentityCache, ProviderClient, ProviderError, ProviderUnavailable, get_identity_cache, get_provider_client
+from .models import BracketGenerationJob, LeaderboardBucket, LeaderboardEntry, LeaderboardPartition, NotificationOutbox, PlayerMatchStat, ScrimMatch, ScrimQueueEntry, Squad, SquadCapacityError, SquadMember, Team, TeamMember, Tournament, TournamentParticipant, TournamentWaitlistEntry, TournamentMatch
 
 User = get_user_model()
 
@@ -64,4 +99,1702 @@ class TournamentModelTests(TestCase):
         self.assertFalse(match.is_completed)
 
 class TournamentViewTests(TestCase):
-    pass
\ No newline at end of file
+    pass
+
+class TournamentWaitlistTests(TestCase):
+    def setUp(self):
+        self.tournament = Tournament.objects.create(
+            title='Full Tournament',
+            max_players=1,
+            mode='16v16',
+            region='NA',
+            level='BRONZE',
+            platform='PC',
+            start_date='2030-01-01T00:00:00Z',
+            language='English',
+            tournament_type='Single Elimination'
+        )
+        self.leads = []
+        self.teams = []
+        for i in range(3):
+            lead = User.objects.create_user(
+                email=f'lead{i}@test.com',
+                username=f'lead{i}',
+                password='testpass123',
+                is_team_lead=True
+            )
+            self.leads.append(lead)
+            self.teams.append(Team.objects.create(name=f'Team {i}', lead_player=lead, join_code=f'WAIT{i}'))
+        self.client = APIClient()
+
+    def register(self, index):
+        self.client.force_authenticate(self.leads[index])
+        return self.client.post(
+            f'/api/tournaments/{self.tournament.id}/register/',
+            {'team_id': self.teams[index].id},
+            format='json'
+        )
+
+    def test_overflow_registrations_are_queued_in_order(self):
+        self.assertEqual(self.register(0).status_code, 201)
+
+        first = self.register(1)
+        second = self.register(2)
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(first.data['waitlist']['position'], 1)
+        self.assertEqual(second.data['waitlist']['position'], 2)
+
+        self.client.force_authenticate(self.leads[2])
+        response = self.client.get(
+            f'/api/tournaments/{self.tournament.id}/waitlist/',
+            {'team_id': self.teams[2].id}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['position'], 2)
+
+    def test_withdrawal_promotes_head_of_queue(self):
+        self.register(0)
+        self.register(1)
+        self.register(2)
+
+        participant = TournamentParticipant.objects.get(tournament=self.tournament, team=self.teams[0])
+        self.client.force_authenticate(self.leads[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/tournament-participants/{participant.id}/')
+        self.assertEqual(response.status_code, 204)
+
+        self.assertTrue(TournamentParticipant.objects.filter(tournament=self.tournament, team=self.teams[1]).exists())
+        self.assertEqual(
+            list(TournamentWaitlistEntry.objects.filter(tournament=self.tournament).values_list('team_id', flat=True)),
+            [self.teams[2].id]
+        )
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.registered_players, 1)
+
+    def test_deleting_outside_the_api_promotes(self):
+        self.register(0)
+        self.register(1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TournamentParticipant.objects.get(tournament=self.tournament, team=self.teams[0]).delete()
+
+        self.assertTrue(TournamentParticipant.objects.filter(tournament=self.tournament, team=self.teams[1]).exists())
+        self.assertFalse(TournamentWaitlistEntry.objects.filter(tournament=self.tournament).exists())
+
+    def test_raised_capacity_is_filled_on_the_lifecycle_tick(self):
+        self.register(0)
+        self.register(1)
+        self.register(2)
+        Tournament.objects.filter(pk=self.tournament.pk).update(max_players=2)
+
+        self.assertEqual(advance_lifecycles(now=timezone.now())['waitlist_promoted'], 1)
+        self.assertTrue(TournamentParticipant.objects.filter(tournament=self.tournament, team=self.teams[1]).exists())
+        self.assertEqual(
+            list(TournamentWaitlistEntry.objects.filter(tournament=self.tournament).values_list('team_id', flat=True)),
+            [self.teams[2].id]
+        )
+
+    def test_registration_seats_the_queue_before_the_newcomer(self):
+        self.register(0)
+        self.register(1)
+        Tournament.objects.filter(pk=self.tournament.pk).update(max_players=2)
+
+        response = self.register(2)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['waitlist']['position'], 1)
+        self.assertTrue(TournamentParticipant.objects.filter(tournament=self.tournament, team=self.teams[1]).exists())
+
+
+class BrokenProviderHandler(StubHandler):
+    # Token endpoint always 503s; profile endpoint answers 200 with an HTML page.
+    paths = []
+
+    def _handle(self):
+        parts, _ = self._params()
+        BrokenProviderHandler.paths.append(parts[-1])
+        if parts[-1] == 'token':
+            return self._send(503, {'error': 'stub_unavailable'})
+        body = b'<html>Bad gateway</html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+class SocialProviderClientTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.stub_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def test_signup_then_login_against_stub(self):
+        client = APIClient()
+        with override_settings(SOCIAL_PROVIDER_STUB_URL=self.stub_url):
+            signup = client.post(
+                '/api/auth/social/signup/',
+                {'provider': 'twitch', 'access_token': 'stub-twitch-abc'},
+                format='json'
+            )
+            login = client.post(
+                '/api/auth/social/login/',
+                {'provider': 'twitch', 'code': 'abc'},
+                format='json'
+            )
+
+        self.assertEqual(signup.status_code, 200)
+        self.assertEqual(login.status_code, 200)
+        self.assertEqual(login.data['user']['id'], signup.data['user']['id'])
+
+    async def test_async_signup_then_login_against_stub(self):
+        with override_settings(SOCIAL_PROVIDER_STUB_URL=self.stub_url):
+            signup = await self.async_client.post(
+                '/api/auth/social/signup/async/',
+                {'provider': 'discord', 'access_token': 'stub-discord-xyz'},
+                content_type='application/json'
+            )
+            login = await self.async_client.post(
+                '/api/auth/social/login/async/',
+                {'provider': 'discord', 'code': 'xyz'},
+                content_type='application/json'
+            )
+
+        self.assertEqual(signup.status_code, 200)
+        self.assertEqual(login.status_code, 200)
+        self.assertEqual(login.json()['user']['id'], signup.json()['user']['id'])
+
+    def test_code_exchange_is_not_retried_and_bad_bodies_are_provider_errors(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), BrokenProviderHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        BrokenProviderHandler.paths = []
+        try:
+            with override_settings(SOCIAL_PROVIDER_STUB_URL=f'http://127.0.0.1:{server.server_address[1]}'):
+                client = ProviderClient()
+                with self.assertRaises(ProviderUnavailable):
+                    client.exchange_code('facebook', 'abc')
+                with self.assertRaisesMessage(ProviderError, 'facebook returned an invalid response'):
+                    client.fetch_profile('facebook', 'token')
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(BrokenProviderHandler.paths, ['token', 'me'])
+
+    def test_circuit_breaker_opens_and_half_opens(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+        breaker.record_failure()
+        self.assertFalse(breaker.is_open)
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open)
+        self.assertTrue(breaker.allow_request())
+        breaker.record_success()
+        self.assertFalse(breaker.is_open)
+
+
+class IdentityCacheTests(TestCase):
+    def test_lru_eviction_and_counters(self):
+        cache = IdentityCache(max_size=2, ttl=60)
+        cache.set('discord', 'a', {'id': '1'})
+        cache.set('discord', 'b', {'id': '2'})
+        self.assertEqual(cache.get('discord', 'a'), {'id': '1'})
+        cache.set('discord', 'c', {'id': '3'})
+
+        self.assertIsNone(cache.get('discord', 'b'))
+        self.assertIsNone(cache.get('twitch', 'a'))
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (1, 2, 1))
+
+    def test_expired_entries_miss(self):
+        cache = IdentityCache(max_size=2, ttl=0)
+        cache.set('facebook', 'a', {'id': '1'})
+        self.assertIsNone(cache.get('facebook', 'a'))
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_warm_token_skips_provider_call(self):
+        cache = get_identity_cache()
+        cache.set('discord', 'warm-token', {'id': '42'})
+        # Unroutable stub: a cold lookup would fail, the warm one never leaves the process.
+        with override_settings(SOCIAL_PROVIDER_STUB_URL='http://127.0.0.1:9'):
+            profile = get_provider_client().verify_token('discord', 'warm-token')
+        self.assertEqual(profile, {'id': '42'})
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.player = User.objects.create_user(
+            email='cached@test.com',
+            username='cached',
+            password='testpass123'
+        )
+        self.token = AccessToken.for_user(self.player)
+        self.auth = CachedJWTAuthentication()
+
+    def test_second_lookup_skips_database(self):
+        with self.assertNumQueries(1):
+            self.auth.get_user(self.token)
+        with self.assertNumQueries(0):
+            user = self.auth.get_user(self.token)
+        self.assertEqual(user.pk, self.player.pk)
+        self.assertFalse(user.is_admin)
+
+    def test_permission_change_invalidates_snapshot(self):
+        self.auth.get_user(self.token)
+        self.player.is_admin = True
+        self.player.save()
+        self.assertTrue(self.auth.get_user(self.token).is_admin)
+
+    def test_saving_snapshot_keeps_newer_columns(self):
+        user = self.auth.get_user(self.token)
+        User.objects.filter(pk=self.player.pk).update(tier='GOLD', is_online=True)
+        user.country_code = 'GB'
+        user.save()
+        self.player.refresh_from_db()
+        self.assertEqual((self.player.tier, self.player.is_online, self.player.country_code), ('GOLD', True, 'GB'))
+
+    def test_saving_snapshot_bumps_last_activity(self):
+        user = self.auth.get_user(self.token)
+        earlier = timezone.now() - timezone.timedelta(hours=1)
+        User.objects.filter(pk=self.player.pk).update(last_activity=earlier)
+        user.country_code = 'GB'
+        user.save()
+        self.player.refresh_from_db()
+        self.assertGreater(self.player.last_activity, earlier + timezone.timedelta(minutes=59))
+
+    def test_activity_update_keeps_snapshot(self):
+        self.auth.get_user(self.token)
+        self.player.save(update_fields=['last_activity', 'last_login_ip'])
+        with self.assertNumQueries(0):
+            self.auth.get_user(self.token)
+
+
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=1000):
+            self.player = User.objects.create_user(
+                email='hash@test.com',
+                username='hash',
+                password='testpass123'
+            )
+        self.client = APIClient()
+
+    def test_login_rehashes_with_current_iterations(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            response = self.client.post(
+                '/api/auth/login/',
+                {'email': 'hash@test.com', 'password': 'testpass123'},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('hash;dur=', response['Server-Timing'])
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.password.split('$')[1], '2000')
+
+    def test_wrong_password_is_rejected(self):
+        from django.contrib.auth.signals import user_login_failed
+        failures = []
+        user_login_failed.connect(
+            lambda sender, credentials, **kwargs: failures.append(credentials['email']),
+            weak=False, dispatch_uid='test-login-failed',
+        )
+        try:
+            response = self.client.post(
+                '/api/auth/login/',
+                {'email': 'hash@test.com', 'password': 'wrong'},
+                format='json'
+            )
+        finally:
+            user_login_failed.disconnect(dispatch_uid='test-login-failed')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(failures, ['hash@test.com'])
+
+    def test_full_pool_sheds_logins_with_503(self):
+        with mock.patch('tournaments.hashing._pool', PasswordHashingPool(workers=1, max_pending=0)):
+            response = self.client.post(
+                '/api/auth/login/',
+                {'email': 'hash@test.com', 'password': 'testpass123'},
+                format='json'
+            )
+        self.assertEqual(response.status_code, 503)
+
+    def test_full_queue_sheds_with_503(self):
+        with mock.patch('tournaments.hashing._pool', PasswordHashingPool(workers=1, max_pending=0)):
+            response = self.client.post(
+                '/api/auth/register/',
+                {'email': 'new@test.com', 'username': 'new', 'password': 'pw', 'confirm_password': 'pw'},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(User.objects.filter(email='new@test.com').exists())
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000, PLAYER_IMPORT_HASH_ITERATIONS=1000)
+class PlayerImportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@test.com',
+            username='admin',
+            password='testpass123',
+            is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_csv_import_reports_rejected_rows(self):
+        rows = '\n'.join([
+            'email,username,password,tier,country_code',
+            'one@league.com,one,secret-one,gold,US',
+            'two@league.com,two,,silver,de',
+            'one@league.com,dupe,secret,gold,us',
+            'ADMIN@test.com,taken,secret,gold,us',
+            'not-an-email,bad,secret,gold,us',
+            'three@league.com,three,secret,mythic,us',
+        ])
+        upload = SimpleUploadedFile('players.csv', rows.encode(), content_type='text/csv')
+        response = self.client.post('/api/players/import/', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(
+            [(item['row'], item['reason']) for item in response.data['rejected']],
+            [
+                (4, 'duplicate email in file'),
+                (5, 'email already registered'),
+                (6, 'email is invalid'),
+                (7, 'tier must be one of BRONZE, DIAMOND, GOLD, PLATINUM, SILVER'),
+            ]
+        )
+        one = User.objects.get(email='one@league.com')
+        self.assertTrue(one.check_password('secret-one'))
+        self.assertEqual((one.tier, one.country_code), ('GOLD', 'US'))
+        self.assertFalse(User.objects.get(email='two@league.com').has_usable_password())
+
+    def test_undecodable_file_is_a_400(self):
+        upload = SimpleUploadedFile('players.csv', 'email,username\nzoë@b.com,z\n'.encode('latin-1'), content_type='text/csv')
+        response = self.client.post('/api/players/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'file must be UTF-8 encoded'})
+
+    def test_import_hashes_on_the_shared_pool(self):
+        upload = SimpleUploadedFile('players.csv', b'email,username,password\na@b.com,a,pw\n', content_type='text/csv')
+        with mock.patch('tournaments.hashing._pool', PasswordHashingPool(workers=1, max_pending=0)):
+            response = self.client.post('/api/players/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(User.objects.filter(email='a@b.com').exists())
+
+    def test_rows_taken_after_the_check_are_rejected_not_500(self):
+        rows = 'email,username,password\nfresh@league.com,fresh,pw\nadmin@test.com,racer,pw\n'
+        upload = SimpleUploadedFile('players.csv', rows.encode(), content_type='text/csv')
+        # As if another import registered admin@test.com between the check and the insert.
+        with mock.patch('tournaments.importer.PlayerImporter._existing', return_value=set()):
+            response = self.client.post('/api/players/import/', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['rejected'], [
+            {'row': 3, 'email': 'admin@test.com', 'reason': 'email or username already taken'}
+        ])
+        self.assertTrue(User.objects.filter(email='fresh@league.com').exists())
+
+    @override_settings(PLAYER_IMPORT_MAX_ROWS=1)
+    def test_large_files_are_refused(self):
+        upload = SimpleUploadedFile('players.csv', b'email,username\na@b.com,a\nc@d.com,c\n', content_type='text/csv')
+        response = self.client.post('/api/players/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(User.objects.filter(email='a@b.com').exists())
+
+    def test_import_requires_admin(self):
+        self.client.force_authenticate(User.objects.create_user(
+            email='member@test.com', username='member', password='testpass123'
+        ))
+        upload = SimpleUploadedFile('players.ndjson', b'{"email": "x@y.com", "username": "x"}\n')
+        response = self.client.post('/api/players/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 403)
+
+
+
+class JoinCodeTests(TestCase):
+    def test_generated_codes_are_unique_and_well_formed(self):
+        generator = JoinCodeGenerator(b'test-key', itertools.count(1).__next__)
+        codes = [generator.generate() for _ in range(20000)]
+
+        self.assertEqual(len(set(codes)), len(codes))
+        for code in codes[:100]:
+            self.assertEqual(len(code), CODE_LENGTH)
+            self.assertTrue(set(code) <= set(ALPHABET))
+
+    def test_workers_draw_from_one_database_sequence(self):
+        # Two generators stand in for two forked workers with identical state.
+        first, second = JoinCodeGenerator(b'test-key'), JoinCodeGenerator(b'test-key')
+        codes = [first.generate() for _ in range(50)] + [second.generate() for _ in range(50)]
+        self.assertEqual(len(set(codes)), 100)
+
+    def test_taken_code_is_replaced_on_create(self):
+        lead = User.objects.create_user(email='dup@test.com', username='dup', password='testpass123')
+        taken = Team.objects.create(name='First', lead_player=lead)
+        team = Team.objects.create(name='Second', lead_player=User.objects.create_user(
+            email='dup2@test.com', username='dup2', password='testpass123'
+        ), join_code=taken.join_code.lower())
+        self.assertNotEqual(team.join_code, taken.join_code)
+        self.assertEqual(Team.objects.filter(join_code=team.join_code).count(), 1)
+
+    def test_team_default_and_case_insensitive_join(self):
+        lead = User.objects.create_user(
+            email='lead@test.com', username='lead', password='testpass123', is_team_lead=True
+        )
+        member = User.objects.create_user(email='member@test.com', username='member', password='testpass123')
+        team = Team.objects.create(name='Generated', lead_player=lead)
+        other = Team.objects.create(name='Other', lead_player=User.objects.create_user(
+            email='lead2@test.com', username='lead2', password='testpass123', is_team_lead=True
+        ))
+        self.assertNotEqual(team.join_code, other.join_code)
+
+        client = APIClient()
+        client.force_authenticate(member)
+        response = client.post('/api/team/join/', {'join_code': f' {team.join_code.lower()} '})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertTrue(team.members.filter(player=member).exists())
+
+
+class MembershipResolverTests(TestCase):
+    def setUp(self):
+        self.lead = User.objects.create_user(
+            email='lead@test.com', username='lead', password='testpass123', is_team_lead=True
+        )
+        self.other_lead = User.objects.create_user(
+            email='other@test.com', username='other', password='testpass123', is_team_lead=True
+        )
+        self.member = User.objects.create_user(email='member@test.com', username='member', password='testpass123')
+        self.team = Team.objects.create(name='Led', lead_player=self.lead)
+        self.other = Team.objects.create(name='Other', lead_player=self.other_lead)
+        TeamMember.objects.create(team=self.team, player=self.lead, role='CAPTAIN')
+        TeamMember.objects.create(team=self.other, player=self.lead, role='MEMBER')
+        TeamMember.objects.create(team=self.other, player=self.member, role='CO_LEAD')
+
+    def test_single_query_resolves_roles_and_leads(self):
+        resolver = MembershipResolver(self.lead)
+        with self.assertNumQueries(1):
+            self.assertEqual(resolver.team_ids, {self.team.id, self.other.id})
+            self.assertEqual(resolver.led_team_ids, {self.team.id})
+            self.assertEqual(resolver.role(self.other.id), 'MEMBER')
+            self.assertTrue(resolver.leads(str(self.team.id)))
+            self.assertFalse(resolver.leads(self.other.id))
+            self.assertEqual(resolver.team_ids_with_role('CAPTAIN', 'CO_LEAD'), {self.team.id})
+
+    def test_views_share_one_resolver_per_request(self):
+        client = APIClient()
+        client.force_authenticate(self.member)
+        response = client.get('/api/teams/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([team['id'] for team in response.data], [self.other.id])
+
+        response = client.get(f'/api/teams/{self.other.id}/members/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+        response = client.patch(f'/api/teams/{self.other.id}/', {'name': 'Renamed'})
+        self.assertEqual(response.status_code, 403)
+
+
+class BulkTeamMemberTests(TestCase):
+    def setUp(self):
+        self.lead = User.objects.create_user(
+            email='lead@test.com', username='lead', password='testpass123', is_team_lead=True
+        )
+        self.team = Team.objects.create(name='Roster', lead_player=self.lead)
+        TeamMember.objects.create(team=self.team, player=self.lead, role='CAPTAIN')
+        self.players = [
+            User.objects.create_user(email=f'p{i}@test.com', username=f'p{i}', password='testpass123')
+            for i in range(3)
+        ]
+        TeamMember.objects.create(team=self.team, player=self.players[0])
+        self.client = APIClient()
+        self.client.force_authenticate(self.lead)
+
+    def test_bulk_add_reports_each_item(self):
+        response = self.client.post(f'/api/teams/{self.team.id}/members/bulk/', {
+            'emails': ['p0@test.com', 'p1@test.com', 'missing@test.com'],
+            'player_ids': [self.players[2].id, self.players[1].id, 999999],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['added'], 2)
+        self.assertEqual(
+            [item['status'] for item in response.data['results']],
+            ['already_member', 'added', 'not_found', 'added', 'duplicate', 'not_found']
+        )
+        self.assertEqual(self.team.members.count(), 4)
+
+    def test_rows_added_concurrently_are_not_counted(self):
+        create = TeamMember.objects.create
+
+        def racing_create(**kwargs):
+            if kwargs['player_id'] == self.players[1].id:
+                raise IntegrityError('UNIQUE constraint failed')
+            return create(**kwargs)
+
+        # p1 joins by code between our membership check and the insert.
+        with mock.patch.object(TeamMember.objects, 'bulk_create', side_effect=IntegrityError('UNIQUE constraint failed')), \
+                mock.patch.object(TeamMember.objects, 'create', side_effect=racing_create):
+            response = self.client.post(f'/api/teams/{self.team.id}/members/bulk/', {
+                'player_ids': [self.players[1].id, self.players[2].id],
+            }, format='json')
+
+        self.assertEqual(response.data['added'], 1)
+        self.assertEqual([item['status'] for item in response.data['results']], ['already_member', 'added'])
+
+    def test_bulk_add_requires_team_lead(self):
+        self.client.force_authenticate(self.players[0])
+        response = self.client.post(f'/api/teams/{self.team.id}/members/bulk/', {
+            'emails': ['p1@test.com'],
+        }, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class SquadBalancerTests(TestCase):
+    def setUp(self):
+        self.lead = User.objects.create_user(
+            email='lead@test.com', username='lead', password='testpass123',
+            is_team_lead=True, skill_rating=1500, preferred_roles=['infantry']
+        )
+        self.team = Team.objects.create(name='Balanced', lead_player=self.lead)
+        TeamMember.objects.create(team=self.team, player=self.lead, role='CAPTAIN')
+        roles = ['INFANTRY', 'INFANTRY', 'ARMOR', 'HELI', 'JET']
+        for i in range(15):
+            player = User.objects.create_user(
+                email=f'p{i}@test.com', username=f'p{i}', password='testpass123',
+                skill_rating=900 + i * 37 % 500, preferred_roles=[roles[i % len(roles)]]
+            )
+            TeamMember.objects.create(team=self.team, player=player)
+        self.tournament = Tournament.objects.create(
+            title='Balance Cup', max_players=8, mode='16v16', region='NA', level='BRONZE',
+            platform='PC', start_date='2030-01-01T00:00:00Z', language='English',
+            tournament_type='Single Elimination'
+        )
+        self.participant = TournamentParticipant.objects.create(tournament=self.tournament, team=self.team)
+        self.client = APIClient()
+        self.client.force_authenticate(self.lead)
+
+    def test_dry_run_returns_plan_without_writing(self):
+        response = self.client.post(
+            f'/api/tournament-participants/{self.participant.id}/auto_balance/', {'dry_run': True}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        squads = response.data['squads']
+        self.assertEqual(len(squads), 2)
+        self.assertEqual([len(squad['members']) for squad in squads], [8, 8])
+        self.assertLessEqual(response.data['skill_spread'], 25)
+        self.assertEqual(Squad.objects.count(), 0)
+
+    def test_apply_creates_squads_with_one_leader_each_and_one_captain(self):
+        existing = Squad.objects.create(participant=self.participant, squad_type='ALPHA')
+        SquadMember.objects.create(squad=existing, player=self.lead, role='LEADER')
+
+        response = self.client.post(f'/api/tournament-participants/{self.participant.id}/auto_balance/')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        self.assertEqual(SquadMember.objects.filter(squad__participant=self.participant).count(), 16)
+        self.assertEqual(SquadMember.objects.filter(role='CAPTAIN').get().player, self.lead)
+        self.participant.refresh_from_db()
+        self.assertEqual(self.participant.squad_count, 2)
+        for squad in Squad.objects.filter(participant=self.participant):
+            self.assertEqual(squad.members.filter(role='LEADER').count(), 1)
+            roles = set(squad.members.values_list('action_role', flat=True))
+            self.assertTrue({'INFANTRY', 'ARMOR', 'HELI', 'JET'} <= roles)
+            self.assertEqual(squad.member_count, 8)
+
+
+class AssignRolesTests(TestCase):
+    def setUp(self):
+        self.lead = User.objects.create_user(
+            email='lead@test.com', username='lead', password='testpass123', is_team_lead=True
+        )
+        self.player = User.objects.create_user(email='player@test.com', username='player', password='testpass123')
+        self.other_lead = User.objects.create_user(
+            email='other@test.com', username='other', password='testpass123', is_team_lead=True
+        )
+        self.team = Team.objects.create(name='Main', lead_player=self.lead)
+        self.second_team = Team.objects.create(name='Second', lead_player=self.other_lead)
+        TeamMember.objects.create(team=self.team, player=self.player)
+        TeamMember.objects.create(team=self.second_team, player=self.player)
+        self.tournament = Tournament.objects.create(
+            title='Roles Cup', max_players=8, mode='16v16', region='NA', level='BRONZE',
+            platform='PC', start_date='2030-01-01T00:00:00Z', language='English',
+            tournament_type='Single Elimination'
+        )
+        self.participant = TournamentParticipant.objects.create(tournament=self.tournament, team=self.team)
+        self.other_participant = TournamentParticipant.objects.create(tournament=self.tournament, team=self.second_team)
+        self.squad = Squad.objects.create(participant=self.participant, squad_type='ALPHA')
+        self.other_squad = Squad.objects.create(participant=self.other_participant, squad_type='ALPHA')
+        self.current_leader = SquadMember.objects.create(squad=self.squad, player=self.lead, role='LEADER')
+        self.untouched = SquadMember.objects.create(squad=self.other_squad, player=self.player, role='NONE')
+        self.client = APIClient()
+        self.client.force_authenticate(self.player)
+
+    def test_multi_team_player_must_scope_the_request(self):
+        response = self.client.post('/api/assign-roles/', {'action_role': 'armor'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_promotion_demotes_holder_within_scope_only(self):
+        response = self.client.post('/api/assign-roles/', {
+            'team_id': self.team.id, 'tournament_id': self.tournament.id,
+            'is_squad_lead': True, 'action_role': 'armor',
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        self.current_leader.refresh_from_db()
+        self.untouched.refresh_from_db()
+        self.assertEqual(self.current_leader.role, 'NONE')
+        promoted = SquadMember.objects.get(squad=self.squad, player=self.player)
+        self.assertEqual((promoted.role, promoted.action_role), ('LEADER', 'ARMOR'))
+        self.assertEqual((self.untouched.role, self.untouched.action_role), ('NONE', 'INFANTRY'))
+
+
+class SquadCapacityTests(TestCase):
+    def setUp(self):
+        self.lead = User.objects.create_user(
+            email='lead@test.com', username='lead', password='testpass123', is_team_lead=True
+        )
+        self.team = Team.objects.create(name='Capped', lead_player=self.lead)
+        self.tournament = Tournament.objects.create(
+            title='Cap Cup', max_players=8, mode='16v16', region='NA', level='BRONZE',
+            platform='PC', start_date='2030-01-01T00:00:00Z', language='English',
+            tournament_type='Single Elimination'
+        )
+        self.participant = TournamentParticipant.objects.create(tournament=self.tournament, team=self.team)
+        self.client = APIClient()
+        self.client.force_authenticate(self.lead)
+
+    def test_squad_limit_is_enforced_from_the_counter(self):
+        for squad_type in ['ALPHA', 'BRAVO', 'CHARLIE', 'DELTA']:
+            response = self.client.post('/api/squads/', {'participant': self.participant.id, 'squad_type': squad_type})
+            self.assertEqual(response.status_code, 201, response.data)
+
+        response = self.client.post('/api/squads/', {'participant': self.participant.id, 'squad_type': 'ECHO'})
+        self.assertEqual(response.status_code, 400)
+        self.participant.refresh_from_db()
+        self.assertEqual(self.participant.squad_count, 4)
+
+        Squad.objects.get(participant=self.participant, squad_type='ALPHA').delete()
+        self.participant.refresh_from_db()
+        self.assertEqual(self.participant.squad_count, 3)
+        self.assertTrue(self.tournament.can_create_more_squads(self.participant))
+
+    def test_squad_player_cap_per_mode(self):
+        squad = Squad.objects.create(participant=self.participant, squad_type='ALPHA')
+        players = [
+            User.objects.create_user(email=f'p{i}@test.com', username=f'p{i}', password='testpass123')
+            for i in range(9)
+        ]
+        members = [SquadMember.objects.create(squad=squad, player=player) for player in players[:8]]
+        with self.assertRaises(SquadCapacityError):
+            SquadMember.objects.create(squad=squad, player=players[8])
+
+        members[0].delete()
+        SquadMember.objects.create(squad=squad, player=players[8])
+        squad.refresh_from_db()
+        self.assertEqual(squad.member_count, 8)
+
+
+class UserSquadStatusTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.lead = User.objects.create_user(
+            email='lead@test.com', username='lead', password='testpass123', is_team_lead=True
+        )
+        self.player = User.objects.create_user(email='player@test.com', username='player', password='testpass123')
+        self.team = Team.objects.create(name='Indexed', lead_player=self.lead)
+        self.tournament = Tournament.objects.create(
+            title='Index Cup', max_players=8, mode='16v16', region='NA', level='BRONZE',
+            platform='PC', start_date='2030-01-01T00:00:00Z', language='English',
+            tournament_type='Single Elimination'
+        )
+        participant = TournamentParticipant.objects.create(tournament=self.tournament, team=self.team)
+        self.squad = Squad.objects.create(participant=participant, squad_type='BRAVO')
+        self.client = APIClient()
+        self.client.force_authenticate(self.player)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'levelgg-test-cache'),
+    }})
+    def test_status_is_cached_and_invalidated_by_squad_member_writes(self):
+        cache.clear()
+        url = f'/api/user-squad-status/?team_id={self.team.id}'
+        self.assertEqual(self.client.get(url).data, {'in_squad': False, 'squads': []})
+
+        member = SquadMember.objects.create(squad=self.squad, player=self.player, role='LEADER', action_role='JET')
+        response = self.client.get(url)
+        self.assertTrue(response.data['in_squad'])
+        with self.assertNumQueries(0):
+            get_team_squad_index(self.team.id)
+        self.assertEqual(response.data['squads'], [{
+            'squad_id': self.squad.id, 'tournament_id': self.tournament.id,
+            'squad_type': 'BRAVO', 'role': 'LEADER', 'action_role': 'JET',
+        }])
+
+        member.delete()
+        self.assertFalse(self.client.get(url).data['in_squad'])
+
+    def test_unknown_team(self):
+        self.assertEqual(self.client.get('/api/user-squad-status/?team_id=999999').status_code, 404)
+
+    def test_process_local_cache_is_bypassed(self):
+        get_team_squad_index(self.team.id)
+        SquadMember.objects.filter(squad=self.squad).delete()
+        # Another worker's write: no signal reached this process's cache.
+        Squad.objects.filter(pk=self.squad.pk).update(member_count=0)
+        SquadMember.objects.bulk_create([SquadMember(squad=self.squad, player=self.player)])
+        self.assertIn(self.player.pk, get_team_squad_index(self.team.id))
+
+
+class SkillRatingTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@test.com', username='admin', password='testpass123', is_admin=True, is_staff=True
+        )
+        self.teams = []
+        for i in range(3):
+            lead = User.objects.create_user(
+                email=f'lead{i}@test.com', username=f'lead{i}', password='testpass123', is_team_lead=True
+            )
+            team = Team.objects.create(name=f'Rated {i}', lead_player=lead)
+            TeamMember.objects.create(team=team, player=lead, role='CAPTAIN')
+            self.teams.append(team)
+        self.tournament = Tournament.objects.create(
+            title='Rated Cup', max_players=8, mode='16v16', region='NA', level='BRONZE',
+            platform='PC', start_date='2030-01-01T00:00:00Z', language='English',
+            tournament_type='Single Elimination'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _play(self, number, team1, team2, winner):
+        match = TournamentMatch.objects.create(
+            tournament=self.tournament, round_number=1, match_number=number, team1=team1, team2=team2
+        )
+        response = self.client.post(f'/api/tournament-matches/{match.id}/set_winner/', {'winner_id': winner.id})
+        self.assertEqual(response.status_code, 200, response.data)
+        return match
+
+    def test_set_winner_updates_ratings_once(self):
+        first, second = self.teams[0], self.teams[1]
+        match = self._play(1, first, second, first)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertAlmostEqual(first.skill_rating, 1016.0)
+        self.assertAlmostEqual(second.skill_rating, 984.0)
+        self.assertEqual(User.objects.get(pk=first.lead_player_id).skill_rating, 1016)
+
+        self.client.post(f'/api/tournament-matches/{match.id}/set_winner/', {'winner_id': first.id})
+        first.refresh_from_db()
+        self.assertAlmostEqual(first.skill_rating, 1016.0)
+
+    def test_recompute_matches_incremental_updates(self):
+        a, b, c = self.teams
+        self._play(1, a, b, a)
+        self._play(2, b, c, c)
+        self._play(3, a, c, c)
+        incremental = {team.id: Team.objects.get(pk=team.pk).skill_rating for team in self.teams}
+
+        Team.objects.update(skill_rating=1000.0)
+        result = recompute_all_ratings()
+
+        self.assertEqual(result['matches'], 3)
+        for team in self.teams:
+            self.assertAlmostEqual(Team.objects.get(pk=team.pk).skill_rating, incremental[team.id])
+
+
+    def test_recompute_keeps_each_players_match_order(self):
+        a, b, c = self.teams
+        d = Team.objects.create(name='Rated 3', lead_player=User.objects.create_user(
+            email='lead3@test.com', username='lead3', password='testpass123', is_team_lead=True
+        ))
+        # Plays for a and c: both matches land in one team wave but must stay sequential for them.
+        both = User.objects.create_user(email='both@test.com', username='both', password='testpass123')
+        TeamMember.objects.create(team=a, player=both)
+        TeamMember.objects.create(team=c, player=both)
+        self._play(1, a, b, a)
+        self._play(2, c, d, c)
+        players = User.objects.order_by('id')
+        incremental = list(players.values_list('id', 'skill_rating'))
+        self.assertEqual(User.objects.get(pk=both.pk).skill_rating, 1031)
+
+        User.objects.update(skill_rating=1000)
+        result = recompute_all_ratings()
+
+        self.assertEqual(result['waves'], 2)
+        self.assertEqual(list(players.values_list('id', 'skill_rating')), incremental)
+
+    def test_waves_match_one_by_one_assignment(self):
+        rng = np.random.default_rng(7)
+        n, n_teams, n_players = 300, 8, 40
+        team1 = rng.integers(0, n_teams, n)
+        team2 = (team1 + rng.integers(1, n_teams, n)) % n_teams
+        # One roster per team, a few players moved onto a second team's roster.
+        rosters = [list(range(team * 5, team * 5 + 5)) for team in range(n_teams)]
+        for player in rng.choice(n_players, 6, replace=False):
+            rosters[(player // 5 + 1) % n_teams].append(int(player))
+        roster_ptr = np.cumsum([0] + [len(roster) for roster in rosters])
+        roster_players = np.array([player for roster in rosters for player in roster])
+
+        last_team, last_player, expected = [0] * n_teams, [0] * n_players, []
+        for a, b in zip(team1.tolist(), team2.tolist()):
+            members = rosters[a] + rosters[b]
+            wave = max([last_team[a], last_team[b]] + [last_player[p] for p in members]) + 1
+            last_team[a] = last_team[b] = wave
+            for p in members:
+                last_player[p] = wave
+            expected.append(wave)
+
+        waves = _assign_waves(team1, team2, n_teams, (team1, team2, roster_ptr, roster_players), n_players)
+        self.assertEqual(waves.tolist(), expected)
+
+    def test_completing_a_match_through_update_rates_it(self):
+        a, b, _ = self.teams
+        match = TournamentMatch.objects.create(
+            tournament=self.tournament, round_number=1, match_number=1, team1=a, team2=b
+        )
+        response = self.client.patch(
+            f'/api/tournament-matches/{match.id}/', {'winner_id': a.id, 'is_completed': True}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        match.refresh_from_db()
+        self.assertTrue(match.rated)
+        self.assertIsNotNone(match.completed_at)
+        self.assertAlmostEqual(Team.objects.get(pk=a.pk).skill_rating, 1016.0)
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.players = [
+            User.objects.create_user(
+                email=f'p{i}@test.com', username=f'p{i}', password='testpass123',
+                tier=['GOLD', 'SILVER'][i % 2], country_code=['us', 'de', None][i % 3]
+            )
+            for i in range(12)
+        ]
+
+    def assertRanksConsistent(self):
+        players = {player.id: player for player in User.objects.all()}
+        expected = {}
+        for player in sorted(players.values(), key=lambda p: (-p.points, p.id)):
+            keys = ['global', f'tier:{player.tier}'] + ([f'country:{player.country_code}'] if player.country_code else [])
+            for key in keys:
+                expected.setdefault(key, []).append((player.id, player.points))
+        actual = {}
+        for key, player_id, points in LeaderboardEntry.objects.order_by('-points', 'player_id').values_list(
+            'partition__key', 'player_id', 'points'
+        ):
+            actual.setdefault(key, []).append((player_id, points))
+        self.assertEqual(actual, expected)
+
+        histograms = {}
+        for key, points, count in LeaderboardBucket.objects.exclude(count=0).values_list(
+            'partition__key', 'points', 'count'
+        ):
+            histograms.setdefault(key, {})[points] = count
+        self.assertEqual(histograms, {
+            key: dict(collections.Counter(points for _, points in rows)) for key, rows in expected.items()
+        })
+        sizes = dict(LeaderboardPartition.objects.exclude(size=0).values_list('key', 'size'))
+        self.assertEqual(sizes, {key: len(rows) for key, rows in expected.items()})
+        for key, rows in expected.items():
+            partition_id = LeaderboardPartition.objects.get(key=key).id
+            for rank, (player_id, points) in enumerate(rows, start=1):
+                self.assertEqual(leaderboard.rank_of(partition_id, player_id, points), rank)
+
+    def test_incremental_updates_keep_dense_ordered_ranks(self):
+        import random
+        rng = random.Random(7)
+        for _ in range(60):
+            player = rng.choice(self.players)
+            player.points = rng.randint(0, 20)
+            if rng.random() < 0.15:
+                player.tier = rng.choice(['GOLD', 'SILVER', 'BRONZE'])
+                player.country_code = rng.choice(['us', 'de', None])
+            player.save(update_fields=['points', 'tier', 'country_code'])
+        self.assertRanksConsistent()
+
+        self.players[3].delete()
+        self.assertRanksConsistent()
+
+        rebuild_leaderboard()
+        self.assertRanksConsistent()
+
+    def test_unrelated_saves_skip_the_leaderboard(self):
+        player = User.objects.get(pk=self.players[0].pk)
+        player.first_name = 'Renamed'
+        with self.assertNumQueries(1):
+            player.save()
+        player.points = 5
+        player.save()
+        self.assertEqual(leaderboard.around('global', player.pk, 0)['entries'][0]['points'], 5)
+
+    def test_top_and_around_me_endpoints(self):
+        for i, player in enumerate(self.players):
+            player.points = i * 10
+            player.save(update_fields=['points'])
+
+        client = APIClient()
+        response = client.get('/api/leaderboard/?limit=3')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 12)
+        self.assertEqual([entry['username'] for entry in response.data['entries']], ['p11', 'p10', 'p9'])
+
+        first = client.get('/api/leaderboard/?scope=tier&value=gold&limit=1')
+        response = client.get(f"/api/leaderboard/?scope=tier&value=gold&limit=2&after={first.data['next']}")
+        self.assertEqual([entry['rank'] for entry in response.data['entries']], [2, 3])
+        self.assertEqual([entry['username'] for entry in response.data['entries']], ['p8', 'p6'])
+        self.assertEqual(response.data['total'], 6)
+        self.assertEqual(client.get('/api/leaderboard/?after=10').status_code, 400)
+
+        client.force_authenticate(self.players[4])
+        response = client.get('/api/leaderboard/me/?radius=1')
+        self.assertEqual(response.data['rank'], 8)
+        self.assertEqual([entry['username'] for entry in response.data['entries']], ['p5', 'p4', 'p3'])
+
+        response = client.get('/api/leaderboard/me/?scope=country')
+        self.assertEqual(response.data['partition'], 'country:de')
+
+
+class PlayerStatsTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@test.com', username='admin', password='testpass123', is_admin=True, is_staff=True
+        )
+        self.teams, self.members = [], []
+        for i in range(2):
+            lead = User.objects.create_user(
+                email=f'lead{i}@test.com', username=f'lead{i}', password='testpass123', is_team_lead=True
+            )
+            member = User.objects.create_user(email=f'm{i}@test.com', username=f'm{i}', password='testpass123')
+            team = Team.objects.create(name=f'Stats {i}', lead_player=lead)
+            TeamMember.objects.create(team=team, player=lead, role='CAPTAIN')
+            TeamMember.objects.create(team=team, player=member, role='MEMBER')
+            self.teams.append(team)
+            self.members.append((lead, member))
+        self.tournament = Tournament.objects.create(
+            title='Stats Cup', max_players=8, mode='16v16', region='NA', level='BRONZE',
+            platform='PC', start_date='2030-01-01T00:00:00Z', language='English',
+            tournament_type='Single Elimination'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _play(self, number, winner, player_stats):
+        match = TournamentMatch.objects.create(
+            tournament=self.tournament, round_number=1, match_number=number,
+            team1=self.teams[0], team2=self.teams[1]
+        )
+        return match, self.client.post(
+            f'/api/tournament-matches/{match.id}/set_winner/',
+            {'winner_id': winner.id, 'player_stats': player_stats}, format='json'
+        )
+
+    def test_set_winner_records_stats_and_derived_columns(self):
+        (lead0, member0), (lead1, member1) = self.members
+        match, response = self._play(1, self.teams[0], [
+            {'player_id': lead0.id, 'kills': 10, 'deaths': 4},
+            {'player_id': lead1.id, 'kills': 3, 'deaths': 0},
+        ])
+        self.assertEqual(response.status_code, 200, response.data)
+        self._play(2, self.teams[1], [{'player_id': lead0.id, 'kills': 2, 'deaths': 6}])
+
+        self.assertEqual(PlayerMatchStat.objects.filter(match=match).count(), 4)
+        lead0.refresh_from_db()
+        self.assertEqual((lead0.matches_played, lead0.matches_won, lead0.kills, lead0.deaths), (2, 1, 12, 10))
+        self.assertEqual(lead0.kill_death_ratio, 1.2)
+        self.assertEqual(lead0.win_rate, 50.0)
+        self.assertEqual(lead0.points, 4)
+        lead1.refresh_from_db()
+        self.assertEqual(lead1.kill_death_ratio, 3.0)
+        self.assertEqual(lead1.win_rate, 50.0)
+
+        # Re-posting the winner does not count the match twice.
+        self.client.post(f'/api/tournament-matches/{match.id}/set_winner/', {'winner_id': self.teams[0].id})
+        self.assertEqual(User.objects.get(pk=lead0.pk).matches_played, 2)
+
+    def test_rejects_players_outside_the_rosters(self):
+        outsider = User.objects.create_user(email='out@test.com', username='out', password='testpass123')
+        match, response = self._play(1, self.teams[0], [{'player_id': outsider.id, 'kills': 1, 'deaths': 0}])
+        self.assertEqual(response.status_code, 400)
+        match.refresh_from_db()
+        self.assertFalse(match.is_completed)
+        self.assertFalse(PlayerMatchStat.objects.exists())
+
+    def test_rebuild_matches_incremental_totals(self):
+        (lead0, _), (lead1, _) = self.members
+        # Granted outside matches; a rebuild must keep it.
+        User.objects.filter(pk=lead1.pk).update(points=100)
+        self._play(1, self.teams[0], [{'player_id': lead0.id, 'kills': 7, 'deaths': 2}])
+        self._play(2, self.teams[0], [{'player_id': lead1.id, 'kills': 1, 'deaths': 5}])
+        columns = ('points', 'matches_played', 'matches_won', 'kills', 'deaths', 'kill_death_ratio', 'win_rate')
+        incremental = list(User.objects.order_by('id').values_list(*columns))
+
+        User.objects.update(matches_played=0, matches_won=0, kills=0, deaths=0, kill_death_ratio=0, win_rate=0)
+        rebuild_player_stats(chunk_size=2)
+        self.assertEqual(list(User.objects.order_by('id').values_list(*columns)), incremental)
+        self.assertGreater(User.objects.get(pk=lead1.pk).points, 100)
+
+
+class SeedingTests(TestCase):
+    def setUp(self):
+        self.tournament = Tournament.objects.create(
+            title='Seeded Cup', max_players=8, mode='16v16', region='NA', level='BRONZE',
+            platform='PC', start_date='2030-01-01T00:00:00Z', language='English',
+            tournament_type='Single Elimination'
+        )
+
+    def _enter(self, name, ratings, tier='BRONZE', country=None):
+        players = [
+            User.objects.create_user(
+                email=f'{name}{i}@test.com', username=f'{name}{i}', password='testpass123',
+                skill_rating=rating, country_code=country
+            )
+            for i, rating in enumerate(ratings)
+        ]
+        team = Team.objects.create(name=name, lead_player=players[0], tier=tier)
+        for player in players:
+            TeamMember.objects.create(team=team, player=player)
+        return TournamentParticipant.objects.create(team=team, tournament=self.tournament)
+
+    def test_bracket_order_keeps_top_seeds_apart(self):
+        self.assertEqual(bracket_order(8), [1, 8, 4, 5, 2, 7, 3, 6])
+
+    def test_seeds_by_average_member_rating_with_tier_tiebreak(self):
+        silver = self._enter('silver', [1200, 1000], tier='SILVER')
+        gold = self._enter('gold', [1100, 1100], tier='GOLD')
+        strong = self._enter('strong', [1500, 1300])
+        weak = self._enter('weak', [900])
+
+        with self.assertNumQueries(1):
+            ranked = SeedingService(self.tournament).rank()
+        self.assertEqual([p.id for p in ranked], [strong.id, gold.id, silver.id, weak.id])
+
+        weak.protected_seed = 1
+        weak.save()
+        seeded = SeedingService(self.tournament).seed()
+        self.assertEqual([p.id for p in seeded], [weak.id, strong.id, gold.id, silver.id])
+        self.assertEqual(TournamentParticipant.objects.get(pk=silver.pk).seed, 4)
+
+    def test_brackets_use_seeds_byes_and_region_separation(self):
+        first = self._enter('first', [1400], country='us')
+        second = self._enter('second', [1300], country='fr')
+        third = self._enter('third', [1200], country='de')
+        fourth = self._enter('fourth', [1100], country='us')
+
+        self.tournament.bracket_type = 'SINGLE_ELIM'
+        matches = self.tournament.generate_bracket()['matches']
+        # 1 v 4 would be an all-'us' opener, so 3 and 4 trade places.
+        self.assertEqual(
+            [(m['team1'], m['team2']) for m in matches],
+            [(first.team_id, third.team_id), (second.team_id, fourth.team_id)]
+        )
+
+        self.tournament.bracket_type = 'SWISS'
+        pairings = self.tournament.generate_bracket()
+        self.assertEqual([(a.id, b.id) for a, b in pairings], [(first.id, third.id), (second.id, fourth.id)])
+
+        fourth.delete()
+        self.tournament.bracket_type = 'SINGLE_ELIM'
+        matches = self.tournament.generate_bracket()['matches']
+        self.assertEqual(matches[0], {'team1': first.team_id, 'team2': None, 'round': 1, 'match_num': 1, 'winner': first.team_id})
+
+
+class ScrimMatchmakingTests(TestCase):
+    def setUp(self):
+        self.leads, self.teams = [], []
+        for i, rating in enumerate([1000, 1030, 1300, 1500, 1040]):
+            lead = User.objects.create_user(
+                email=f'scrim{i}@test.com', username=f'scrim{i}', password='testpass123', is_team_lead=True
+            )
+            self.leads.append(lead)
+            self.teams.append(Team.objects.create(name=f'Scrim {i}', lead_player=lead, skill_rating=rating))
+        self.client = APIClient()
+
+    def _queue(self, index, **overrides):
+        self.client.force_authenticate(self.leads[index])
+        data = {'team_id': self.teams[index].id, 'region': 'EU', 'platform': 'PC', 'mode': '32v32', **overrides}
+        return self.client.post('/api/scrims/queue/', data)
+
+    def test_pair_by_rating_takes_nearest_neighbour_within_window(self):
+        ratings = [1000, 1010, 1100, 1400]
+        # 1100 waited longest and has the widest window, so it takes 1010.
+        pairs = pair_by_rating(ratings, [20, 20, 100, 50], [2, 0, 1, 3])
+        self.assertEqual(pairs, [(2, 1)])
+
+    def test_queue_validation_and_cancel(self):
+        response = self._queue(0)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['rating'], 1000)
+        self.assertEqual(self._queue(0).status_code, 400)
+        self.assertEqual(self._queue(1, region='MARS').status_code, 400)
+
+        self.client.force_authenticate(self.leads[1])
+        self.assertEqual(self.client.post('/api/scrims/queue/', {
+            'team_id': self.teams[0].id, 'region': 'EU', 'platform': 'PC', 'mode': '32v32'
+        }).status_code, 403)
+
+        self.client.force_authenticate(self.leads[0])
+        entry_id = response.data['id']
+        self.assertEqual(self.client.delete(f'/api/scrims/queue/{entry_id}/').status_code, 204)
+        self.assertEqual(self.client.delete(f'/api/scrims/queue/{entry_id}/').status_code, 400)
+        self.assertEqual(self._queue(0).status_code, 201)
+
+    def test_tick_pairs_close_ratings_and_widens_over_time(self):
+        for i in range(4):
+            self.assertEqual(self._queue(i).status_code, 201)
+        self.assertEqual(self._queue(4, region='NA').status_code, 201)
+
+        self.assertEqual(run_matchmaking_tick(), 1)
+        match = ScrimMatch.objects.get()
+        self.assertEqual({match.team1_id, match.team2_id}, {self.teams[0].id, self.teams[1].id})
+        self.assertEqual(
+            set(ScrimQueueEntry.objects.filter(status='MATCHED').values_list('match_id', flat=True)), {match.id}
+        )
+
+        # 1300 and 1500 are 200 apart: out of reach now, in reach after a wait.
+        self.assertEqual(run_matchmaking_tick(), 0)
+        later = timezone.now() + timezone.timedelta(minutes=10)
+        self.assertEqual(run_matchmaking_tick(now=later), 1)
+        self.assertEqual(ScrimQueueEntry.objects.filter(status='WAITING').count(), 1)
+
+        self.client.force_authenticate(self.leads[2])
+        response = self.client.get('/api/scrims/')
+        self.assertEqual([m['team2'] for m in response.data], [self.teams[3].id])
+
+
+class DiscordNotifierTests(TestCase):
+    def setUp(self):
+        self.lead = User.objects.create_user(
+            email='dlead@test.com', username='dlead', password='testpass123', discord_id='1001'
+        )
+        self.team = Team.objects.create(name='Pinged', lead_player=self.lead)
+        self.players = [self.lead] + [
+            User.objects.create_user(
+                email=f'd{i}@test.com', username=f'd{i}', password='testpass123', discord_id=discord_id
+            )
+            for i, discord_id in enumerate(['1002', None, '1004'])
+        ]
+        for player in self.players:
+            TeamMember.objects.create(team=self.team, player=player)
+
+    def test_team_fan_out_reports_every_recipient(self):
+        from asgiref.sync import async_to_sync
+        client = FakeDiscordClient(global_limit=1000, route_limit=100, unreachable=['1004'])
+        notifier = DiscordNotifier(client)
+
+        with self.assertNumQueries(1):
+            results = async_to_sync(notifier.notify_team)(self.team.id, 'Check in now')
+        statuses = {result['player_id']: result['status'] for result in results}
+        self.assertEqual(statuses, {
+            self.players[0].id: 'sent', self.players[1].id: 'sent',
+            self.players[2].id: 'skipped', self.players[3].id: 'failed',
+        })
+        self.assertEqual(sorted(client.delivered), [('1001', 'Check in now'), ('1002', 'Check in now')])
+
+        result = async_to_sync(notifier.notify_player)(999999, 'Hello')
+        self.assertEqual(result['status'], 'not_found')
+
+    def test_provider_429s_pause_the_route_and_are_retried(self):
+        from asgiref.sync import async_to_sync
+        # The client-side limiter is far looser than the fake provider, so
+        # concurrent sends to one channel hit 429s and must back off.
+        client = FakeDiscordClient(
+            limiter=RouteRateLimiter(global_limit=1000, route_limit=100, route_window=1.0),
+            latency=0.01, global_limit=1000, route_limit=1, route_window=0.05,
+        )
+        notifier = DiscordNotifier(client, max_attempts=5)
+        results = async_to_sync(notifier.deliver)({1: '42', 2: '42', 3: '42'}, 'Bracket is live')
+        self.assertEqual([result['status'] for result in results], ['sent'] * 3)
+        self.assertGreater(client.rate_limited, 0)
+        self.assertEqual(len(client.delivered), 3)
+
+    def test_dm_channels_are_opened_once_per_recipient(self):
+        from asgiref.sync import async_to_sync
+        from django.core.cache import cache
+        cache.delete_many(['discord:dm-channel:5001', 'discord:dm-channel:5002'])
+        first = FakeDiscordClient(global_limit=1000, route_limit=100, channel_cache=cache)
+        async_to_sync(DiscordNotifier(first).deliver)({1: '5001', 2: '5002'}, 'Round 1')
+        async_to_sync(DiscordNotifier(first).deliver)({1: '5001', 2: '5002'}, 'Round 2')
+        self.assertEqual(first.channels_opened, 2)
+
+        # A later run picks the ids up from the cache.
+        second = FakeDiscordClient(global_limit=1000, route_limit=100, channel_cache=cache)
+        async_to_sync(DiscordNotifier(second).deliver)({1: '5001'}, 'Round 3')
+        self.assertEqual(second.channels_opened, 0)
+        self.assertEqual(second.delivered, [('5001', 'Round 3')])
+
+    def test_bucket_follows_the_providers_window(self):
+        bucket = TokenBucket(5, 5.0)
+        bucket.sync(limit=10, remaining=9, reset_after=2.0)
+        self.assertEqual((bucket.capacity, bucket.rate), (10, 5.0))
+        # Mid-window headers say nothing about the window length.
+        bucket.sync(limit=10, remaining=4, reset_after=0.5)
+        self.assertEqual(bucket.rate, 5.0)
+
+
+class FlakyDiscordClient:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.delivered = []
+
+    async def send_direct_message(self, discord_id, message):
+        if discord_id in self.failing:
+            raise DiscordError('Discord returned 503', status=503, retryable=True)
+        self.delivered.append((discord_id, message))
+
+
+@override_settings(DISCORD_NOTIFY_MAX_ATTEMPTS=1)
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@test.com', username='admin', password='testpass123', is_admin=True, is_staff=True
+        )
+        self.teams = []
+        for i in range(2):
+            lead = User.objects.create_user(
+                email=f'olead{i}@test.com', username=f'olead{i}', password='testpass123',
+                is_team_lead=True, discord_id=f'70{i}'
+            )
+            team = Team.objects.create(name=f'Outbox {i}', lead_player=lead)
+            TeamMember.objects.create(team=team, player=lead, role='CAPTAIN')
+            self.teams.append(team)
+        self.tournament = Tournament.objects.create(
+            title='Outbox Cup', max_players=8, mode='16v16', region='NA', level='BRONZE',
+            platform='PC', start_date='2030-01-01T00:00:00Z', language='English',
+            tournament_type='Single Elimination'
+        )
+        self.client = APIClient()
+
+    def test_domain_events_write_outbox_rows(self):
+        self.client.force_authenticate(self.teams[0].lead_player)
+        response = self.client.post(f'/api/tournaments/{self.tournament.id}/register/', {'team_id': self.teams[0].id})
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(list(NotificationOutbox.objects.values_list('event', 'target_id')), [('TEAM_REGISTERED', self.teams[0].id)])
+
+        match = TournamentMatch.objects.create(
+            tournament=self.tournament, round_number=1, match_number=1, team1=self.teams[0], team2=self.teams[1]
+        )
+        self.client.force_authenticate(self.admin)
+        self.client.patch(f'/api/tournament-matches/{match.id}/', {'scheduled_time': '2030-01-02T18:00:00Z'})
+        for _ in range(2):
+            self.client.post(f'/api/tournament-matches/{match.id}/set_winner/', {'winner_id': self.teams[1].id})
+        self.assertEqual(NotificationOutbox.objects.filter(event='MATCH_SCHEDULED').count(), 2)
+        self.assertEqual(
+            set(NotificationOutbox.objects.filter(event='MATCH_RESULT').values_list('target_id', 'message')),
+            {(self.teams[0].id, 'Your team lost round 1 match 1.'), (self.teams[1].id, 'Your team won round 1 match 1.')}
+        )
+
+    def test_worker_retries_only_failed_recipients_with_backoff(self):
+        member = User.objects.create_user(email='om@test.com', username='om', password='testpass123', discord_id='799')
+        TeamMember.objects.create(team=self.teams[0], player=member)
+        notifications.enqueue('BRACKET_GENERATED', 'TEAM', self.teams[0].id, 'Bracket is live')
+        notifications.enqueue('BRACKET_GENERATED', 'PLAYER', self.teams[1].lead_player_id, 'Bracket is live')
+
+        client = FlakyDiscordClient(failing=['799'])
+        self.assertEqual(deliver_batch(client=client), 2)
+        team_row = NotificationOutbox.objects.get(target_type='TEAM')
+        self.assertEqual((team_row.status, team_row.attempts, team_row.retry_player_ids), ('PENDING', 1, [member.id]))
+        self.assertGreater(team_row.available_at, timezone.now())
+        self.assertEqual(NotificationOutbox.objects.get(target_type='PLAYER').status, 'SENT')
+
+        # Not due yet, so nothing is claimed.
+        self.assertEqual(deliver_batch(client=client), 0)
+        client.failing.clear()
+        later = timezone.now() + timezone.timedelta(hours=1)
+        self.assertEqual(deliver_batch(client=client, now=later), 1)
+        team_row.refresh_from_db()
+        self.assertEqual(team_row.status, 'SENT')
+        self.assertEqual(team_row.results, {'totals': {'sent': 2}})
+        self.assertEqual([discord_id for discord_id, _ in client.delivered], ['700', '701', '799'])
+
+    def test_claims_skip_claimed_rows_until_they_go_stale(self):
+        for i in range(3):
+            notifications.enqueue('MATCH_RESULT', 'TEAM', self.teams[0].id, f'Message {i}')
+        notifications.enqueue('MATCH_RESULT', 'TEAM', self.teams[0].id, 'Duplicate', dedupe_key='k')
+        notifications.enqueue('MATCH_RESULT', 'TEAM', self.teams[0].id, 'Duplicate', dedupe_key='k')
+        self.assertEqual(NotificationOutbox.objects.count(), 4)
+
+        self.assertEqual(len(claim_batch(3)), 3)
+        self.assertEqual(len(claim_batch(10)), 1)
+        self.assertEqual(claim_batch(10), [])
+        later = timezone.now() + timezone.timedelta(hours=1)
+        self.assertEqual(len(claim_batch(10, now=later)), 4)
+
+    def test_batch_cost_does_not_grow_with_rows(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        counts = []
+        for rows in (2, 8):
+            for i in range(rows):
+                notifications.enqueue('MATCH_RESULT', 'TEAM', self.teams[i % 2].id, f'Message {i}')
+            with CaptureQueriesContext(connection) as queries:
+                deliver_batch(client=FlakyDiscordClient())
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class MatchReminderTests(TestCase):
+    def setUp(self):
+        self.teams = []
+        for i in range(4):
+            lead = User.objects.create_user(
+                email=f'rlead{i}@test.com', username=f'rlead{i}', password='testpass123', is_team_lead=True
+            )
+            self.teams.append(Team.objects.create(name=f'Reminded {i}', lead_player=lead))
+        self.tournament = Tournament.objects.create(
+            title='Reminder Cup', max_players=8, mode='16v16', region='NA', level='BRONZE',
+            platform='PC', start_date='2030-01-01T00:00:00Z', language='English',
+            tournament_type='Single Elimination'
+        )
+        self.now = timezone.now()
+
+    def _match(self, number, team1, team2, minutes, **extra):
+        return TournamentMatch.objects.create(
+            tournament=self.tournament, round_number=1, match_number=number, team1=team1, team2=team2,
+            scheduled_time=self.now + timezone.timedelta(minutes=minutes), **extra
+        )
+
+    def test_one_reminder_per_team_and_runs_are_idempotent(self):
+        a, b, c, d = self.teams
+        first = self._match(1, a, b, 10)
+        second = self._match(2, a, c, 20)
+        later = self._match(3, c, d, 90)
+        self._match(4, b, d, 5, is_completed=True)
+
+        self.assertEqual(notifications.send_match_reminders(now=self.now), 3)
+        rows = {row.target_id: row for row in NotificationOutbox.objects.filter(event='MATCH_REMINDER')}
+        self.assertEqual(set(rows), {a.id, b.id, c.id})
+        self.assertIn('match 1', rows[a.id].message)
+        self.assertIn('match 2', rows[a.id].message)
+        self.assertEqual(TournamentMatch.objects.filter(reminder_sent_at__isnull=False).count(), 2)
+
+        self.assertEqual(notifications.send_match_reminders(now=self.now), 0)
+        self.assertEqual(NotificationOutbox.objects.count(), 3)
+
+        hour_later = self.now + timezone.timedelta(minutes=70)
+        self.assertEqual(notifications.send_match_reminders(now=hour_later), 2)
+        later.refresh_from_db()
+        self.assertIsNotNone(later.reminder_sent_at)
+        first.refresh_from_db()
+        self.assertEqual(first.reminder_sent_at, self.now)
+
+    def test_query_count_does_not_grow_with_matches(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        counts = []
+        for start, matches in ((0, 1), (10, 12)):
+            for number in range(start, start + matches):
+                self._match(number + 100, self.teams[number % 2], self.teams[2 + number % 2], 5 + number % 20)
+            with CaptureQueriesContext(connection) as queries:
+                notifications.send_match_reminders(now=self.now)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class BracketJobTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@test.com', username='admin', password='testpass123', is_admin=True, is_staff=True
+        )
+        self.tournament = Tournament.objects.create(
+            title='Job Cup', max_players=16, mode='16v16', region='NA', level='BRONZE',
+            platform='PC', start_date='2030-01-01T00:00:00Z', language='English',
+            tournament_type='Single Elimination'
+        )
+        self.teams = []
+        for i in range(5):
+            lead = User.objects.create_user(
+                email=f'jlead{i}@test.com', username=f'jlead{i}', password='testpass123', skill_rating=1500 - i * 50
+            )
+            team = Team.objects.create(name=f'Job {i}', lead_player=lead)
+            TeamMember.objects.create(team=team, player=lead, role='CAPTAIN')
+            TournamentParticipant.objects.create(team=team, tournament=self.tournament)
+            self.teams.append(team)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = f'/api/tournaments/{self.tournament.id}/generate_bracket/'
+
+    def test_endpoint_queues_one_job_per_idempotency_key(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(self.url, HTTP_IDEMPOTENCY_KEY='click-1')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'QUEUED')
+        self.assertEqual(len(callbacks), 1)
+        job_id = response.data['id']
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            again = self.client.post(self.url, HTTP_IDEMPOTENCY_KEY='click-1')
+            other = self.client.post(self.url, HTTP_IDEMPOTENCY_KEY='click-2')
+        self.assertEqual((again.data['id'], other.data['id']), (job_id, job_id))
+        self.assertEqual(callbacks, [])
+
+        run_bracket_job(job_id)
+        response = self.client.get(response.data['status_url'])
+        self.assertEqual((response.data['status'], response.data['progress']), ('SUCCEEDED', 100))
+        self.assertIn(f'tournament_id={self.tournament.id}', response.data['matches_url'])
+        # A finished job is still what its key maps to.
+        self.assertEqual(self.client.post(self.url, HTTP_IDEMPOTENCY_KEY='click-1').status_code, 200)
+
+        self.tournament.bracket_type = 'DOUBLE_ELIM'
+        self.tournament.save()
+        self.assertEqual(self.client.post(self.url).status_code, 400)
+
+    def test_thread_runner_answers_before_the_job_runs(self):
+        with mock.patch('tournaments.bracket_jobs.threading.Thread') as thread:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(self.url)
+        self.assertEqual((response.status_code, response.data['status']), (202, 'QUEUED'))
+        self.assertEqual(thread.call_args.kwargs['args'], (response.data['id'],))
+        thread.return_value.start.assert_called_once_with()
+
+    @override_settings(BRACKET_JOB_RUNNER='worker')
+    def test_worker_runner_leaves_jobs_for_the_command(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url)
+        self.assertEqual(BracketGenerationJob.objects.get(pk=response.data['id']).status, 'QUEUED')
+
+        self.assertEqual(run_queued_jobs(), 1)
+        job = BracketGenerationJob.objects.get(pk=response.data['id'])
+        self.assertEqual((job.status, job.matches_created), ('SUCCEEDED', 4), job.error)
+        self.assertEqual(run_queued_jobs(), 0)
+
+    @override_settings(BRACKET_JOB_RUNNER='celery')
+    def test_celery_runner_sends_the_task(self):
+        celery_module = mock.Mock()
+        with mock.patch.dict(sys.modules, {'backend.celery': celery_module}):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(self.url)
+        celery_module.app.send_task.assert_called_once_with(
+            'tournaments.tasks.generate_bracket_job', args=[response.data['id']]
+        )
+
+    @override_settings(BRACKET_JOB_RUNNER='celery')
+    def test_failed_dispatch_fails_the_job(self):
+        # As if celery were not installed: importing the app raises.
+        with mock.patch.dict(sys.modules, {'backend.celery': None}):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(self.url)
+        job = BracketGenerationJob.objects.get(pk=response.data['id'])
+        self.assertEqual(job.status, 'FAILED')
+        self.assertIn('Could not queue', job.error)
+
+        with self.captureOnCommitCallbacks():
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 202)
+        self.assertNotEqual(response.data['id'], job.id)
+
+    def test_stale_jobs_expire(self):
+        stale = BracketGenerationJob.objects.create(tournament=self.tournament)
+        BracketGenerationJob.objects.filter(pk=stale.pk).update(created_at=timezone.now() - timezone.timedelta(hours=1))
+        with self.captureOnCommitCallbacks():
+            response = self.client.post(self.url)
+        self.assertNotEqual(response.data['id'], stale.id)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, 'FAILED')
+
+        # A job expired mid-run does not publish its bracket.
+        running = BracketGenerationJob.objects.get(pk=response.data['id'])
+        with mock.patch('tournaments.bracket_jobs._set_progress', side_effect=lambda job, progress: (
+            BracketGenerationJob.objects.filter(pk=job.pk).update(status='FAILED')
+        )):
+            job = run_bracket_job(running.id)
+        self.assertEqual(job.status, 'FAILED')
+        self.assertFalse(TournamentMatch.objects.filter(tournament=self.tournament).exists())
+
+    def test_single_elimination_job_creates_matches_and_byes(self):
+        for _ in range(2):
+            job = BracketGenerationJob.objects.create(tournament=self.tournament)
+            job = run_bracket_job(job.id)
+            self.assertEqual((job.status, job.rounds, job.matches_created), ('SUCCEEDED', [1], 4), job.error)
+        self.assertIsNone(run_bracket_job(job.id))
+
+        matches = TournamentMatch.objects.filter(tournament=self.tournament).order_by('match_number')
+        self.assertEqual(matches.count(), 4)
+        self.assertEqual(matches.filter(team2__isnull=True, is_completed=True).count(), 3)
+        self.assertEqual((matches[0].team1_id, matches[0].winner_id), (self.teams[0].id, self.teams[0].id))
+        self.tournament.refresh_from_db()
+        self.assertTrue(self.tournament.is_started)
+        self.assertEqual(len(self.tournament.bracket_structure['matches']), 4)
+
+    def test_round_robin_and_swiss_jobs(self):
+        self.tournament.bracket_type = 'ROUND_ROBIN'
+        self.tournament.save()
+        job = run_bracket_job(BracketGenerationJob.objects.create(tournament=self.tournament).id)
+        self.assertEqual((job.status, job.rounds, job.matches_created), ('SUCCEEDED', [1, 2, 3, 4, 5], 10), job.error)
+        pairs = TournamentMatch.objects.filter(tournament=self.tournament).values_list('team1_id', 'team2_id')
+        self.assertEqual(len({frozenset(pair) for pair in pairs}), 10)
+
+        TournamentMatch.objects.all().delete()
+        self.tournament.bracket_type = 'SWISS'
+        self.tournament.current_round = 0
+        self.tournament.save()
+        job = run_bracket_job(BracketGenerationJob.objects.create(tournament=self.tournament).id)
+        self.assertEqual((job.status, job.matches_created), ('SUCCEEDED', 2), job.error)
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.bracket_structure['round'], 1)
+        self.assertEqual(self.tournament.current_round, 1)
+
+
+class TournamentLifecycleTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.tournament = Tournament.objects.create(
+            title='Lifecycle Cup', max_players=8, mode='16v16', region='NA', level='BRONZE',
+            platform='PC', start_date=self.now + timezone.timedelta(minutes=40), language='English',
+            tournament_type='Single Elimination'
+        )
+        self.later = Tournament.objects.create(
+            title='Later Cup', max_players=8, mode='16v16', region='NA', level='BRONZE',
+            platform='PC', start_date=self.now + timezone.timedelta(days=2), language='English',
+            tournament_type='Single Elimination'
+        )
+        self.leads = []
+        for i in range(4):
+            lead = User.objects.create_user(
+                email=f'lc{i}@test.com', username=f'lc{i}', password='testpass123', skill_rating=1400 - i * 10
+            )
+            team = Team.objects.create(name=f'Lifecycle {i}', lead_player=lead)
+            TeamMember.objects.create(team=team, player=lead, role='CAPTAIN')
+            TournamentParticipant.objects.create(team=team, tournament=self.tournament)
+            self.leads.append(lead)
+
+    def _status(self, tournament):
+        tournament.refresh_from_db()
+        return tournament.status, tournament.current_round
+
+    def _settle_round(self, round_number):
+        for match in TournamentMatch.objects.filter(tournament=self.tournament, round_number=round_number):
+            TournamentMatch.objects.filter(pk=match.pk).update(is_completed=True, winner_id=match.team1_id)
+
+    def test_single_elimination_runs_from_registration_to_completion(self):
+        self.assertEqual(self._status(self.tournament), ('REGISTRATION_OPEN', 0))
+        counts = advance_lifecycles(now=self.now + timezone.timedelta(minutes=15))
+        self.assertEqual(counts['registration_closed'], 1)
+        self.assertEqual(self._status(self.tournament), ('REGISTRATION_CLOSED', 0))
+        self.assertEqual(self._status(self.later), ('REGISTRATION_OPEN', 0))
+
+        latecomer = User.objects.create_user(email='late@test.com', username='late', password='testpass123')
+        late_team = Team.objects.create(name='Latecomers', lead_player=latecomer)
+        client = APIClient()
+        client.force_authenticate(latecomer)
+        response = client.post(f'/api/tournaments/{self.tournament.id}/register/', {'team_id': late_team.id})
+        self.assertEqual(response.data, {'error': 'Registration for this tournament is closed'})
+
+        job = run_bracket_job(BracketGenerationJob.objects.create(tournament=self.tournament).id)
+        self.assertEqual(job.status, 'SUCCEEDED', job.error)
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.total_rounds, 2)
+
+        started = self.now + timezone.timedelta(minutes=41)
+        self.assertEqual(advance_lifecycles(now=started)['started'], 1)
+        self.assertEqual(self._status(self.tournament), ('IN_PROGRESS', 1))
+        response = client.get('/api/tournaments/?status=ongoing')
+        self.assertEqual([t['id'] for t in response.data], [self.tournament.id])
+
+        # Nothing moves while round one is unfinished.
+        self.assertEqual(advance_lifecycles(now=started)['rounds_advanced'], 0)
+        self._settle_round(1)
+        counts = advance_lifecycles(now=started)
+        self.assertEqual((counts['matches_created'], counts['rounds_advanced']), (1, 1))
+        final = TournamentMatch.objects.get(tournament=self.tournament, round_number=2)
+        round_one = TournamentMatch.objects.filter(tournament=self.tournament, round_number=1).order_by('match_number')
+        self.assertEqual((final.team1_id, final.team2_id), tuple(match.team1_id for match in round_one))
+        self.assertEqual(self._status(self.tournament), ('IN_PROGRESS', 2))
+
+        self._settle_round(2)
+        self.assertEqual(advance_lifecycles(now=started)['completed'], 1)
+        self.assertEqual(self._status(self.tournament), ('COMPLETED', 2))
+        self.assertTrue(Tournament.objects.get(pk=self.tournament.pk).is_completed)
+        self.assertEqual(
+            [t['id'] for t in client.get('/api/tournaments/?status=upcoming').data], [self.later.id]
+        )
+
+    def test_dates_cover_a_missed_tick(self):
+        # Started an hour ago, but no tick has moved it on.
+        Tournament.objects.filter(pk=self.later.pk).update(start_date=self.now - timezone.timedelta(hours=1))
+        client = APIClient()
+        client.force_authenticate(self.leads[0])
+        ids = lambda status: [t['id'] for t in client.get(f'/api/tournaments/?status={status}').data]
+        self.assertEqual(ids('upcoming'), [self.tournament.id])
+        self.assertEqual(ids('ongoing'), [self.later.id])
+
+        late_team = Team.objects.create(
+            name='Too late', lead_player=User.objects.create_user(email='tl@test.com', username='tl', password='testpass123')
+        )
+        client.force_authenticate(late_team.lead_player)
+        response = client.post(f'/api/tournaments/{self.later.id}/register/', {'team_id': late_team.id})
+        self.assertEqual(response.data, {'error': 'Registration for this tournament is closed'})
+
+    def test_initial_status_follows_start_date(self):
+        def create(minutes):
+            return Tournament.objects.create(
+                title=f'Starts in {minutes}', max_players=8, mode='16v16', region='NA', level='BRONZE',
+                platform='PC', start_date=self.now + timezone.timedelta(minutes=minutes), language='English',
+                tournament_type='Single Elimination'
+            )
+        self.assertEqual(create(10).status, 'REGISTRATION_CLOSED')
+        started = create(-10)
+        self.assertEqual((started.status, started.is_started, started.current_round), ('IN_PROGRESS', True, 1))
+        self.assertEqual(Tournament.objects.get(pk=create(120).pk).status, 'REGISTRATION_OPEN')
+
+    def test_is_completed_and_status_stay_in_step(self):
+        # As the admin form does: flip the flag and save.
+        self.later.is_completed = True
+        self.later.save()
+        self.assertEqual(self._status(self.later), ('COMPLETED', 0))
+        Tournament.objects.filter(pk=self.tournament.pk).update(is_completed=True)
+        client = APIClient()
+        client.force_authenticate(self.leads[0])
+        completed = [t['id'] for t in client.get('/api/tournaments/?status=completed').data]
+        self.assertEqual(sorted(completed), sorted([self.tournament.id, self.later.id]))
+
+        self.later.is_completed = False
+        self.later.save(update_fields=['is_completed'])
+        self.assertEqual(self._status(self.later), ('REGISTRATION_OPEN', 0))
+
+
+class QueryPlanTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        for i in range(3):
+            lead = User.objects.create_user(
+                email=f'qp{i}@test.com', username=f'qp{i}', password='testpass123', is_online=i % 2 == 0
+            )
+            team = Team.objects.create(name=f'Plan {i}', lead_player=lead)
+            TeamMember.objects.create(team=team, player=lead, role='CAPTAIN')
+            tournament = Tournament.objects.create(
+                title=f'Plan Cup {i}', max_players=8, mode='16v16', region='NA', level='BRONZE',
+                platform='PC', start_date=now + timezone.timedelta(days=i), language='English',
+                tournament_type='Single Elimination'
+            )
+            TournamentMatch.objects.create(
+                tournament=tournament, round_number=1, match_number=1, team1=team, scheduled_time=now
+            )
+
+    def test_harness_reports_table_scans(self):
+        self.assertEqual(sequential_scans(User.objects.filter(country_code='GB')), [User._meta.db_table])
+        self.assertEqual(sequential_scans(User.objects.filter(pk=1)), [])
+
+    def test_hot_querysets_use_indexes(self):
+        for name, build in hot_querysets().items():
+            with self.subTest(name):
+                self.assertEqual(sequential_scans(build()), [], build().explain())
+        self.assertEqual(check_query_plans(), {})
@@ -1,8 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    PlayerViewSet, TeamViewSet, TeamMemberViewSet, SquadViewSet, SquadMemberViewSet, TournamentTeamViewSet, AllTeamDetailsView, UserSquadStatusView,
-    TournamentViewSet, AssignRolesView, TournamentParticipantViewSet, CountryCodeUpdateView, TeamViewSet, TournamentMatchViewSet, AccountTypeUpdateView, JoinTeamView, member_stats, LoginView, TournamentListView, RegistrationView, SocialSignupView, SocialCallbackView, SocialLoginView, NewsListView, UpcomingTournamentView, MatchListView
+    PlayerViewSet, TeamViewSet, TeamMemberViewSet, SquadViewSet, SquadMemberViewSet, TournamentTeamViewSet, AllTeamDetailsView, UserSquadStatusView, LeaderboardView, LeaderboardMeView, ScrimQueueView, ScrimQueueEntryView, ScrimMatchListView,
+    TournamentViewSet, AssignRolesView, TournamentParticipantViewSet, CountryCodeUpdateView, TeamViewSet, TournamentMatchViewSet, AccountTypeUpdateView, JoinTeamView, member_stats, LoginView, TournamentListView, RegistrationView, SocialSignupView, SocialCallbackView, SocialLoginView, AsyncSocialLoginView, AsyncSocialSignupView, SocialIdentityCacheStatsView, PasswordHashingStatsView, NewsListView, UpcomingTournamentView, MatchListView
 )
 
 router = DefaultRouter()
@@ -21,8 +21,12 @@ urlpatterns = [
     path('member-stats/', member_stats, name='member-stats'),
     path('auth/login/', LoginView.as_view(), name='login'),
     path('auth/social/login/', SocialLoginView.as_view(), name='social-login'),
+    path('auth/social/login/async/', AsyncSocialLoginView.as_view(), name='social-login-async'),
     path('auth/register/', RegistrationView.as_view(), name='register'),
+    path('auth/hashing-metrics/', PasswordHashingStatsView.as_view(), name='hashing-metrics'),
     path('auth/social/signup/', SocialSignupView.as_view(), name='social-signup'),
+    path('auth/social/signup/async/', AsyncSocialSignupView.as_view(), name='social-signup-async'),
+    path('auth/social/identity-cache/', SocialIdentityCacheStatsView.as_view(), name='social-identity-cache'),
     path('upcoming_tournaments/', TournamentListView.as_view(), name='tournament-list'),
     path('upcoming_tournament/', UpcomingTournamentView.as_view(), name='upcoming-tournaments'),
     path('matches/', MatchListView.as_view(), name='matches-list'),
@@ -33,4 +37,9 @@ urlpatterns = [
     path('allteamdetails/', AllTeamDetailsView.as_view(), name='all_team_details'),
     path('assign-roles/', AssignRolesView.as_view(), name='assign-roles'),
     path('user-squad-status/', UserSquadStatusView.as_view(), name='user-squad-status'),
+    path('leaderboard/', LeaderboardView.as_view(), name='leaderboard'),
+    path('leaderboard/me/', LeaderboardMeView.as_view(), name='leaderboard-me'),
+    path('scrims/', ScrimMatchListView.as_view(), name='scrim-matches'),
+    path('scrims/queue/', ScrimQueueView.as_view(), name='scrim-queue'),
+    path('scrims/queue/<int:entry_id>/', ScrimQueueEntryView.as_view(), name='scrim-queue-entry'),
 ]
\ No newline at end of file
@@ -1,6 +1,10 @@
+import random
+import string
+from datetime import timedelta
 from django.db import transaction
 from django.core.exceptions import ValidationError
-from .models import Team, TeamMember
+from django.utils import timezone
+from .models import Player, Team, TeamMember, SocialAccount, SocialToken
 
 def validate_team_tier(team, player):
     if player.tier != team.tier:
@@ -27,4 +31,45 @@ def get_player_teams(player):
         player=player
     ).select_related(
         'team', 'team__lead_player'
-    ).order_by('-team__created_at')
\ No newline at end of file
+    ).order_by('-team__created_at')
+
+def make_random_password(length=12):
+    chars = string.ascii_letters + string.digits + string.punctuation
+    return ''.join(random.SystemRandom().choice(chars) for _ in range(length))
+
+def get_or_create_social_account(provider, user_info, access_token):
+    uid = user_info['id']
+    with transaction.atomic():
+        try:
+            social_account = SocialAccount.objects.select_related('user').get(provider=provider, uid=uid)
+            user = social_account.user
+        except SocialAccount.DoesNotExist:
+            email = user_info.get('email', f'{uid}@{provider}.fake')
+            username = user_info.get('username') or user_info.get('name') or provider + '_' + uid[:6]
+
+            if Player.objects.filter(email=email).exists():
+                raise ValidationError("An account with this email already exists. Please log in instead.")
+
+            user = Player.objects.create_user(
+                email=email,
+                username=username,
+                password=make_random_password()
+            )
+            social_account = SocialAccount.objects.create(
+                provider=provider,
+                uid=uid,
+                extra_data=user_info,
+                user=user
+            )
+
+        SocialToken.objects.update_or_create(
+            player=user,
+            provider=provider,
+            defaults={
+                'uid': uid,
+                'access_token': access_token,
+                'expires_at': timezone.now() + timedelta(days=30)
+            }
+        )
+
+    return social_account, user
@@ -1,4 +1,4 @@
-from rest_framework import viewsets, status
+from rest_framework import viewsets, status, serializers
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
@@ -14,20 +14,43 @@ from django.contrib.auth.models import BaseUserManager
 from rest_framework_simplejwt.tokens import RefreshToken
 from datetime import timedelta
 from .models import Player, SocialToken
+import itertools
 import random
 import string
 import os
-import requests
 from django.db import models
 from django.db.models import Q
-from .models import Player, Team, TeamMember, Tournament, TournamentParticipant, TournamentMatch, SocialAccount, News, TournamentTeam, SquadMember, Squad
+from .models import Player, Team, TeamMember, Tournament, TournamentParticipant, TournamentWaitlistEntry, TournamentMatch, SocialAccount, News, TournamentTeam, SquadMember, Squad, SquadType, SquadCapacityError, ScrimQueueEntry, ScrimMatch, BracketGenerationJob
 from .serializers import (
     PlayerSerializer, TeamSerializer, AllTeamDetailsSerializer, TeamMemberSerializer, SquadSerializer, TournamentTeamSerializer, RegisteredTournamentSerializer,
-    TournamentSerializer, TournamentParticipantSerializer, TournamentMatchSerializer,
-    UserRegistrationSerializer, LoginAuthSerializer, NewsSerializer, SignUpAuthSerializer, TournamentDetailSerializer, MatchSerializer, SquadMemberSerializer
+    TournamentSerializer, TournamentParticipantSerializer, TournamentWaitlistEntrySerializer, TournamentMatchSerializer,
+    UserRegistrationSerializer, LoginAuthSerializer, NewsSerializer, SignUpAuthSerializer, TournamentDetailSerializer, MatchSerializer, SquadMemberSerializer,
+    ScrimQueueEntrySerializer, ScrimMatchSerializer, BracketGenerationJobSerializer
 )
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.views import View
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from asgiref.sync import sync_to_async
 from rest_framework import generics
+import io
+import json
+from .services import BalancingError, RegistrationWaitlist, SquadBalancer
+from .providers import get_provider_client, get_async_provider_client, get_identity_cache, ProviderUnavailable
+from .utils import get_or_create_social_account
+from .join_codes import normalize_join_code
+from .membership import get_membership
+from .ratings import record_match_result
+from . import notifications
+from .bracket_jobs import ACTIVE_STATUSES, SUPPORTED_BRACKET_TYPES, start_bracket_job
+from .scrims import ScrimQueueError, cancel_entry, enqueue_team
+from .seeding import SeedingService
+from .stats import StatsError, parse_player_stats, record_match_stats
+from . import leaderboard
+from .squad_index import get_team_squad_index, invalidate_team_squad_index
+from .permissions import IsTeamLead
+from .importer import PlayerImporter, detect_format, parse_rows
+from .hashing import HashTimings, HashingOverloaded, authenticate_player, get_hashing_pool, hash_password
 
 User = get_user_model()
 
@@ -39,7 +62,7 @@ class PlayerViewSet(viewsets.ModelViewSet):
     def get_permissions(self):
         if self.action == 'create':
             return []
-        elif self.action in ['update', 'partial_update', 'destroy']:
+        elif self.action in ['update', 'partial_update', 'destroy', 'bulk_import']:
             return [IsAdminUser()]
         return [IsAuthenticated()]
 
@@ -50,8 +73,8 @@ class PlayerViewSet(viewsets.ModelViewSet):
             return Player.objects.all()
 
         return Player.objects.filter(
-            teams__team__lead_player=user
-        ).distinct()
+            teams__team_id__in=get_membership(self.request).led_team_ids
+        )
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -70,24 +93,110 @@ class PlayerViewSet(viewsets.ModelViewSet):
             return Response({'error': 'is_team_lead is required'}, status=status.HTTP_400_BAD_REQUEST)
 
         player.is_team_lead = is_team_lead
-        player.save()
+        player.save(update_fields=['is_team_lead'])
         return Response({'message': 'Account type updated successfully'})
 
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = request.data.get('format') or detect_format(upload.name)
+        if fmt not in ('csv', 'ndjson'):
+            return Response({'error': 'format must be csv or ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+        max_rows = getattr(settings, 'PLAYER_IMPORT_MAX_ROWS', 200)
+        try:
+            rows = list(itertools.islice(parse_rows(stream, fmt), max_rows + 1))
+        except UnicodeDecodeError:
+            return Response({'error': 'file must be UTF-8 encoded'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > max_rows:
+            return Response(
+                {'error': f'Files over {max_rows} rows must be imported with the import_players command'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
+        # Hash on the shared pool: a web worker must not fork a process pool,
+        # and a busy pool sheds the import like any other hashing request.
+        importer = PlayerImporter(
+            iterations=getattr(settings, 'PLAYER_IMPORT_HASH_ITERATIONS', 100_000), pool=get_hashing_pool()
+        )
+        try:
+            report = importer.run(rows)
+        except HashingOverloaded:
+            return overloaded_response()
+
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK)
+
 class LoginView(APIView):
     def post(self, request):
         email = request.data.get('email')
         password = request.data.get('password')
+        timings = HashTimings()
+
+        try:
+            user = authenticate_player(request, email, password, timings=timings)
+        except HashingOverloaded:
+            return overloaded_response()
 
-        user = authenticate(email=email, password=password)
         if user:
             refresh = RefreshToken.for_user(user)
-            return Response({
+            response = Response({
                 'access': str(refresh.access_token),
                 'refresh': str(refresh),
                 'user': PlayerSerializer(user).data
             }, status=status.HTTP_200_OK)
-
-        return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+        else:
+            response = Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        response['Server-Timing'] = timings.server_timing()
+        return response
+
+def overloaded_response():
+    response = Response(
+        {'error': 'Authentication is busy, please retry shortly.'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    response['Retry-After'] = '1'
+    return response
+
+def login_social_account(provider, uid):
+    social_account = SocialAccount.objects.select_related('user').get(provider=provider, uid=uid)
+    user = social_account.user
+    refresh = RefreshToken.for_user(user)
+
+    return {
+        'tokens': {
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+        },
+        'user': {
+            'id': user.id,
+            'email': user.email,
+            'username': user.username,
+            'is_admin': user.is_admin,
+            'is_team_lead': user.is_team_lead
+        }
+    }
+
+def signup_social_account(provider, user_info, access_token):
+    social_account, user = get_or_create_social_account(provider, user_info, access_token)
+    refresh = RefreshToken.for_user(user)
+
+    return {
+        'message': 'Social authentication successful',
+        'user': {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+        },
+        'tokens': {
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+        }
+    }
 
 class SocialLoginView(APIView):
     def post(self, request):
@@ -98,110 +207,19 @@ class SocialLoginView(APIView):
             provider = serializer.validated_data['provider']
             code = serializer.validated_data['code']
 
-            if provider == 'discord':
-                access_token = self.get_discord_access_token(code)
-                user_info = self.verify_discord_token(access_token)
-            elif provider == 'twitch':
-                access_token = self.get_twitch_access_token(code)
-                user_info = self.verify_twitch_token(access_token)
-            elif provider == 'facebook':
-                access_token = self.get_facebook_access_token(code)
-                user_info = self.verify_facebook_token(access_token)
-            else:
-                return Response({'error': 'Unsupported provider'}, status=status.HTTP_400_BAD_REQUEST)
-
-            uid = user_info['id']
-            social_account = SocialAccount.objects.get(provider=provider, uid=uid)
-            user = social_account.user
-            refresh = RefreshToken.for_user(user)
+            client = get_provider_client()
+            access_token = client.exchange_code(provider, code)
+            user_info = client.fetch_profile(provider, access_token)
 
-            return Response({
-                'tokens': {
-                    'refresh': str(refresh),
-                    'access': str(refresh.access_token),
-                },
-                'user': {
-                    'id': user.id,
-                    'email': user.email,
-                    'username': user.username,
-                    'is_admin': user.is_admin,
-                    'is_team_lead': user.is_team_lead
-                }
-            }, status=status.HTTP_200_OK)
+            return Response(login_social_account(provider, user_info['id']), status=status.HTTP_200_OK)
 
         except SocialAccount.DoesNotExist:
             return Response({'error': 'not_registered'}, status=status.HTTP_404_NOT_FOUND)
+        except ProviderUnavailable as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    def get_discord_access_token(self, code):
-        discord_app = settings.SOCIALACCOUNT_PROVIDERS['discord']['APP']
-        redirect_uri = os.environ.get("CLIENT_URL", "http://localhost:3000") + "/login_callback?provider=discord"
-        
-        data = {
-            'client_id': discord_app['client_id'],
-            'client_secret': discord_app['secret'],
-            'grant_type': 'authorization_code',
-            'code': code,
-            'redirect_uri': redirect_uri,
-        }
-
-        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-        response = requests.post('https://discord.com/api/oauth2/token', data=data, headers=headers)
-        response.raise_for_status()
-        return response.json()['access_token']
-
-    def get_twitch_access_token(self, code):
-        twitch_app = settings.SOCIALACCOUNT_PROVIDERS['twitch']['APP']
-
-        data = {
-            'client_id': twitch_app['client_id'],
-            'client_secret': twitch_app['secret'],
-            'code': code,
-            'grant_type': 'authorization_code',
-            'redirect_uri': 'http://localhost:3000/login_callback?provider=twitch',  # or set via .env
-        }
-
-        response = requests.post('https://id.twitch.tv/oauth2/token', data=data)
-        response.raise_for_status()
-        return response.json()['access_token']
-
-
-    def get_facebook_access_token(self, code):
-        facebook_app = settings.SOCIALACCOUNT_PROVIDERS['facebook']['APP']
-
-        params = {
-            'client_id': facebook_app['client_id'],
-            'client_secret': facebook_app['secret'],
-            'redirect_uri': 'http://localhost:3000/login_callback?provider=facebook',
-            'code': code
-        }
-
-        response = requests.get('https://graph.facebook.com/v19.0/oauth/access_token', params=params)
-        response.raise_for_status()
-        return response.json()['access_token']
-
-    def verify_discord_token(self, access_token):
-        headers = {'Authorization': f'Bearer {access_token}'}
-        response = requests.get('https://discord.com/api/users/@me', headers=headers)
-        response.raise_for_status()
-        return response.json()
-
-    def verify_twitch_token(self, access_token):
-        headers = {
-            'Authorization': f'Bearer {access_token}',
-            'Client-Id': settings.TWITCH_CLIENT_ID
-        }
-        response = requests.get('https://api.twitch.tv/helix/users', headers=headers)
-        response.raise_for_status()
-        return response.json().get('data', [{}])[0]
-
-    def verify_facebook_token(self, access_token):
-        params = {'access_token': access_token, 'fields': 'id,name,email'}
-        response = requests.get('https://graph.facebook.com/me', params=params)
-        response.raise_for_status()
-        return response.json()
-
 class RegistrationView(APIView):
     def post(self, request):
         email = request.data.get('email')
@@ -227,10 +245,21 @@ class RegistrationView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        user = Player.objects.create_user(email=email, username=username, password=password)
+        timings = HashTimings()
+        try:
+            encoded_password = hash_password(password, timings=timings)
+        except HashingOverloaded:
+            return overloaded_response()
+
+        user = Player(
+            email=Player.objects.normalize_email(email),
+            username=Player.normalize_username(username),
+            password=encoded_password
+        )
+        user.save()
         refresh = RefreshToken.for_user(user)
 
-        return Response({
+        response = Response({
             "message": "Registration successful.",
             "user": {
                 "id": user.id,
@@ -242,6 +271,8 @@ class RegistrationView(APIView):
                 "access": str(refresh.access_token),
             }
         }, status=status.HTTP_201_CREATED)
+        response['Server-Timing'] = timings.server_timing()
+        return response
 
 
 class SocialSignupView(APIView):
@@ -254,114 +285,96 @@ class SocialSignupView(APIView):
 
             provider = serializer.validated_data['provider']
             access_token = serializer.validated_data['access_token']
-            if provider == 'discord':
-                user_info = self.verify_discord_token(access_token)
-            elif provider == 'twitch':
-                user_info = self.verify_twitch_token(access_token)
-            elif provider == 'facebook':
-                user_info = self.verify_facebook_token(access_token)
-            else:
-                return Response({'error': 'Unsupported provider'}, status=status.HTTP_400_BAD_REQUEST)
-
-            social_account, user = self.get_or_create_social_account(provider, user_info, access_token)
+            user_info = get_provider_client().verify_token(provider, access_token)
 
-            print("Social account created")
-
-            refresh = RefreshToken.for_user(user)
-
-            print("Successfuly retrieved refresh token")
-
-            return Response({
-                'message': 'Social authentication successful',
-                'user': {
-                    'id': user.id,
-                    'username': user.username,
-                    'email': user.email,
-                },
-                'tokens': {
-                    'refresh': str(refresh),
-                    'access': str(refresh.access_token),
-                }
-            }, status=status.HTTP_200_OK)
+            return Response(signup_social_account(provider, user_info, access_token), status=status.HTTP_200_OK)
         except ValidationError as ve:
             return Response(
                 {"detail": str(ve)},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        except ProviderUnavailable as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         except Exception as e:
             print("Unexpected error:", str(e))
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    def verify_discord_token(self, access_token):
-        headers = {'Authorization': f'Bearer {access_token}'}
-        response = requests.get('https://discord.com/api/users/@me', headers=headers)
-        if response.status_code != 200:
-            raise ValueError('Invalid Discord access token')
-        return response.json()
-
-    def verify_twitch_token(self, access_token):
-        headers = {
-            'Authorization': f'Bearer {access_token}',
-            'Client-Id': settings.SOCIALACCOUNT_PROVIDERS['twitch']['APP']['client_id']
-        }
-        response = requests.get('https://api.twitch.tv/helix/users', headers=headers)
-        if response.status_code != 200:
-            raise ValueError('Invalid Twitch access token')
-        return response.json().get('data', [{}])[0]
-
-    def verify_facebook_token(self, access_token):
-        params = {'access_token': access_token, 'fields': 'id,name,email'}
-        response = requests.get('https://graph.facebook.com/me', params=params)
-        if response.status_code != 200:
-            raise ValueError('Invalid Facebook access token')
-        return response.json()
-
-    def get_or_create_social_account(self, provider, user_info, access_token):
-        uid = user_info['id']
+
+def parse_json_body(request):
+    if request.content_type == 'application/json':
         try:
-            social_account = SocialAccount.objects.get(provider=provider, uid=uid)
-            user = social_account.user
-            print("Social account exists")
+            return json.loads(request.body or b'{}')
+        except ValueError:
+            return {}
+    return request.POST.dict()
+
+
+# Async counterparts of the social auth views for deployments served by backend/asgi.py.
+# Provider calls are awaited on the event loop; only the ORM work hops to a thread.
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncSocialLoginView(View):
+    http_method_names = ['post']
+
+    async def post(self, request):
+        serializer = LoginAuthSerializer(data=parse_json_body(request))
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        provider = serializer.validated_data['provider']
+        code = serializer.validated_data['code']
+        client = get_async_provider_client()
+
+        try:
+            access_token = await client.exchange_code(provider, code)
+            user_info = await client.fetch_profile(provider, access_token)
+            data = await sync_to_async(login_social_account)(provider, user_info['id'])
         except SocialAccount.DoesNotExist:
-            print("Social account doesn not exist")
-            email = user_info.get('email', f'{uid}@{provider}.fake')
-            username = user_info.get('username') or user_info.get('name') or provider + '_' + uid[:6]
+            return JsonResponse({'error': 'not_registered'}, status=status.HTTP_404_NOT_FOUND)
+        except ProviderUnavailable as e:
+            return JsonResponse({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            if Player.objects.filter(email=email).exists():
-                raise ValidationError("An account with this email already exists. Please log in instead.")
+        return JsonResponse(data, status=status.HTTP_200_OK)
 
-            user = Player.objects.create_user(
-                email=email,
-                username=username,
-                password=self.make_random_password()
-            )
 
-            print("User created successfuly")
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncSocialSignupView(View):
+    http_method_names = ['post']
 
-            social_account = SocialAccount.objects.create(
-                provider=provider,
-                uid=uid,
-                extra_data=user_info,
-                user=user
-            )
+    async def post(self, request):
+        serializer = SignUpAuthSerializer(data=parse_json_body(request))
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-            print("SOcial account created successfuly")
+        provider = serializer.validated_data['provider']
+        access_token = serializer.validated_data['access_token']
+
+        try:
+            user_info = await get_async_provider_client().verify_token(provider, access_token)
+            data = await sync_to_async(signup_social_account)(provider, user_info, access_token)
+        except ValidationError as ve:
+            return JsonResponse({'detail': str(ve)}, status=status.HTTP_400_BAD_REQUEST)
+        except ProviderUnavailable as e:
+            return JsonResponse({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return JsonResponse(data, status=status.HTTP_200_OK)
 
-        SocialToken.objects.update_or_create(
-            player=user,
-            provider=provider,
-            defaults={
-                'uid': uid,
-                'access_token': access_token,
-                'expires_at': timezone.now() + timedelta(days=30)
-            }
-        )
 
-        return social_account, user
+class PasswordHashingStatsView(APIView):
+    permission_classes = [IsAdminUser]
 
-    def make_random_password(self, length=12):
-        chars = string.ascii_letters + string.digits + string.punctuation
-        return ''.join(random.SystemRandom().choice(chars) for _ in range(length))
+    def get(self, request):
+        return Response(get_hashing_pool().stats())
+
+
+class SocialIdentityCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_identity_cache().stats())
 
 
 class NewsListView(APIView):
@@ -383,6 +396,9 @@ class SocialCallbackView(APIView):
             "access_token": access_token,
         })
 
+BULK_MEMBER_LIMIT = 200
+
+
 class TeamViewSet(viewsets.ModelViewSet):
     queryset = Team.objects.all()
     serializer_class = TeamSerializer
@@ -395,21 +411,14 @@ class TeamViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
     def get_queryset(self):
-        return Team.objects.filter(
-            Q(lead_player=self.request.user) |
-            Q(members__player=self.request.user)
-        ).distinct()
+        return Team.objects.filter(id__in=get_membership(self.request).team_ids)
     
     def perform_create(self, serializer):
         if not self.request.user.is_team_lead:
             raise serializers.ValidationError("Only team leads can create teams")
 
-        join_code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-        while Team.objects.filter(join_code=join_code).exists():
-            join_code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-
         with transaction.atomic():
-            team = serializer.save(lead_player=self.request.user, join_code=join_code)
+            team = serializer.save(lead_player=self.request.user)
 
             TeamMember.objects.create(
                 team=team,
@@ -420,12 +429,12 @@ class TeamViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def join(self, request, pk=None):
         team = self.get_object()
-        join_code = request.data.get('join_code', '')
+        join_code = normalize_join_code(request.data.get('join_code'))
         
         if team.join_code != join_code:
             return Response({'error': 'Invalid join code'}, status=status.HTTP_400_BAD_REQUEST)
         
-        if TeamMember.objects.filter(team=team, player=request.user).exists():
+        if get_membership(request).is_member(team.id):
             return Response({'error': 'Already a member of this team'}, status=status.HTTP_400_BAD_REQUEST)
         
         TeamMember.objects.create(team=team, player=request.user)
@@ -456,7 +465,7 @@ class TeamViewSet(viewsets.ModelViewSet):
             serializer = TeamMemberSerializer(members, many=True)
             return Response(serializer.data)
 
-        if team.lead_player != request.user:
+        if not get_membership(request).leads(team.id):
             return Response({'error': 'Only team leads can add members'}, status=status.HTTP_403_FORBIDDEN)
 
         email = request.data.get('email')
@@ -477,6 +486,93 @@ class TeamViewSet(viewsets.ModelViewSet):
 
         return Response({'success': 'Player added to team successfully'}, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=['post'], url_path='members/bulk')
+    def bulk_members(self, request, pk=None):
+        team = self.get_object()
+
+        if not get_membership(request).leads(team.id):
+            return Response({'error': 'Only team leads can add members'}, status=status.HTTP_403_FORBIDDEN)
+
+        emails = request.data.get('emails') or []
+        player_ids = request.data.get('player_ids') or []
+        role = request.data.get('role', 'MEMBER')
+
+        if not isinstance(emails, list) or not isinstance(player_ids, list):
+            return Response({'error': 'emails and player_ids must be lists'}, status=status.HTTP_400_BAD_REQUEST)
+        if not emails and not player_ids:
+            return Response({'error': 'emails or player_ids is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(emails) + len(player_ids) > BULK_MEMBER_LIMIT:
+            return Response(
+                {'error': f'At most {BULK_MEMBER_LIMIT} players can be added per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if role not in dict(TeamMember.ROLE_CHOICES):
+            return Response({'error': 'Invalid role'}, status=status.HTTP_400_BAD_REQUEST)
+
+        items = [('email', Player.objects.normalize_email(str(email).strip())) for email in emails]
+        for player_id in player_ids:
+            try:
+                items.append(('player_id', int(player_id)))
+            except (TypeError, ValueError):
+                items.append(('player_id', None))
+
+        lookup_emails = {value for kind, value in items if kind == 'email' and value}
+        lookup_ids = {value for kind, value in items if kind == 'player_id' and value is not None}
+
+        players = Player.objects.filter(Q(email__in=lookup_emails) | Q(id__in=lookup_ids)).only('id', 'email')
+        by_email = {player.email: player.id for player in players}
+        by_id = set(by_email.values())
+
+        with transaction.atomic():
+            # Concurrent bulk adds to one team queue on the team row, so the
+            # membership read below is still true when the insert runs.
+            Team.objects.select_for_update().filter(pk=team.pk).exists()
+            existing = set(
+                TeamMember.objects.filter(team=team, player_id__in=by_id).values_list('player_id', flat=True)
+            )
+
+            results = []
+            to_add = []
+            seen = set()
+            for kind, value in items:
+                player_id = by_email.get(value) if kind == 'email' else (value if value in by_id else None)
+                if player_id is None:
+                    item_status = 'not_found'
+                elif player_id in seen:
+                    item_status = 'duplicate'
+                elif player_id in existing:
+                    item_status = 'already_member'
+                else:
+                    item_status = 'added'
+                    to_add.append(TeamMember(team=team, player_id=player_id, role=role))
+                if player_id is not None:
+                    seen.add(player_id)
+                results.append({'type': kind, 'value': value, 'player_id': player_id, 'status': item_status})
+
+            try:
+                with transaction.atomic():
+                    TeamMember.objects.bulk_create(to_add)
+                added = {member.player_id for member in to_add}
+            except IntegrityError:
+                # Joins by code or single adds don't take the team lock; insert row
+                # by row so each one that lost the race is reported as it stands.
+                added = set()
+                for member in to_add:
+                    try:
+                        with transaction.atomic():
+                            TeamMember.objects.create(team=team, player_id=member.player_id, role=role)
+                        added.add(member.player_id)
+                    except IntegrityError:
+                        pass
+
+        for result in results:
+            if result['status'] == 'added' and result['player_id'] not in added:
+                result['status'] = 'already_member'
+
+        return Response(
+            {'added': len(added), 'results': results},
+            status=status.HTTP_201_CREATED if added else status.HTTP_200_OK
+        )
 
     @action(detail=True, methods=['delete'], url_path='remove_member')
     def remove_member(self, request, pk=None):
@@ -491,7 +587,7 @@ class TeamViewSet(viewsets.ModelViewSet):
         except TeamMember.DoesNotExist:
             return Response({'error': 'Member not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        if member.player == team.lead_player:
+        if member.player_id == team.lead_player_id:
             return Response({'error': 'Cannot remove the team lead'}, status=status.HTTP_400_BAD_REQUEST)
 
         member.delete()
@@ -506,11 +602,11 @@ class TeamMemberViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         if self.request.user.is_admin:
             return self.queryset
-        return self.queryset.filter(team__lead_player=self.request.user)
+        return self.queryset.filter(team_id__in=get_membership(self.request).led_team_ids)
     
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        if instance.team.lead_player != request.user and not request.user.is_admin:
+        if not get_membership(request).leads(instance.team_id) and not request.user.is_admin:
             return Response(
                 {'error': 'Only team lead or admin can remove members'},
                 status=status.HTTP_403_FORBIDDEN
@@ -524,19 +620,24 @@ class TournamentViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     
     def get_permissions(self):
-        if self.action in ['list', 'retrieve', 'available', 'register', 'registered']:
+        if self.action in ['list', 'retrieve', 'available', 'register', 'registered', 'waitlist']:
             return [IsAuthenticated()]
         return [IsAdminUser()]
     
     def get_queryset(self):
         queryset = super().get_queryset()
+        # Filters use the (status, start_date) index; the date half covers
+        # tournaments the lifecycle task has not ticked over yet.
         status = self.request.query_params.get('status')
         if status == 'upcoming':
-            queryset = queryset.filter(start_date__gt=timezone.now(), is_active=True)
+            queryset = queryset.filter(Tournament.upcoming_q(), is_active=True)
         elif status == 'ongoing':
-            queryset = queryset.filter(start_date__lte=timezone.now(), is_completed=False, is_active=True)
+            queryset = queryset.filter(Tournament.ongoing_q(), is_active=True)
         elif status == 'completed':
-            queryset = queryset.filter(is_completed=True)
+            # is_completed covers rows flagged by a bulk update that skipped save().
+            queryset = queryset.filter(Q(status='COMPLETED') | Q(is_completed=True))
+        elif status in dict(Tournament.STATUS_CHOICES):
+            queryset = queryset.filter(status=status)
         
         return queryset.order_by('start_date')
 
@@ -547,38 +648,80 @@ class TournamentViewSet(viewsets.ModelViewSet):
         if not team_id:
             return Response({'error': 'team_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         
+        if not get_membership(request).leads(team_id):
+            return Response({'error': 'Team not found or you are not the lead'}, status=status.HTTP_404_NOT_FOUND)
         try:
-            team = Team.objects.get(id=team_id, lead_player=request.user)
+            team = Team.objects.get(id=team_id)
         except Team.DoesNotExist:
-            print("Team not found nor lead")
             return Response({'error': 'Team not found or you are not the lead'}, status=status.HTTP_404_NOT_FOUND)
         
         if TournamentParticipant.objects.filter(tournament=tournament, team=team).exists():
             print("Team already registered")
             return Response({'error': 'Team already registered'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        if tournament.participants.count() >= tournament.max_players:
-            print("Torna is full")
-            return Response({'error': 'Tournament is full'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        participant = TournamentParticipant.objects.create(tournament=tournament, team=team)
-        tournament.registered_players += 1
-        tournament.save()
-        
+
+        if not tournament.registration_is_open():
+            return Response({'error': 'Registration for this tournament is closed'}, status=status.HTTP_400_BAD_REQUEST)
+
+        waitlist = RegistrationWaitlist(tournament)
+
+        with transaction.atomic():
+            tournament = Tournament.objects.select_for_update().get(pk=tournament.pk)
+
+            # Once a queue exists, newcomers line up behind it instead of racing for freed
+            # seats; seat whoever is queued first so those seats don't stay empty.
+            if waitlist.is_open():
+                for seated in waitlist.promote():
+                    if seated.team_id == team.id:
+                        return Response(TournamentParticipantSerializer(seated).data, status=status.HTTP_201_CREATED)
+
+            if tournament.participants.count() >= tournament.max_players or waitlist.is_open():
+                entry, _ = waitlist.enqueue(team)
+                serializer = TournamentWaitlistEntrySerializer(entry, context={'position': waitlist.position(entry)})
+                return Response(
+                    {'detail': 'Tournament is full, team added to the waitlist', 'waitlist': serializer.data},
+                    status=status.HTTP_202_ACCEPTED
+                )
+
+            participant = TournamentParticipant.objects.create(tournament=tournament, team=team)
+            notifications.team_registered(participant)
+
         serializer = TournamentParticipantSerializer(participant)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=['get', 'delete'])
+    def waitlist(self, request, pk=None):
+        team_id = request.query_params.get('team_id') or request.data.get('team_id')
+        if not team_id:
+            return Response({'error': 'team_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Polled by clients while queued, so skip loading the tournament itself.
+        if not get_membership(request).leads(team_id):
+            return Response({'error': 'Team is not on the waitlist'}, status=status.HTTP_404_NOT_FOUND)
+
+        entry = TournamentWaitlistEntry.objects.filter(tournament_id=pk, team_id=team_id).first()
+        if not entry:
+            return Response({'error': 'Team is not on the waitlist'}, status=status.HTTP_404_NOT_FOUND)
+
+        if request.method == 'DELETE':
+            entry.delete()
+            # Normally a no-op; a stuck queue with free seats moves up here.
+            RegistrationWaitlist(entry.tournament).promote()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        position = RegistrationWaitlist.position(entry)
+        serializer = TournamentWaitlistEntrySerializer(entry, context={'position': position})
+        return Response(serializer.data)
+
     @action(detail=False, methods=['get'])
     def available(self, request):
         try:
-            team_member = TeamMember.objects.get(
-                player=request.user,
-                role__in=['CAPTAIN', 'CO_LEAD']
-            )
-            team = team_member.team
+            team_ids = get_membership(request).team_ids_with_role('CAPTAIN', 'CO_LEAD')
+            if not team_ids:
+                raise TeamMember.DoesNotExist
+            team = Team.objects.get(id=min(team_ids))
             available_tournaments = Tournament.objects.filter(
+                Tournament.registration_open_q(),
                 is_active=True,
-                start_date__gt=timezone.now(),
                 level=team.tier
             ).exclude(
                 participants__team=team
@@ -611,7 +754,7 @@ class TournamentViewSet(viewsets.ModelViewSet):
         try:
             team = Team.objects.get(id=team_id)
 
-            if not TeamMember.objects.filter(team=team, player=request.user).exists():
+            if not get_membership(request).is_member(team.id):
                 return Response(
                     {'error': 'You are not a member of this team'},
                     status=status.HTTP_403_FORBIDDEN
@@ -639,6 +782,21 @@ class TournamentViewSet(viewsets.ModelViewSet):
         serializer = TournamentParticipantSerializer(participants, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def seeding(self, request, pk=None):
+        # Preview of the seeds generate_bracket would use; nothing is saved.
+        tournament = self.get_object()
+        return Response([{
+            'seed': participant.seed,
+            'participant_id': participant.id,
+            'team_id': participant.team_id,
+            'team_name': participant.team.name,
+            'rating': round(participant.seed_rating, 1),
+            'tier': participant.team.tier,
+            'region': participant.seed_region,
+            'protected': participant.protected_seed is not None,
+        } for participant in SeedingService(tournament).seed(save=False)])
+
     @action(detail=True, methods=['post'])
     def generate_bracket(self, request, pk=None):
         tournament = self.get_object()
@@ -648,33 +806,23 @@ class TournamentViewSet(viewsets.ModelViewSet):
                 {'error': 'Need at least 2 teams to generate bracket'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        bracket = tournament.generate_bracket()
-        tournament.bracket_structure = bracket
-        tournament.is_started = True
-        tournament.save()
-        
-        self._create_initial_matches(tournament, bracket)
-        
-        return Response(bracket)
+        if tournament.bracket_type not in SUPPORTED_BRACKET_TYPES:
+            return Response(
+                {'error': f'{tournament.get_bracket_type_display()} brackets are not supported yet'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-    def _create_initial_matches(self, tournament, bracket):
-        if tournament.bracket_type == 'SINGLE_ELIM':
-            first_round = bracket.get('rounds', [{}])[0]
-            matches = first_round.get('matches', [])
-            
-            for i, match in enumerate(matches, start=1):
-                team1 = match.get('team1', {}).get('id')
-                team2 = match.get('team2', {}).get('id')
-                
-                TournamentMatch.objects.create(
-                    tournament=tournament,
-                    round_number=1,
-                    match_number=i,
-                    team1_id=team1,
-                    team2_id=team2,
-                    scheduled_time=tournament.start_date
-                )
+        # Generation runs outside the request (see BRACKET_JOB_RUNNER); clients
+        # poll the returned status_url.
+        job, created = start_bracket_job(tournament, request.user, request.headers.get('Idempotency-Key'))
+        serializer = BracketGenerationJobSerializer(job, context={'request': request})
+        active = job.status in ACTIVE_STATUSES
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED if active else status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'], url_path=r'bracket-jobs/(?P<job_id>\d+)')
+    def bracket_job(self, request, pk=None, job_id=None):
+        job = get_object_or_404(BracketGenerationJob, pk=job_id, tournament_id=pk)
+        return Response(BracketGenerationJobSerializer(job, context={'request': request}).data)
 
 class SquadMemberViewSet(viewsets.ModelViewSet):
     queryset = SquadMember.objects.all()
@@ -686,7 +834,7 @@ class SquadMemberViewSet(viewsets.ModelViewSet):
         squad_id = self.request.query_params.get('squad')
 
         queryset = SquadMember.objects.filter(
-            squad__participant__team__lead_player=player
+            squad__participant__team_id__in=get_membership(self.request).led_team_ids
         )
 
         if squad_id:
@@ -702,22 +850,26 @@ class SquadMemberViewSet(viewsets.ModelViewSet):
         current_player = self.request.user
 
         try:
-            squad = Squad.objects.get(
+            squad = Squad.objects.select_related('participant').get(
                 id=squad_id,
-                participant__team__lead_player=current_player
+                participant__team_id__in=get_membership(self.request).led_team_ids
             )
 
-            player = TeamMember.objects.get(
-                team=squad.participant.team,
+            player = TeamMember.objects.select_related('player').get(
+                team_id=squad.participant.team_id,
                 player__id=player_id
             ).player
         except (Squad.DoesNotExist, TeamMember.DoesNotExist):
             raise PermissionDenied("Invalid squad or player not in team.")
 
-        serializer.save(squad=squad, player=player)
+        try:
+            serializer.save(squad=squad, player=player)
+        except SquadCapacityError as e:
+            raise serializers.ValidationError(str(e))
 
     def perform_destroy(self, instance):
-        if instance.squad.participant.team.lead_player != self.request.user:
+        team_id = Squad.objects.filter(id=instance.squad_id).values_list('participant__team_id', flat=True).first()
+        if not get_membership(self.request).leads(team_id):
             raise PermissionDenied("Only team leads can remove squad members.")
         instance.delete()
 
@@ -733,7 +885,7 @@ class AccountTypeUpdateView(APIView):
 
         user = request.user
         user.is_team_lead = is_team_lead
-        user.save()
+        user.save(update_fields=['is_team_lead'])
 
         return Response({'message': 'Account type updated'}, status=200)
 
@@ -746,7 +898,7 @@ class CountryCodeUpdateView(APIView):
 
         user = request.user
         user.country_code = country_code
-        user.save()
+        user.save(update_fields=['country_code'])
 
         return Response({'message': 'Country code updated'}, status=200)
 
@@ -758,13 +910,25 @@ class TournamentParticipantViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         if self.request.user.is_admin:
             return self.queryset
-        return self.queryset.filter(team__lead_player=self.request.user)
+        return self.queryset.filter(team_id__in=get_membership(self.request).led_team_ids)
 
     def perform_destroy(self, instance):
-        if instance.team.lead_player != self.request.user and not self.request.user.is_admin:
+        if not get_membership(self.request).leads(instance.team_id) and not self.request.user.is_admin:
             raise PermissionDenied("You cannot delete this participant.")
         instance.delete()
 
+    @action(detail=True, methods=['post'])
+    def auto_balance(self, request, pk=None):
+        participant = self.get_object()
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+
+        try:
+            plan = SquadBalancer(participant).apply(dry_run=dry_run)
+        except BalancingError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'dry_run': dry_run, **plan})
+
 class TournamentMatchViewSet(viewsets.ModelViewSet):
     queryset = TournamentMatch.objects.all()
     serializer_class = TournamentMatchSerializer
@@ -777,8 +941,35 @@ class TournamentMatchViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         tournament_id = self.request.query_params.get('tournament_id')
         if tournament_id:
-            return self.queryset.filter(tournament_id=tournament_id)
+            return self.queryset.filter(tournament_id=tournament_id).order_by('scheduled_time', 'id')
         return self.queryset
+
+    def _rate_if_completed(self, match):
+        # Matches finished through create/update are rated like set_winner's;
+        # record_match_result skips anything already rated.
+        if not (match.is_completed and match.winner_id):
+            return
+        if match.completed_at is None:
+            match.completed_at = timezone.now()
+            match.save(update_fields=['completed_at'])
+        record_match_result(match)
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            match = serializer.save()
+            if match.scheduled_time:
+                notifications.match_scheduled(match)
+            self._rate_if_completed(match)
+
+    def perform_update(self, serializer):
+        previous_time = serializer.instance.scheduled_time
+        rescheduled = serializer.validated_data.get('scheduled_time', previous_time) != previous_time
+        with transaction.atomic():
+            # A moved match is owed a fresh reminder.
+            match = serializer.save(reminder_sent_at=None) if rescheduled else serializer.save()
+            if match.scheduled_time and rescheduled:
+                notifications.match_scheduled(match)
+            self._rate_if_completed(match)
     
     @action(detail=True, methods=['post'])
     def set_winner(self, request, pk=None):
@@ -805,9 +996,18 @@ class TournamentMatchViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        match.winner = winner
-        match.is_completed = True
-        match.save()
+        try:
+            player_stats = parse_player_stats(request.data.get('player_stats'))
+            with transaction.atomic():
+                match.winner = winner
+                match.is_completed = True
+                match.completed_at = timezone.now()
+                match.save()
+                record_match_result(match)
+                record_match_stats(match, player_stats)
+                notifications.match_result(match)
+        except StatsError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         next_round = match.round_number + 1
         next_match_number = (match.match_number + 1) // 2
@@ -839,9 +1039,10 @@ def member_stats(request):
         last_activity__gte=threshold
     ).count()
     
-    today = timezone.now().date()
+    # A range rather than last_activity__date, which wraps the column and cannot use its index.
+    start_of_day = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
     active_today = Player.objects.filter(
-        last_activity__date=today
+        last_activity__gte=start_of_day
     ).count()
     
     return Response({
@@ -858,22 +1059,23 @@ class SquadViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         return self.queryset.filter(
-            participant__team__lead_player=self.request.user
+            participant__team_id__in=get_membership(self.request).led_team_ids
         )
 
     def perform_create(self, serializer):
-        user = self.request.user
+        membership = get_membership(self.request)
 
-        try:
-            team = Team.objects.get(lead_player=user)
-        except Team.DoesNotExist:
+        if not membership.led_team_ids:
             raise PermissionDenied("You are not a team lead.")
 
         participant = serializer.validated_data.get('participant')
-        if participant.team != team:
+        if not membership.leads(participant.team_id):
             raise PermissionDenied("You are not allowed to create a squad for this participant.")
 
-        serializer.save()
+        try:
+            serializer.save()
+        except SquadCapacityError as e:
+            raise serializers.ValidationError(str(e))
 
 
 
@@ -895,8 +1097,8 @@ class TournamentListView(generics.ListAPIView):
         all_tournaments = Tournament.objects.all()
 
         upcoming = Tournament.objects.filter(
-            is_active=True,
-            start_date__gt=timezone.now()
+            Tournament.upcoming_q(),
+            is_active=True
         ).order_by('start_date')
 
         return upcoming
@@ -913,7 +1115,9 @@ class TournamentListView(generics.ListAPIView):
 class UpcomingTournamentView(APIView):
     permission_classes = [AllowAny]
     def get(self, request):
-        tournament = Tournament.objects.filter(start_date__gte=now(), is_active=True).order_by('start_date').first()
+        tournament = Tournament.objects.filter(
+            Tournament.upcoming_q(), is_active=True
+        ).order_by('start_date').first()
         if not tournament:
             return Response({"error": "No upcoming tournament found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -935,15 +1139,15 @@ class JoinTeamView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        join_code = request.data.get('join_code', '').strip().upper()
+        join_code = request.data.get('join_code', '')
         print("join code received")
         try:
-            team = Team.objects.get(join_code=join_code)
+            team = Team.objects.get_by_join_code(join_code)
         except Team.DoesNotExist:
             print("Invalid join code")
             return Response({'error': 'Invalid join code'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if TeamMember.objects.filter(team=team, player=request.user).exists():
+        if get_membership(request).is_member(team.id):
             print(request.user)
             print("Already a member")
             return Response({'error': 'Already a member of this team'}, status=status.HTTP_400_BAD_REQUEST)
@@ -958,7 +1162,7 @@ class TournamentTeamViewSet(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         return self.queryset.filter(
-            team__lead_player=self.request.user
+            team_id__in=get_membership(self.request).led_team_ids
         )
 
 
@@ -976,7 +1180,7 @@ class AllTeamDetailsView(APIView):
         except Team.DoesNotExist:
             raise NotFound("Team not found")
 
-        if team.lead_player != request.user:
+        if not get_membership(request).leads(team.id):
             raise PermissionDenied("You are not authorized to view this team's details")
 
         squads = Squad.objects.filter(participant__team=team)
@@ -994,70 +1198,100 @@ class AllTeamDetailsView(APIView):
 class AssignRolesView(APIView):
     permission_classes = [IsAuthenticated]
 
+    def _resolve_participant(self, request):
+        membership = get_membership(request)
+        team_id = request.data.get('team_id')
+        if team_id is None:
+            # Older clients send no scope; that is only unambiguous for single-team players.
+            if len(membership.team_ids) != 1:
+                raise ValidationError("team_id is required for players in more than one team.")
+            team_id = next(iter(membership.team_ids))
+        elif not (membership.is_member(team_id) or membership.leads(team_id)):
+            raise ValidationError("Player is not in this team.")
+
+        participants = TournamentParticipant.objects.filter(team_id=team_id)
+        tournament_id = request.data.get('tournament_id')
+        if tournament_id is not None:
+            participants = participants.filter(tournament_id=tournament_id)
+
+        participants = list(participants[:2])
+        if not participants:
+            raise ValidationError("Team is not registered in this tournament.")
+        if len(participants) > 1:
+            raise ValidationError("tournament_id is required for teams in more than one tournament.")
+        return participants[0]
+
     def post(self, request):
         player = request.user
 
         data = request.data
-        is_team_captain = data.get('is_team_captain')
-        is_squad_lead = data.get('is_squad_lead')
+        is_team_captain = bool(data.get('is_team_captain'))
+        is_squad_lead = bool(data.get('is_squad_lead'))
         action_role = data.get('action_role')
 
         if not action_role:
             print("error Action role is required.")
             return Response({"error": "Action role is required."}, status=status.HTTP_400_BAD_REQUEST)
+        action_role = action_role.upper()
+        if action_role not in dict(SquadMember.ACTION_ROLE_CHOICES):
+            return Response({"error": "Invalid action role."}, status=status.HTTP_400_BAD_REQUEST)
 
-        player.is_team_captain = bool(is_team_captain)
-        player.save()
-
-        squad_members = SquadMember.objects.filter(player=player)
+        try:
+            participant = self._resolve_participant(request)
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not squad_members.exists():
-            try:
-                team_member = TeamMember.objects.get(player=player)
-                team = team_member.team
+        if is_squad_lead:
+            role = 'LEADER'
+        elif is_team_captain:
+            role = 'CAPTAIN'
+        else:
+            role = 'NONE'
 
-                participant = TournamentParticipant.objects.filter(team=team).first()
-                if not participant:
-                    return Response({"error": "Team is not registered in any tournament."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            return self._apply_roles(participant, player, role, action_role, is_team_captain)
+        except SquadCapacityError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-                existing_squad = Squad.objects.filter(participant=participant).first()
-                if not existing_squad:
+    def _apply_roles(self, participant, player, role, action_role, is_team_captain):
+        with transaction.atomic():
+            # Serialises concurrent role changes for the same team roster.
+            TournamentParticipant.objects.select_for_update().filter(pk=participant.pk).first()
+
+            squad_ids = list(SquadMember.objects.filter(
+                squad__participant=participant, player=player
+            ).values_list('squad_id', flat=True))
+
+            squad = None
+            if not squad_ids:
+                cap = participant.tournament.get_squad_player_cap()
+                squad = Squad.objects.filter(participant=participant, member_count__lt=cap).order_by('id').first()
+                if not squad:
                     used_types = Squad.objects.filter(participant=participant).values_list('squad_type', flat=True)
                     available_types = [choice[0] for choice in SquadType.choices if choice[0] not in used_types]
                     if not available_types:
                         return Response({"error": "No available squad types left to create."}, status=status.HTTP_400_BAD_REQUEST)
-
-                    existing_squad = Squad.objects.create(participant=participant, squad_type=available_types[0])
-
-                squad_member = SquadMember.objects.create(
-                    player=player,
-                    squad=existing_squad,
-                    role='NONE',
-                    action_role=action_role.upper()
-                )
-                squad_members = [squad_member]
-
-            except TeamMember.DoesNotExist:
-                return Response({"error": "Player is not in any team."}, status=status.HTTP_400_BAD_REQUEST)
-
-        for squad_member in squad_members:
-            if is_squad_lead:
-                SquadMember.objects.filter(
-                    squad=squad_member.squad, role='LEADER'
-                ).exclude(player=player).update(role='NONE')
-                squad_member.role = 'LEADER'
-
-            elif is_team_captain:
-                SquadMember.objects.filter(
-                    squad=squad_member.squad, role='CAPTAIN'
-                ).exclude(player=player).update(role='NONE')
-                squad_member.role = 'CAPTAIN'
-
+                    squad = Squad.objects.create(participant=participant, squad_type=available_types[0])
+                squad_ids = [squad.id]
+
+            # Demote whoever holds the role first so the per-squad unique
+            # constraints never see two holders, then promote in one statement.
+            if role == 'LEADER':
+                SquadMember.objects.filter(squad_id__in=squad_ids, role='LEADER').exclude(player=player).update(role='NONE')
+            elif role == 'CAPTAIN':
+                SquadMember.objects.filter(squad__participant=participant, role='CAPTAIN').exclude(player=player).update(role='NONE')
+
+            if squad is None:
+                SquadMember.objects.filter(squad_id__in=squad_ids, player=player).update(role=role, action_role=action_role)
             else:
-                squad_member.role = 'NONE'
+                SquadMember.objects.create(player=player, squad=squad, role=role, action_role=action_role)
+
+            # Queryset updates skip the SquadMember signals.
+            invalidate_team_squad_index(participant.team_id)
 
-            squad_member.action_role = action_role.upper()
-            squad_member.save()
+        if player.is_team_captain != is_team_captain:
+            player.is_team_captain = is_team_captain
+            player.save(update_fields=['is_team_captain'])
 
         return Response({"message": "Roles successfully updated."})
 
@@ -1070,16 +1304,112 @@ class UserSquadStatusView(APIView):
             return Response({"error": "team_id is required"}, status=400)
 
         try:
-            team = Team.objects.get(id=team_id)
-        except Team.DoesNotExist:
+            index = get_team_squad_index(int(team_id))
+        except ValueError:
+            index = None
+        if index is None:
             return Response({"error": "Team not found"}, status=404)
 
-        player = request.user
+        squads = index.get(request.user.pk, [])
+        return Response({"in_squad": bool(squads), "squads": squads})
+
+
+def leaderboard_partition(request):
+    scope = request.query_params.get('scope', 'global')
+    if scope not in leaderboard.SCOPES:
+        raise ValidationError(f"scope must be one of {', '.join(leaderboard.SCOPES)}")
+    value = request.query_params.get('value')
+    if scope != 'global' and not value:
+        # Default to the caller's own tier or country.
+        if not request.user.is_authenticated:
+            raise ValidationError("value is required")
+        value = request.user.tier if scope == 'tier' else request.user.country_code
+        if not value:
+            raise ValidationError("value is required")
+    return leaderboard.partition_key(scope, value)
+
+def int_param(request, name, default, minimum, maximum):
+    try:
+        value = int(request.query_params.get(name, default))
+    except (TypeError, ValueError):
+        raise ValidationError(f"{name} must be an integer")
+    return max(minimum, min(maximum, value))
+
+class LeaderboardView(APIView):
+    permission_classes = [AllowAny]
 
-        participants = TournamentParticipant.objects.filter(team=team)
+    def get(self, request):
+        try:
+            key = leaderboard_partition(request)
+            limit = int_param(request, 'limit', 50, 1, 100)
+            after = request.query_params.get('after')
+            if after is not None:
+                try:
+                    after = leaderboard.decode_cursor(after)
+                except ValueError:
+                    raise ValidationError("after must be a cursor from a previous page's next")
+        except ValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(leaderboard.top(key, limit, after))
+
+class LeaderboardMeView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            key = leaderboard_partition(request)
+            radius = int_param(request, 'radius', 5, 0, 25)
+        except ValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = leaderboard.around(key, request.user.pk, radius)
+        if result['rank'] is None:
+            return Response({'error': 'You are not ranked on this leaderboard'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(result)
+
+
+class ScrimQueueView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        entries = ScrimQueueEntry.objects.filter(
+            team_id__in=get_membership(request).team_ids, status='WAITING'
+        ).select_related('team').order_by('created_at')
+        return Response(ScrimQueueEntrySerializer(entries, many=True).data)
 
-        squads = Squad.objects.filter(participant__in=participants)
+    def post(self, request):
+        team_id = request.data.get('team_id')
+        if not get_membership(request).leads(team_id):
+            return Response({'error': 'Only the team lead can queue for scrims'}, status=status.HTTP_403_FORBIDDEN)
+
+        team = get_object_or_404(Team, pk=team_id)
+        try:
+            entry = enqueue_team(
+                team, request.user,
+                request.data.get('region'), request.data.get('platform'), request.data.get('mode'),
+            )
+        except ScrimQueueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ScrimQueueEntrySerializer(entry).data, status=status.HTTP_201_CREATED)
 
-        in_squad = SquadMember.objects.filter(squad__in=squads, player=player).exists()
+class ScrimQueueEntryView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def delete(self, request, entry_id):
+        entry = get_object_or_404(ScrimQueueEntry, pk=entry_id)
+        if not get_membership(request).leads(entry.team_id):
+            return Response({'error': 'Only the team lead can leave the scrim queue'}, status=status.HTTP_403_FORBIDDEN)
+        if not cancel_entry(entry):
+            return Response({'error': 'This entry is no longer waiting'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-        return Response({"in_squad": in_squad})
+class ScrimMatchListView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        team_ids = get_membership(request).team_ids
+        matches = ScrimMatch.objects.filter(
+            Q(team1_id__in=team_ids) | Q(team2_id__in=team_ids)
+        ).select_related('team1', 'team2').order_by('-created_at')[:50]
+        return Response(ScrimMatchSerializer(matches, many=True).data)